@@ -52,6 +52,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
+    'core.metrics.MetricsMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.slow_queries.SlowQueryLogMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,6 +64,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.RequestProfilerMiddleware',
+    'core.replicas.ReplicaMiddleware',
+    # Last: it runs the view itself for unsafe methods
+    'core.sqlite_writes.SerializedWriteMiddleware',
 ]
 
 ROOT_URLCONF = 'career_backend.urls'
@@ -87,13 +95,60 @@ WSGI_APPLICATION = 'career_backend.wsgi.application'
 
 USE_SQLITE = os.getenv('USE_SQLITE', '1') == '1'
 
+# Connection reuse. Connections stay open for DB_CONN_MAX_AGE seconds (0 closes them after every
+# request, the default with DEBUG because runserver starts a thread per request) and are checked
+# before reuse. POSTGRES_POOL=1 uses Django's psycopg 3 pool instead, which cannot be combined
+# with persistent connections. Pool statistics are exported by core/db_connections.py.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '0' if DEBUG else '60'))
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1'
+POSTGRES_POOL = os.getenv('POSTGRES_POOL', '0') == '1'
+
+# SQLite concurrency profile, applied to every new connection: WAL so readers never block the
+# writer, synchronous=NORMAL (durable across application crashes, may lose the last commits on
+# power loss), memory-mapped reads and a larger page cache. "timeout" is SQLite's busy_timeout.
+# SQLITE_SERIALIZE_WRITES starts transactions with BEGIN IMMEDIATE and runs write views in one
+# retried transaction; see core/sqlite_writes.py. WAL needs a local disk, not a network share.
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', '1') == '1'
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '32768'))
+SQLITE_SERIALIZE_WRITES = SQLITE_TUNING and os.getenv('SQLITE_SERIALIZE_WRITES', '1') == '1'
+SQLITE_WRITE_RETRIES = int(os.getenv('SQLITE_WRITE_RETRIES', '5'))
+SQLITE_WRITE_BACKOFF_MS = float(os.getenv('SQLITE_WRITE_BACKOFF_MS', '20'))
+
 if USE_SQLITE:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / os.getenv('SQLITE_DB_NAME', 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {},
+            # A file rather than Django's in-memory default, so the race tests' threads share one
+            # database through their own connections, locking as they would in production
+            'TEST': {'NAME': BASE_DIR / os.getenv('SQLITE_TEST_DB_NAME', 'test_db.sqlite3')},
         }
     }
+    if SQLITE_TUNING:
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': ';'.join([
+                'PRAGMA journal_mode=WAL',
+                'PRAGMA synchronous=NORMAL',
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+                f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}',
+                'PRAGMA temp_store=MEMORY',
+            ]),
+            'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+    if SQLITE_SERIALIZE_WRITES:
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+    for index, name in enumerate(filter(None, os.getenv('SQLITE_REPLICAS', '').split(',')), 1):
+        DATABASES[f'replica_{index}'] = {
+            **DATABASES['default'],
+            'NAME': BASE_DIR / name.strip(),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     DATABASES = {
         'default': {
@@ -103,8 +158,64 @@ else:
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'career_password'),
             'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
             'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {},
         }
     }
+    if POSTGRES_POOL:
+        # max_size bounds the connections of one worker process; size it to the worker's threads
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', '10')),
+        }
+    # Each entry is host[:port][/database]; omitted parts are the primary's
+    for index, replica in enumerate(filter(None, os.getenv('POSTGRES_REPLICAS', '').split(',')), 1):
+        address, _, name = replica.strip().partition('/')
+        host, _, port = address.partition(':')
+        DATABASES[f'replica_{index}'] = {
+            **DATABASES['default'],
+            'HOST': host or DATABASES['default']['HOST'],
+            'PORT': port or DATABASES['default']['PORT'],
+            'NAME': name or DATABASES['default']['NAME'],
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Read replicas for views with replica_reads = True, and how long a user's requests stay on the
+# primary after they write (read-your-writes); see core/replicas.py. The stickiness pins live in
+# the cache, so with several workers CACHE_BACKEND has to be shared (Redis, or files on one host).
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter'] if DATABASE_REPLICAS else []
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
+# Threads per process for the concurrent lookups of async views (core/async_views.py); each one
+# keeps its own database connection. Running them concurrently pays off with a networked database;
+# on a local SQLite file the thread handoffs cost more than they save, so it is off by default there.
+ASYNC_LOOKUP_THREADS = int(os.getenv('ASYNC_LOOKUP_THREADS', '8'))
+ASYNC_LOOKUPS_CONCURRENT = os.getenv('ASYNC_LOOKUPS_CONCURRENT', '0' if USE_SQLITE else '1') == '1'
+
+# Change events for /api/events/ (see core/events.py). LocalBackend reaches one process only; with
+# several workers on a host use core.events.FileBackend, whose EVENTS_DIR they must all share.
+EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'core.events.LocalBackend')
+EVENTS_DIR = os.getenv('EVENTS_DIR', str(BASE_DIR / 'events'))
+EVENTS_FILE_MAX_BYTES = int(os.getenv('EVENTS_FILE_MAX_BYTES', str(1 << 20)))
+EVENTS_POLL_SECONDS = float(os.getenv('EVENTS_POLL_SECONDS', '0.2'))
+EVENTS_REPLAY_SIZE = int(os.getenv('EVENTS_REPLAY_SIZE', '1000'))
+EVENTS_CLIENT_BUFFER = int(os.getenv('EVENTS_CLIENT_BUFFER', '100'))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+
+# GET /api/batch/ (see core/batch.py): paths per batch, and whether their views run concurrently.
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '10'))
+BATCH_CONCURRENT = os.getenv('BATCH_CONCURRENT', '1') == '1'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
 
 
 # Password validation
@@ -136,6 +247,14 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_HEADERS = list(default_headers) + [
     "content-type",
+    "x-profile-request",
+]
+
+CORS_EXPOSE_HEADERS = [
+    "X-DB-Query-Count",
+    "X-DB-Time-Ms",
+    "X-DB-Query-Budget",
+    "X-Profile-Id",
 ]
 
 CORS_ALLOW_METHODS = [
@@ -182,8 +301,47 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON; falls back to the stdlib encoder when orjson is missing (see core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# Directory shared by all gunicorn workers for metrics; empty keeps metrics per process.
+# Clear it when the server (re)starts so counters from old workers are not merged in.
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '1.0'))
+
+# Raise instead of logging when a view exceeds its declared query_budget
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', '0') == '1'
+
+# Slow query log (see core/slow_queries.py); browse it under Slow queries in the Django admin
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', '1') == '1'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.1'))
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', '1000'))
+
+# Response compression (see core/compression.py); Brotli is used when the brotli package is installed
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_MAX_RANDOM_BYTES = int(os.getenv('COMPRESSION_MAX_RANDOM_BYTES', '100'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+# JSON only: HTML pages carry CSRF tokens (BREACH)
+COMPRESSION_CONTENT_TYPES = ('application/json',)
+
+# Submitting a test packs its StudentAnswer rows into an AnswerSheet (see core/answer_sheets.py) and deletes them
+ANSWER_SHEET_KEEP_ROWS = os.getenv('ANSWER_SHEET_KEEP_ROWS', '0') == '1'
+
+# Write-behind buffer for answers (see core/autosave.py); an empty directory writes every answer directly.
+# The directory must be shared by all workers on the host.
+AUTOSAVE_JOURNAL_DIR = os.getenv('AUTOSAVE_JOURNAL_DIR', str(BASE_DIR / 'autosave'))
+AUTOSAVE_FLUSH_INTERVAL = float(os.getenv('AUTOSAVE_FLUSH_INTERVAL', '1.0'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('ACCESS_TOKEN_LIFETIME_MINUTES', 60))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.getenv('REFRESH_TOKEN_LIFETIME_DAYS', 7))),
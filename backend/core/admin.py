@@ -1,18 +1,32 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Avg, Count, Max, OuterRef, Subquery, Sum
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
 
 from .forms import CustomUserChangeForm, CustomUserCreationForm
 from .models import (
+    AnswerSheet,
     CareerRecommendation,
     CareerResource,
+    CareerScore,
+    CareerTag,
     Option,
+    OptionCareerWeight,
     PersonalizedTest,
     Question,
+    QuestionBank,
+    RequestProfile,
     ResourceCategory,
     RoadmapStep,
+    SlowQuery,
     StudentAnswer,
     StudentResourceProgress,
     TestRequest,
+    TestTemplate,
+    TestSnapshot,
+    TestTemplateQuestion,
     User,
 )
 
@@ -54,10 +68,24 @@ class TestRequestAdmin(admin.ModelAdmin):
     search_fields = ('student__email',)
 
 
+def _is_draft(question):
+    # Assigned tests are served from their frozen snapshot, so only drafts may change
+    return question is None or question.personalized_test.status == PersonalizedTest.Status.DRAFT
+
+
 class OptionInline(admin.TabularInline):
     model = Option
     extra = 0
 
+    def has_add_permission(self, request, obj=None):
+        return _is_draft(obj) and super().has_add_permission(request, obj)
+
+    def has_change_permission(self, request, obj=None):
+        return _is_draft(obj) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return _is_draft(obj) and super().has_delete_permission(request, obj)
+
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
@@ -65,6 +93,25 @@ class QuestionAdmin(admin.ModelAdmin):
     list_filter = ('personalized_test',)
     inlines = [OptionInline]
 
+    def has_change_permission(self, request, obj=None):
+        return _is_draft(obj) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return _is_draft(obj) and super().has_delete_permission(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        # The bulk delete action checks permission without an object
+        drafts = queryset.filter(personalized_test__status=PersonalizedTest.Status.DRAFT)
+        skipped = queryset.count() - drafts.count()
+        if skipped:
+            self.message_user(request, f"Skipped {skipped} questions of tests that are no longer drafts.", messages.WARNING)
+        super().delete_queryset(request, drafts)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'personalized_test':
+            kwargs['queryset'] = PersonalizedTest.objects.filter(status=PersonalizedTest.Status.DRAFT)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 
 @admin.register(PersonalizedTest)
 class PersonalizedTestAdmin(admin.ModelAdmin):
@@ -131,3 +178,166 @@ class StudentResourceProgressAdmin(admin.ModelAdmin):
     list_filter = ('status', 'is_favorite')
     search_fields = ('student__email', 'resource__title')
     readonly_fields = ('started_at', 'completed_at', 'updated_at')
+
+
+@admin.register(CareerTag)
+class CareerTagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name', 'description')
+
+
+@admin.register(OptionCareerWeight)
+class OptionCareerWeightAdmin(admin.ModelAdmin):
+    list_display = ('option', 'tag', 'weight')
+    list_filter = ('tag',)
+    raw_id_fields = ('option',)
+
+
+@admin.register(CareerScore)
+class CareerScoreAdmin(admin.ModelAdmin):
+    list_display = ('personalized_test', 'tag', 'score', 'rank', 'created_at')
+    list_filter = ('tag',)
+    readonly_fields = ('personalized_test', 'tag', 'score', 'rank', 'created_at')
+
+
+@admin.register(QuestionBank)
+class QuestionBankAdmin(admin.ModelAdmin):
+    list_display = ('prompt', 'admin', 'created_at')
+    search_fields = ('prompt',)
+    readonly_fields = ('content_hash', 'created_at')
+
+
+class TestTemplateQuestionInline(admin.TabularInline):
+    model = TestTemplateQuestion
+    extra = 0
+    raw_id_fields = ('question',)
+
+
+@admin.register(TestTemplate)
+class TestTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'admin', 'created_at')
+    search_fields = ('name', 'description')
+    inlines = [TestTemplateQuestionInline]
+
+
+@admin.register(TestSnapshot)
+class TestSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('test', 'version', 'content_hash', 'created_at')
+    readonly_fields = ('test', 'version', 'content_hash', 'payload', 'file', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(AnswerSheet)
+class AnswerSheetAdmin(admin.ModelAdmin):
+    list_display = ('test', 'answered_count', 'created_at')
+    readonly_fields = ('test', 'answered_count', 'created_at')
+    exclude = ('selections',)
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'user', 'status_code', 'duration_ms', 'query_count', 'sql_time_ms', 'download')
+    list_filter = ('method', 'status_code')
+    search_fields = ('path', 'user__email')
+    readonly_fields = (
+        'path', 'method', 'user', 'status_code', 'duration_ms', 'query_count', 'sql_time_ms',
+        'download', 'summary', 'queries', 'created_at',
+    )
+    exclude = ('profile',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        profile = self.get_object(request, pk)
+        if profile is None or not profile.profile:
+            raise Http404("Profile not found.")
+        return FileResponse(profile.profile.open('rb'), as_attachment=True, filename=profile.profile.name.split('/')[-1])
+
+    @admin.display(description='Profile')
+    def download(self, obj):
+        if not obj.pk or not obj.profile:
+            return '-'
+        return format_html('<a href="{}">Download .prof</a>', reverse('admin:core_requestprofile_download', args=[obj.pk]))
+
+
+def _fingerprint_stat(aggregate):
+    return Subquery(
+        SlowQuery.objects.filter(fingerprint=OuterRef('fingerprint'))
+        .order_by()
+        .values('fingerprint')
+        .annotate(value=aggregate)
+        .values('value')[:1]
+    )
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """
+    The changelist shows one row per fingerprint (its latest occurrence) with
+    totals for the whole group; follow the occurrences link, or filter on
+    ``?fingerprint=``, to list every captured query of a group.
+    """
+    list_display = ('short_sql', 'occurrences_link', 'total_time', 'avg_time', 'max_time', 'view', 'call_site', 'created_at')
+    list_filter = ('database', 'view')
+    search_fields = ('sql', 'view', 'call_site')
+    readonly_fields = (
+        'fingerprint', 'sql', 'duration_ms', 'database', 'view', 'call_site', 'stack', 'plan', 'created_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def _grouped(self, request):
+        match = request.resolver_match
+        return bool(match) and match.url_name == 'core_slowquery_changelist' and 'fingerprint' not in request.GET
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if not self._grouped(request):
+            return queryset
+        latest = SlowQuery.objects.order_by().values('fingerprint').annotate(latest=Max('id')).values('latest')
+        return queryset.filter(id__in=latest).annotate(
+            occurrences=_fingerprint_stat(Count('id')),
+            total_ms=_fingerprint_stat(Sum('duration_ms')),
+            avg_ms=_fingerprint_stat(Avg('duration_ms')),
+            max_ms=_fingerprint_stat(Max('duration_ms')),
+        ).order_by('-total_ms')
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql if len(obj.sql) <= 120 else obj.sql[:117] + '...'
+
+    @admin.display(description='Occurrences', ordering='occurrences')
+    def occurrences_link(self, obj):
+        url = reverse('admin:core_slowquery_changelist') + f'?fingerprint={obj.fingerprint}'
+        return format_html('<a href="{}">{}</a>', url, getattr(obj, 'occurrences', 1))
+
+    @admin.display(description='Total ms', ordering='total_ms')
+    def total_time(self, obj):
+        return f"{getattr(obj, 'total_ms', obj.duration_ms):.1f}"
+
+    @admin.display(description='Avg ms', ordering='avg_ms')
+    def avg_time(self, obj):
+        return f"{getattr(obj, 'avg_ms', obj.duration_ms):.1f}"
+
+    @admin.display(description='Max ms', ordering='max_ms')
+    def max_time(self, obj):
+        return f"{getattr(obj, 'max_ms', obj.duration_ms):.1f}"
@@ -0,0 +1,139 @@
+"""
+Packed answer sheets for completed tests.
+
+While a test is being taken every answer is a ``StudentAnswer`` row, so it
+can be saved and changed one question at a time. Submitting the test folds
+those rows into a single ``AnswerSheet``: an array of unsigned 16-bit
+integers (little-endian), one per question in ``(order, id)`` order, holding
+1 + the position of the chosen option among the question's options in
+``(order, id)`` order, or 0 for an unanswered question. Question and option
+ids are recovered from the test's frozen snapshot (``core.snapshots``), so a
+sheet is read back without joining questions or options. The rows are
+deleted once packed unless ``ANSWER_SHEET_KEEP_ROWS`` is set.
+
+``selected_options`` is the read path for the admin answers view, scoring and
+similarity. Tests completed before sheets existed are read from their rows
+until ``manage.py pack_answer_sheets`` has packed them.
+"""
+import sys
+import threading
+from array import array
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import AnswerSheet, StudentAnswer, TestSnapshot
+from .snapshots import current_snapshot, parsed_snapshot
+
+LAYOUT_CACHE_SIZE = 512
+PACK_BATCH_SIZE = 500
+
+_layouts = {}
+_layouts_lock = threading.Lock()
+
+
+def _by_position(item):
+    return item['order'], item['id']
+
+
+def layout(snapshot):
+    """``((question_id, (option_id, ...)), ...)`` in packing order, cached per snapshot."""
+    result = _layouts.get(snapshot.content_hash)
+    if result is None:
+        result = tuple(
+            (question['id'], tuple(option['id'] for option in sorted(question['options'], key=_by_position)))
+            for question in sorted(parsed_snapshot(snapshot)['questions'], key=_by_position)
+        )
+        with _layouts_lock:
+            if len(_layouts) >= LAYOUT_CACHE_SIZE:
+                _layouts.clear()
+            _layouts[snapshot.content_hash] = result
+    return result
+
+
+def pack(sheet_layout, selected_options):
+    packed = array('H', (
+        options.index(selected_options[question_id]) + 1
+        if selected_options.get(question_id) in options else 0
+        for question_id, options in sheet_layout
+    ))
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack(sheet_layout, selections):
+    """``{question_id: option_id}`` for the answered questions of a packed sheet."""
+    packed = array('H')
+    packed.frombytes(bytes(selections))
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return {
+        question_id: options[index - 1]
+        for (question_id, options), index in zip(sheet_layout, packed)
+        if index
+    }
+
+
+@transaction.atomic(savepoint=False)
+def pack_answer_sheet(test):
+    """Replace ``test``'s ``StudentAnswer`` rows with an ``AnswerSheet``; call when it is submitted."""
+    sheet_layout = layout(current_snapshot(test))
+    rows = StudentAnswer.objects.filter(student_id=test.request.student_id, question__personalized_test=test)
+    selected = dict(rows.values_list('question_id', 'option_id'))
+    selections = pack(sheet_layout, selected)
+    sheet, _ = AnswerSheet.objects.update_or_create(test=test, defaults={
+        'selections': selections,
+        'answered_count': len(unpack(sheet_layout, selections)),
+    })
+    if not getattr(settings, 'ANSWER_SHEET_KEEP_ROWS', False):
+        rows.delete()
+    return sheet
+
+
+def pack_completed_tests(tests, batch_size=PACK_BATCH_SIZE):
+    """Pack every test in ``tests`` (completed tests without a sheet) and return how many."""
+    tests = tests.filter(answer_sheet__isnull=True).select_related('request', 'snapshot').order_by('id')
+    packed = 0
+    while True:
+        # Packed tests drop out of the queryset, so always take the first batch
+        batch = list(tests[:batch_size])
+        for test in batch:
+            pack_answer_sheet(test)
+        packed += len(batch)
+        if len(batch) < batch_size:
+            return packed
+
+
+def selected_options(test_ids):
+    """``{test_id: {question_id: option_id}}`` from answer sheets, or answer rows for unsubmitted tests."""
+    test_ids = list(test_ids)
+    result = {test_id: {} for test_id in test_ids}
+    sheets = list(
+        AnswerSheet.objects.filter(test_id__in=test_ids)
+        .values_list('test_id', 'test__snapshot__content_hash', 'selections')
+    )
+    layouts = {content_hash: _layouts.get(content_hash) for _, content_hash, _ in sheets}
+    uncached = [test_id for test_id, content_hash, _ in sheets if layouts[content_hash] is None]
+    if uncached:
+        for snapshot in TestSnapshot.objects.filter(test_id__in=uncached).only('content_hash', 'payload'):
+            layouts[snapshot.content_hash] = layout(snapshot)
+    for test_id, content_hash, selections in sheets:
+        result[test_id] = unpack(layouts[content_hash], selections)
+
+    unpacked = set(test_ids).difference(test_id for test_id, _, _ in sheets)
+    if unpacked:
+        answers = StudentAnswer.objects.filter(
+            question__personalized_test_id__in=unpacked
+        ).values_list('question__personalized_test_id', 'question_id', 'option_id')
+        for test_id, question_id, option_id in answers:
+            result[test_id][question_id] = option_id
+    return result
+
+
+def test_selected_options(test):
+    """``selected_options`` for one test loaded with ``select_related('snapshot', 'answer_sheet')``."""
+    sheet = getattr(test, 'answer_sheet', None)  # RelatedObjectDoesNotExist is an AttributeError
+    if sheet is None:
+        return selected_options([test.id])[test.id]
+    return unpack(layout(current_snapshot(test)), sheet.selections)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import db_connections, events, resource_access, similarity
+
+        resource_access.connect_signals()
+        db_connections.connect_signals()
+        events.connect_signals()
+        similarity.connect_signals()
@@ -0,0 +1,97 @@
+"""
+Async DRF-style views whose independent lookups run concurrently.
+
+Django's async ORM methods (``acount()``, ``aget()``...) hand every query to
+the same thread of the request, so ``asyncio.gather`` over them still runs
+the queries one after another. ``gather_lookups`` instead runs each lookup,
+a plain sync callable, on its own thread of a shared pool, where it gets its
+own database connection (kept for ``CONN_MAX_AGE`` like any other). The
+request's execute wrappers (query budget counter, slow query log, profiler)
+and its replica routing are carried into those threads. Inside a transaction,
+or with ``ASYNC_LOOKUPS_CONCURRENT`` off, the lookups run one after another
+on the request's thread; without network latency to overlap that is faster.
+
+DRF's ``APIView`` is sync-only. ``AsyncAPIView`` keeps its authentication,
+permissions, content negotiation, exception responses and rendering, running
+the parts that touch the database in the request's sync thread, and awaits
+``async def`` handlers. Under WSGI Django runs such a view in an event loop
+per request; under ASGI (``gunicorn -k uvicorn_worker.UvicornWorker
+career_backend.asgi:application``) it runs natively. ``benchmark_asgi``
+compares the two at equal concurrency.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from rest_framework.views import APIView
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_LOOKUP_THREADS', 8), thread_name_prefix='async-lookup',
+)
+
+
+def _execute_wrappers():
+    return {alias: list(connections[alias].execute_wrappers) for alias in connections}
+
+
+def _run_lookup(lookup, wrappers):
+    try:
+        with ExitStack() as stack:
+            for alias, alias_wrappers in wrappers.items():
+                for wrapper in alias_wrappers:
+                    stack.enter_context(connections[alias].execute_wrapper(wrapper))
+            return lookup()
+    finally:
+        close_old_connections()  # Honours CONN_MAX_AGE for the pool thread's connections
+
+
+def _run_inline():
+    # Pool threads have connections of their own, outside the request's transaction: inside an
+    # atomic block (including every TestCase) they would not see its rows, and SQLite locks them out
+    return not getattr(settings, 'ASYNC_LOOKUPS_CONCURRENT', True) or connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+async def gather_lookups(*lookups):
+    """
+    Call the sync callables in ``lookups`` concurrently and return their results in order.
+
+    With ``ASYNC_LOOKUPS_CONCURRENT`` off, or inside a transaction, they run one
+    after another on the request's own thread and connection instead.
+    """
+    if await sync_to_async(_run_inline)():
+        return await sync_to_async(lambda: [lookup() for lookup in lookups])()
+    loop = asyncio.get_running_loop()
+    wrappers = await sync_to_async(_execute_wrappers)()  # The request thread's, where middleware set them
+    return await asyncio.gather(*(
+        loop.run_in_executor(_executor, contextvars.copy_context().run, _run_lookup, lookup, wrappers)
+        for lookup in lookups
+    ))
+
+
+class AsyncAPIView(APIView):
+    """``APIView`` with ``async def`` handlers; everything else behaves as in DRF."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # Authentication loads the user
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
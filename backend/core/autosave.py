@@ -0,0 +1,299 @@
+"""
+Write-behind buffer for answers to tests in progress.
+
+Students click through options quickly, and writing a ``StudentAnswer`` row
+for every click costs a read and a write inside a transaction. Instead
+``record_answer`` appends the change to a per-process journal
+(``<AUTOSAVE_JOURNAL_DIR>/answers-<pid>.jsonl``) and keeps it in memory,
+where later clicks on the same question replace it. A background thread
+upserts the buffered answers in batches every ``AUTOSAVE_FLUSH_INTERVAL``
+seconds.
+
+The journal is what makes this safe across workers and crashes:
+
+* ``pending_answers`` overlays the buffered answers of every worker (read
+  from their journals) so a test reads back what the student picked no
+  matter which worker took the click.
+* ``flush_attempt`` writes one attempt's answers from every worker
+  synchronously; ``StudentTestSubmitView`` calls it before counting answers.
+  It waits for this worker's own flush if one is in flight.
+* A journal whose worker died (its ``flock`` is free) is replayed into the
+  database and removed by the next worker that starts buffering.
+
+Answers to tests that are no longer assigned are dropped on flush. The
+answered counts in the student test list catch up within a flush interval. Two
+clicks on the same question handled by different workers within one flush
+interval are resolved by whichever worker flushes last. An empty
+``AUTOSAVE_JOURNAL_DIR`` turns buffering off and answers are written
+directly.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from itertools import count
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+from .models import PersonalizedTest, StudentAnswer
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; orphaned journals are then never recovered
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+def journal_dir():
+    directory = getattr(settings, 'AUTOSAVE_JOURNAL_DIR', '')
+    return Path(directory) if directory else None
+
+
+def _read_journal(path):
+    """``{(test_id, student_id, question_id): (timestamp, option_id)}``, newest entry per question."""
+    entries = {}
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return entries  # Rotated or removed since the directory was listed
+    for line in lines:
+        try:
+            stamp, test_id, student_id, question_id, option_id = json.loads(line)
+        except ValueError:
+            continue  # A line still being written
+        key = (test_id, student_id, question_id)
+        if key not in entries or entries[key][0] <= stamp:
+            entries[key] = (stamp, option_id)
+    return entries
+
+
+def _merge(target, entries):
+    for key, entry in entries.items():
+        if key not in target or target[key][0] <= entry[0]:
+            target[key] = entry
+
+
+def write_answers(entries):
+    """Upsert ``{(test_id, student_id, question_id): (timestamp, option_id)}``; returns rows written."""
+    if not entries:
+        return 0
+    assigned = set(PersonalizedTest.objects.filter(
+        id__in={test_id for test_id, _, _ in entries},
+        status=PersonalizedTest.Status.ASSIGNED,
+    ).values_list('id', flat=True))
+    answers = [
+        StudentAnswer(student_id=student_id, question_id=question_id, option_id=option_id)
+        for (test_id, student_id, question_id), (_, option_id) in entries.items()
+        if test_id in assigned
+    ]
+    StudentAnswer.objects.bulk_create(
+        answers,
+        batch_size=FLUSH_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['question', 'student'],
+        update_fields=['option'],
+    )
+    return len(answers)
+
+
+class AnswerBuffer:
+    def __init__(self, background=True):
+        self.background = background  # False leaves flushing to the caller
+        self._lock = threading.Lock()
+        # Held for a whole flush, so flush_attempt never runs while a batch is half written
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        self._pending = {}
+        self._journal = None
+        self._journal_path = None
+        self._rotations = count()
+
+    def _open_journal(self, path):
+        journal = open(path, 'a', buffering=1)
+        if fcntl is not None:
+            # Held for the life of the file; a free lock is how other workers spot an orphan
+            fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return journal
+
+    def _ensure_started(self, directory):
+        # Called under the lock; (re)initialises after a fork
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._pending = {}
+        directory.mkdir(parents=True, exist_ok=True)
+        self._journal_path = directory / f'answers-{self._pid}.jsonl'
+        self._journal = self._open_journal(self._journal_path)
+        if self.background:
+            threading.Thread(target=self._run, name='autosave-flush', daemon=True).start()
+
+    def record(self, test_id, student_id, question_id, option_id):
+        directory = journal_dir()
+        if directory is None:
+            # One upsert, the statement the flush batches
+            StudentAnswer.objects.bulk_create(
+                [StudentAnswer(student_id=student_id, question_id=question_id, option_id=option_id)],
+                update_conflicts=True,
+                unique_fields=['question', 'student'],
+                update_fields=['option'],
+            )
+            return
+        entry = (time.time_ns(), option_id)
+        with self._lock:
+            self._ensure_started(directory)
+            self._journal.write(json.dumps([entry[0], test_id, student_id, question_id, option_id]) + '\n')
+            self._pending[(test_id, student_id, question_id)] = entry
+        registry.inc('autosave_answers_buffered_total', {})
+
+    def _journals(self, directory):
+        # Not this process's active journal, whose entries are in _pending; its batch being
+        # flushed (``.flushing``) is no longer there, so that one is read like any other
+        active = f'answers-{self._pid}.jsonl'
+        return [path for path in directory.glob('answers-*') if not path.name.startswith(active)]
+
+    def pending(self, test_id, student_id):
+        """``{question_id: option_id}`` buffered in any worker but not yet written for this attempt."""
+        directory = journal_dir()
+        if directory is None:
+            return {}
+        entries = {}
+        for path in self._journals(directory):
+            _merge(entries, _read_journal(path))
+        with self._lock:
+            _merge(entries, self._pending)
+        return {
+            question_id: option_id
+            for (test, student, question_id), (_, option_id) in entries.items()
+            if test == test_id and student == student_id
+        }
+
+    def flush_attempt(self, test_id, student_id):
+        """Write this attempt's buffered answers from every worker now."""
+        directory = journal_dir()
+        if directory is None:
+            return 0
+        # Waits for a background flush in flight, which would otherwise write its older
+        # batch after this one, or not yet have written it when the answers are counted
+        with self._flush_lock:
+            entries = {}
+            for path in self._journals(directory):
+                _merge(entries, _read_journal(path))
+            with self._lock:
+                mine = {key: self._pending.pop(key) for key in list(self._pending) if key[:2] == (test_id, student_id)}
+            _merge(entries, mine)
+            written = write_answers({key: entry for key, entry in entries.items() if key[:2] == (test_id, student_id)})
+        registry.inc('autosave_answers_flushed_total', {}, written)
+        return written
+
+    def flush(self):
+        """Write every buffered answer of this process in one batch."""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            # Later clicks go to a fresh journal; the old one is removed once the batch is written
+            active = self._journal_path
+            flushing = active.with_name(f'{active.stem}.{next(self._rotations)}.flushing')
+            replacement = self._open_journal(active.with_name(active.name + '.new'))
+            os.replace(active, flushing)
+            os.replace(replacement.name, active)
+            self._journal.close()
+            self._journal = replacement
+        try:
+            written = write_answers(batch)
+        except Exception:
+            with self._lock:
+                for key, entry in batch.items():
+                    if key not in self._pending:
+                        self._pending[key] = entry
+                        self._journal.write(json.dumps([entry[0], *key, entry[1]]) + '\n')
+            flushing.unlink(missing_ok=True)
+            raise
+        flushing.unlink(missing_ok=True)
+        registry.inc('autosave_flushes_total', {})
+        registry.inc('autosave_answers_flushed_total', {}, written)
+        return written
+
+    def _run(self):
+        try:
+            recover_orphaned_journals(journal_dir())
+        except Exception:
+            # Left on disk for the next worker to try
+            _flush_failed('recover', 'Replaying orphaned autosave journals failed')
+        interval = getattr(settings, 'AUTOSAVE_FLUSH_INTERVAL', 1.0)
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Kept in the buffer and retried on the next tick
+                _flush_failed('flush', 'Autosave flush failed')
+            finally:
+                connections.close_all()
+
+
+def _flush_failed(stage, message):
+    logger.exception(message)
+    registry.inc('autosave_flush_errors_total', {'stage': stage})
+
+
+def recover_orphaned_journals(directory):
+    """Replay and remove the journals of workers that exited without flushing."""
+    if directory is None or fcntl is None:
+        return 0
+    entries, journals, handles = {}, [], []
+    try:
+        for path in directory.glob('answers-*.jsonl'):
+            if path.name == f'answers-{os.getpid()}.jsonl':
+                continue
+            try:
+                handle = open(path, 'a')
+            except OSError:
+                continue
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                continue  # Its worker is alive
+            handles.append(handle)
+            pid = path.stem.split('-', 1)[1]
+            for journal in (path, *directory.glob(f'answers-{pid}.*.flushing')):
+                _merge(entries, _read_journal(journal))
+                journals.append(journal)
+        write_answers(entries)
+        for journal in journals:
+            journal.unlink(missing_ok=True)
+    finally:
+        for handle in handles:
+            handle.close()
+    return len(entries)
+
+
+buffer = AnswerBuffer()
+record_answer = buffer.record
+pending_answers = buffer.pending
+flush_attempt = buffer.flush_attempt
+
+
+@atexit.register
+def _flush_on_exit():
+    if buffer._pid == os.getpid():
+        try:
+            buffer.flush()
+        except Exception:
+            # The journal is still on disk and is recovered by the next worker
+            _flush_failed('exit', 'Autosave flush on exit failed')
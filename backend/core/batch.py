@@ -0,0 +1,165 @@
+"""
+Several GET requests in one round trip.
+
+``GET /api/batch/?path=auth/me/&path=student/dashboard/`` answers with
+
+    {"responses": [{"path": "auth/me/", "status": 200, "body": {...}}, ...]}
+
+in the order asked. Paths are relative to the API root and may carry their
+own (URL-encoded) query string. The batch request goes through middleware
+and JWT authentication once; each path is then resolved and its view called
+directly with that user (DRF's forced authentication), so sub-requests skip
+the token check, the user lookup and the middleware stack. Replica routing
+still applies to each view with ``replica_reads``.
+
+Sync views run concurrently on the ``gather_lookups`` pool, each with its
+own connection, and async views concurrently on the event loop, unless
+``BATCH_CONCURRENT`` is off, in which case they run one after another.
+Bodies are spliced into the combined response as rendered, not re-encoded.
+Only JSON responses can be batched; a failing path gets its own status and
+``{"error": ...}`` body without failing the others. ``benchmark_batch``
+compares a page load made of separate requests with one batch.
+"""
+import asyncio
+import json
+import logging
+import time
+from functools import partial
+from urllib.parse import urljoin, urlsplit
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from .async_views import gather_lookups
+from .metrics import registry
+from .replicas import reading_from, replica_for
+
+logger = logging.getLogger(__name__)
+
+
+class BatchItemError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def max_paths():
+    return getattr(settings, 'BATCH_MAX_REQUESTS', 10)
+
+
+def _error_body(message):
+    return json.dumps({'error': message}).encode()
+
+
+def _prepare(request, root, path):
+    """The view to call for ``path`` and the sub-request to call it with."""
+    url = urlsplit(urljoin(root, path))
+    if not url.path.startswith(root) or url.scheme or url.netloc:
+        raise BatchItemError(400, "Paths must be relative to the API root.")
+    try:
+        match = resolve(url.path)
+    except Resolver404:
+        raise BatchItemError(404, "Not found.")
+    if match.func is getattr(request.resolver_match, 'func', None):
+        raise BatchItemError(400, "Batches cannot be nested.")
+
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = url.path
+    # Conditional and body headers belong to the batch itself
+    sub.META = {key: value for key, value in request.META.items() if not key.startswith(('HTTP_IF_', 'CONTENT_'))}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=url.path, QUERY_STRING=url.query, HTTP_ACCEPT='application/json')
+    sub.GET = QueryDict(url.query)
+    sub.COOKIES = request.COOKIES
+    sub.resolver_match = match
+    # Read by DRF's Request in place of the authentication classes
+    sub._force_auth_user, sub._force_auth_token = request.user, request.auth
+    return match, sub
+
+
+def _view_class(match):
+    return getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+
+
+def _run_sync(match, sub):
+    """``(response or exception, seconds)`` for a sync view."""
+    started = time.perf_counter()
+    try:
+        with reading_from(replica_for(sub, _view_class(match))):
+            response = match.func(sub, *match.args, **match.kwargs)
+    except Exception as exc:
+        logger.exception("Batched GET %s failed", sub.path)
+        response = exc
+    return response, time.perf_counter() - started
+
+
+async def _run_async(match, sub):
+    started = time.perf_counter()
+    try:
+        with reading_from(replica_for(sub, _view_class(match))):
+            response = await match.func(sub, *match.args, **match.kwargs)
+    except Exception as exc:
+        logger.exception("Batched GET %s failed", sub.path)
+        response = exc
+    return response, time.perf_counter() - started
+
+
+def _body(response):
+    if response.streaming:
+        response.close()
+        raise BatchItemError(400, "Streaming endpoints cannot be batched.")
+    if callable(getattr(response, 'render', None)):
+        response.render()
+    if not response.get('Content-Type', '').startswith('application/json'):
+        raise BatchItemError(406, "Only JSON endpoints can be batched.")
+    return response.content or b'null'
+
+
+def _entry(path, status, body):
+    return b'{"path":%s,"status":%d,"body":%s}' % (json.dumps(path).encode(), status, body)
+
+
+def _finish(path, match, result):
+    response, seconds = result
+    if isinstance(response, Exception):
+        status, body = 500, _error_body("Server error.")
+    else:
+        try:
+            status, body = response.status_code, _body(response)
+        except BatchItemError as exc:
+            status, body = exc.status, _error_body(str(exc))
+    # Sub-requests bypass MetricsMiddleware, which only sees the batch
+    route = match.url_name or match.route
+    registry.inc('batch_subrequests_total', {'route': route, 'status': str(status)})
+    registry.observe('batch_subrequest_duration_seconds', {'route': route}, seconds)
+    return _entry(path, status, body)
+
+
+async def dispatch_batch(request, paths):
+    """Call the views for GET ``paths`` as ``request``'s user; returns the combined JSON body."""
+    root = urljoin(request.path, '..')
+    entries = [None] * len(paths)
+    sync_calls, async_calls = [], []
+    for index, path in enumerate(paths):
+        try:
+            match, sub = _prepare(request, root, path)
+        except BatchItemError as exc:
+            entries[index] = _entry(path, exc.status, _error_body(str(exc)))
+            continue
+        (async_calls if iscoroutinefunction(match.func) else sync_calls).append((index, match, sub))
+
+    if getattr(settings, 'BATCH_CONCURRENT', True):
+        sync_results, *async_results = await asyncio.gather(
+            gather_lookups(*(partial(_run_sync, match, sub) for _, match, sub in sync_calls)),
+            *(_run_async(match, sub) for _, match, sub in async_calls),
+        )
+    else:
+        # In the request's own thread, where the middleware's query counters are set
+        sync_results = [await sync_to_async(_run_sync)(match, sub) for _, match, sub in sync_calls]
+        async_results = [await _run_async(match, sub) for _, match, sub in async_calls]
+
+    for (index, match, _), result in zip([*sync_calls, *async_calls], [*sync_results, *async_results]):
+        entries[index] = _finish(paths[index], match, result)
+    return b'{"responses":[%s]}' % b','.join(entries)
@@ -0,0 +1,349 @@
+"""
+In-process API benchmark for every route in core.urls.
+
+Requests go through the full Django/DRF stack with real JWT headers using the
+DRF test client. The run happens inside a transaction that is rolled back at
+the end, and every write request is additionally wrapped in its own rolled
+back savepoint, so the dataset looks the same for every request and every run.
+"""
+import itertools
+import json
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import (
+    CareerRecommendation,
+    CareerResource,
+    CareerTag,
+    PersonalizedTest,
+    ResourceCategory,
+    StudentAnswer,
+    TestRequest,
+    TestTemplate,
+    TestTemplateQuestion,
+    User,
+)
+from .question_bank import bank_question
+
+BENCHMARK_PASSWORD = 'benchmark-pass-123'
+
+
+class MissingData(Exception):
+    pass
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    role: str
+    weight: float = 1.0
+    kwargs: object = None
+    data: object = None
+    writes: bool = field(default=None)
+
+    def __post_init__(self):
+        if self.writes is None:
+            self.writes = self.method != 'GET'
+
+    @property
+    def key(self):
+        return f'{self.method} {self.name}'
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms):
+    values = sorted(latencies_ms)
+    return {
+        'samples': len(values),
+        'mean_ms': round(sum(values) / len(values), 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50), 3),
+        'p95_ms': round(percentile(values, 95), 3),
+        'p99_ms': round(percentile(values, 99), 3),
+        'max_ms': round(values[-1], 3) if values else 0.0,
+    }
+
+
+def build_fixtures():
+    """Pick representative rows from the current database; call inside the run transaction."""
+    admin = User.objects.filter(role=User.Roles.ADMIN).order_by('id').first()
+    recommendation = CareerRecommendation.objects.select_related(
+        'personalized_test__request__student'
+    ).order_by('id').first()
+    assigned = PersonalizedTest.objects.filter(
+        status=PersonalizedTest.Status.ASSIGNED, questions__isnull=False
+    ).select_related('request__student').order_by('id').first()
+    pending = TestRequest.objects.filter(status=TestRequest.Status.PENDING).order_by('id').first()
+    draft = PersonalizedTest.objects.filter(status=PersonalizedTest.Status.DRAFT).order_by('id').first()
+    unrecommended = PersonalizedTest.objects.filter(
+        status=PersonalizedTest.Status.COMPLETED, recommendation__isnull=True
+    ).order_by('id').first()
+    resource = CareerResource.objects.filter(is_active=True, career_recommendation__isnull=True).order_by('id').first()
+    category = ResourceCategory.objects.order_by('id').first()
+    missing = [
+        name for name, value in (
+            ('admin', admin), ('recommendation', recommendation), ('assigned test', assigned),
+            ('pending request', pending), ('draft test', draft),
+            ('completed test without recommendation', unrecommended),
+            ('general resource', resource), ('resource category', category),
+        ) if value is None
+    ]
+    if missing:
+        raise MissingData(f"Missing {', '.join(missing)}; load data with `manage.py seed_scale` first.")
+
+    student = recommendation.personalized_test.request.student
+    student.set_password(BENCHMARK_PASSWORD)
+    student.save(update_fields=['password'])
+
+    # The assigned test is answered in full so that submitting it succeeds
+    taker = assigned.request.student
+    questions = list(assigned.questions.prefetch_related('options'))
+    StudentAnswer.objects.filter(student=taker, question__in=questions).delete()
+    StudentAnswer.objects.bulk_create([
+        StudentAnswer(student=taker, question=question, option=question.options.all()[0])
+        for question in questions
+    ])
+
+    tag, _ = CareerTag.objects.get_or_create(name='Benchmark tag')
+    template = TestTemplate.objects.create(name='Benchmark template', admin=admin)
+    TestTemplateQuestion.objects.bulk_create([
+        TestTemplateQuestion(
+            template=template,
+            question=bank_question(f'Benchmark prompt {order}', [{'label': 'Yes'}, {'label': 'No'}])[0],
+            order=order,
+        )
+        for order in range(10)
+    ])
+    return {
+        'admin': admin,
+        'student': student,
+        'taker': taker,
+        'recommendation': recommendation,
+        'completed_test': recommendation.personalized_test,
+        'assigned_test': assigned,
+        'question': questions[0],
+        'option': questions[0].options.all()[0],
+        'pending_request': pending,
+        'draft_test': draft,
+        'unrecommended_test': unrecommended,
+        'resource': resource,
+        'category': category,
+        'tag': tag,
+        'template': template,
+    }
+
+
+_emails = itertools.count()
+
+ROUTES = [
+    Route('student-register', 'POST', 'anonymous', 0.2, data=lambda f: {
+        'email': f'benchmark-{next(_emails)}@example.com', 'password': 'benchmark-pass-123',
+        'first_name': 'Bench', 'qualification': 'BSc', 'interests': 'testing',
+    }),
+    Route('token-obtain', 'POST', 'anonymous', 0.5, writes=False, data=lambda f: {
+        'email': f['student'].email, 'password': BENCHMARK_PASSWORD,
+    }),
+    Route('token-refresh', 'POST', 'anonymous', 0.5, writes=False, data=lambda f: {
+        'refresh': str(RefreshToken.for_user(f['student'])),
+    }),
+    Route('current-user', 'GET', 'student', 3),
+    Route('student-dashboard', 'GET', 'student', 4),
+    Route('student-test-requests', 'GET', 'student', 1),
+    Route('student-test-requests', 'POST', 'student', 0.2, data=lambda f: {
+        'interests_snapshot': 'design, music', 'qualification_snapshot': 'BA',
+    }),
+    Route('student-test-list', 'GET', 'taker', 2),
+    Route('student-test-detail', 'GET', 'taker', 3, kwargs=lambda f: {'test_id': f['assigned_test'].id}),
+    Route('student-submit-answer', 'POST', 'taker', 6, kwargs=lambda f: {'test_id': f['assigned_test'].id},
+          data=lambda f: {'question_id': f['question'].id, 'option_id': f['option'].id}),
+    Route('student-submit-test', 'POST', 'taker', 0.3, kwargs=lambda f: {'test_id': f['assigned_test'].id}),
+    Route('student-recommendations', 'GET', 'student', 2),
+    Route('student-export-recommendation', 'GET', 'student', 0.3,
+          kwargs=lambda f: {'recommendation_id': f['recommendation'].id}),
+    Route('student-resources', 'GET', 'student', 2),
+    Route('student-resource-detail', 'GET', 'student', 1, kwargs=lambda f: {'pk': f['resource'].id}),
+    Route('student-resource-progress', 'GET', 'student', 0.5, kwargs=lambda f: {'resource_id': f['resource'].id}),
+    Route('student-resource-progress', 'POST', 'student', 0.5, kwargs=lambda f: {'resource_id': f['resource'].id},
+          data=lambda f: {'resource_id': f['resource'].id, 'status': 'in_progress'}),
+    Route('student-my-resources', 'GET', 'student', 1),
+    Route('admin-dashboard', 'GET', 'admin', 2),
+    Route('admin-test-requests', 'GET', 'admin', 1.5),
+    Route('admin-create-test', 'POST', 'admin', 0.3, kwargs=lambda f: {'request_id': f['pending_request'].id}),
+    Route('admin-test-by-request', 'GET', 'admin', 0.5, kwargs=lambda f: {'request_id': f['draft_test'].request_id}),
+    Route('admin-test-detail', 'GET', 'admin', 1, kwargs=lambda f: {'pk': f['draft_test'].id}),
+    Route('admin-create-question', 'POST', 'admin', 1, kwargs=lambda f: {'test_id': f['draft_test'].id},
+          data=lambda f: {'prompt': 'What do you enjoy?', 'order': 99, 'options': [
+              {'label': 'Building', 'order': 0}, {'label': 'Writing', 'order': 1},
+          ]}),
+    Route('admin-apply-template', 'POST', 'admin', 0.2, kwargs=lambda f: {'test_id': f['draft_test'].id},
+          data=lambda f: {'template_id': f['template'].id}),
+    Route('admin-assign-test', 'POST', 'admin', 0.3, kwargs=lambda f: {'test_id': f['draft_test'].id}),
+    Route('admin-completed-tests', 'GET', 'admin', 1),
+    Route('admin-test-answers', 'GET', 'admin', 1, kwargs=lambda f: {'test_id': f['completed_test'].id}),
+    Route('admin-create-recommendation', 'POST', 'admin', 0.3,
+          kwargs=lambda f: {'test_id': f['unrecommended_test'].id},
+          data=lambda f: {'career_name': 'Data Analyst', 'summary': 'Great fit.', 'steps': [
+              {'order': 1, 'title': 'Learn SQL', 'description': ''},
+          ]}),
+    Route('admin-similar-recommendations', 'GET', 'admin', 0.5,
+          kwargs=lambda f: {'test_id': f['unrecommended_test'].id}),
+    Route('admin-recommendations', 'GET', 'admin', 0.5),
+    Route('admin-question-bank', 'GET', 'admin', 0.3),
+    Route('admin-test-templates', 'GET', 'admin', 0.3),
+    Route('admin-test-template-detail', 'GET', 'admin', 0.2, kwargs=lambda f: {'pk': f['template'].id}),
+    Route('admin-career-tags', 'GET', 'admin', 0.2),
+    Route('admin-career-tag-detail', 'GET', 'admin', 0.1, kwargs=lambda f: {'pk': f['tag'].id}),
+    Route('admin-metrics', 'GET', 'admin', 0.1),
+    Route('batch', 'GET', 'student', 1, data=lambda f: {'path': [
+        'auth/me/', 'student/dashboard/', 'student/tests/', 'student/recommendations/', 'student/resources/',
+    ]}),
+    Route('admin-resource-categories', 'GET', 'admin', 0.3),
+    Route('admin-resource-category-detail', 'GET', 'admin', 0.1, kwargs=lambda f: {'pk': f['category'].id}),
+    Route('admin-resources', 'GET', 'admin', 0.5),
+    Route('admin-resource-detail', 'GET', 'admin', 0.3, kwargs=lambda f: {'pk': f['resource'].id}),
+]
+
+
+# Streams never finish, so they cannot be timed like the others; check_event_stream covers them
+STREAMING_ROUTES = {'event-stream'}
+
+
+def uncovered_routes(routes=ROUTES):
+    """URL names in core.urls that have no benchmark scenario."""
+    from . import urls
+
+    covered = {route.name for route in routes} | STREAMING_ROUTES
+    return sorted(pattern.name for pattern in urls.urlpatterns if pattern.name not in covered)
+
+
+def build_schedule(routes, total_requests, min_samples, rng):
+    total_weight = sum(route.weight for route in routes)
+    schedule = []
+    for route in routes:
+        count = max(min_samples, round(route.weight / total_weight * total_requests))
+        schedule.extend([route] * count)
+    rng.shuffle(schedule)
+    return schedule
+
+
+def run_benchmark(total_requests=2000, min_samples=20, seed=1, routes=ROUTES):
+    rng = random.Random(seed)
+    results = {route.key: {'latencies': [], 'queries': [], 'statuses': Counter()} for route in routes}
+    get_resolver()  # Warm the URL resolver before timing anything
+
+    # Answers are written directly: the autosave flush thread would write outside the rolled-back transaction
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], AUTOSAVE_JOURNAL_DIR='',
+    ), transaction.atomic():
+        fixtures = build_fixtures()
+        clients = {}
+        for role in ('anonymous', 'student', 'taker', 'admin'):
+            client = APIClient()
+            if role != 'anonymous':
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(fixtures[role])}')
+            clients[role] = client
+
+        def call(route):
+            path = reverse(route.name, kwargs=route.kwargs(fixtures) if route.kwargs else None)
+            client = clients[route.role]
+            if route.method == 'GET':
+                return client.get(path, route.data(fixtures) if route.data else None)
+            body = json.dumps(route.data(fixtures) if route.data else {})
+            return client.generic(route.method, path, body, content_type='application/json')
+
+        def timed(route):
+            # The debug query log is a bounded deque; start each request from empty
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                if route.writes:
+                    with transaction.atomic():
+                        response = call(route)
+                        transaction.set_rollback(True)
+                else:
+                    response = call(route)
+                elapsed = (time.perf_counter() - started) * 1000
+            # The header also counts queries that async views ran on their lookup threads
+            return response, elapsed, int(response.get('X-DB-Query-Count', len(queries.captured_queries)))
+
+        for route in routes:
+            timed(route)  # Warm-up, not recorded
+
+        schedule = build_schedule(routes, total_requests, min_samples, rng)
+        wall_started = time.perf_counter()
+        for route in schedule:
+            response, elapsed, query_count = timed(route)
+            result = results[route.key]
+            result['latencies'].append(elapsed)
+            result['queries'].append(query_count)
+            result['statuses'][response.status_code] += 1
+        wall_seconds = time.perf_counter() - wall_started
+        transaction.set_rollback(True)
+
+    report_routes = {}
+    all_latencies = []
+    for route in routes:
+        result = results[route.key]
+        all_latencies.extend(result['latencies'])
+        report_routes[route.key] = {
+            'role': route.role,
+            **summarize(result['latencies']),
+            'queries_mean': round(sum(result['queries']) / len(result['queries']), 2),
+            'queries_max': max(result['queries']),
+            'status_codes': {str(code): count for code, count in sorted(result['statuses'].items())},
+        }
+    return {
+        'meta': {
+            'database': connection.vendor,
+            'requests': len(schedule),
+            'seed': seed,
+            'rows': {
+                'users': User.objects.count(),
+                'test_requests': TestRequest.objects.count(),
+                'answers': StudentAnswer.objects.count(),
+                'recommendations': CareerRecommendation.objects.count(),
+                'resources': CareerResource.objects.count(),
+            },
+        },
+        'overall': {
+            **summarize(all_latencies),
+            'wall_seconds': round(wall_seconds, 3),
+            'throughput_rps': round(len(schedule) / wall_seconds, 2) if wall_seconds else 0.0,
+        },
+        'routes': report_routes,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.25, noise_floor_ms=2.0):
+    """Return human-readable regressions of ``report`` against ``baseline``."""
+    regressions = []
+    for key, current in report['routes'].items():
+        previous = baseline.get('routes', {}).get(key)
+        if previous is None:
+            continue
+        allowed = previous['p95_ms'] * (1 + tolerance) + noise_floor_ms
+        if current['p95_ms'] > allowed:
+            regressions.append(f"{key}: p95 {current['p95_ms']:.1f}ms > {allowed:.1f}ms (baseline {previous['p95_ms']:.1f}ms)")
+        if current['queries_max'] > previous['queries_max']:
+            regressions.append(f"{key}: {current['queries_max']} queries > baseline {previous['queries_max']}")
+    for key, current in report['routes'].items():
+        server_errors = sum(count for code, count in current['status_codes'].items() if code.startswith('5'))
+        if server_errors:
+            regressions.append(f"{key}: {server_errors} server error(s)")
+    return regressions
@@ -0,0 +1,105 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` compresses API responses with Brotli (when the
+optional ``brotli`` package is installed and the client accepts ``br``) or
+gzip. Only non-streaming responses at least ``COMPRESSION_MIN_SIZE`` bytes
+long whose content type is in ``COMPRESSION_CONTENT_TYPES`` (JSON by default)
+are compressed; PDF exports, uploaded resource files, HTML pages such as the
+admin and other streamed or binary responses go out untouched. Bytes before
+and after compression are counted per route in ``core.metrics``.
+
+Compressing a page that holds a secret next to text the attacker controls
+leaks the secret through the compressed size (BREACH). HTML, where the CSRF
+tokens are, is therefore left alone, and gzip output is made by Django's
+``compress_string``, which pads it with a random-length filename as
+``GZipMiddleware`` does (``COMPRESSION_MAX_RANDOM_BYTES``). Brotli has no such
+padding, so ``br`` is only used for requests that carry no credentials;
+authenticated responses get padded gzip.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .metrics import registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = ('application/json',)
+
+
+def accepted_encodings(header):
+    """Encodings the client accepts, ignoring any listed with ``q=0``."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.lower())
+    return accepted
+
+
+def carries_credentials(request):
+    """Whether the response may hold data private to the caller: a JWT header or ``?token=``, or a session."""
+    return bool(
+        request.META.get('HTTP_AUTHORIZATION')
+        or 'token' in request.GET
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+    )
+
+
+def compressible(response):
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+    if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    types = getattr(settings, 'COMPRESSION_CONTENT_TYPES', DEFAULT_CONTENT_TYPES)
+    return any(content_type.startswith(prefix) if prefix.endswith('/') else content_type == prefix for prefix in types)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+    max_random_bytes = getattr(settings, 'COMPRESSION_MAX_RANDOM_BYTES', GZipMiddleware.max_random_bytes)
+    return compress_string(content, max_random_bytes=max_random_bytes)
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted and not carries_credentials(request):
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        original_size = len(response.content)
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= original_size:
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        match = getattr(request, 'resolver_match', None)
+        labels = {'route': (match.url_name or match.route) if match else 'unmatched', 'encoding': encoding}
+        registry.inc('http_response_uncompressed_bytes_total', labels, original_size)
+        registry.inc('http_response_compressed_bytes_total', labels, len(compressed))
+        return response
@@ -0,0 +1,62 @@
+"""
+Database connection reuse metrics.
+
+``DB_CONN_MAX_AGE`` keeps connections open between requests (checked with
+``CONN_HEALTH_CHECKS`` before reuse), and ``POSTGRES_POOL=1`` switches to
+Django's native psycopg pool instead; see ``settings.DATABASES``. Either way
+``db_connection_setups_total`` counts how often Django had to set up a
+connection, and for pooled aliases the psycopg pool's own statistics are
+exported as ``db_pool_*`` metrics after every request and on each scrape.
+"""
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import registry
+
+# Cumulative psycopg_pool statistics; pop_stats() returns them as deltas since the last call
+POOL_COUNTERS = {
+    'connections_num': 'db_pool_connections_total',
+    'connections_errors': 'db_pool_connection_errors_total',
+    'connections_lost': 'db_pool_connections_lost_total',
+    'requests_num': 'db_pool_requests_total',
+    'requests_queued': 'db_pool_requests_queued_total',
+    'requests_errors': 'db_pool_requests_errors_total',
+}
+POOL_GAUGES = {
+    'pool_size': 'db_pool_size',
+    'pool_available': 'db_pool_available',
+    'requests_waiting': 'db_pool_requests_waiting',
+    'pool_max': 'db_pool_max_size',
+}
+
+
+def connection_setup(sender, connection, **kwargs):
+    registry.inc('db_connection_setups_total', {'alias': connection.alias, 'vendor': connection.vendor})
+
+
+def open_pools():
+    """``(alias, pool)`` for every alias whose psycopg pool has been created in this process."""
+    for alias in connections:
+        pools = getattr(type(connections[alias]), '_connection_pools', None)
+        # Looked up directly: the DatabaseWrapper.pool property would create a pool
+        if pools and alias in pools:
+            yield alias, pools[alias]
+
+
+def record_pool_stats(**kwargs):
+    for alias, pool in open_pools():
+        labels = {'alias': alias}
+        stats = pool.pop_stats()
+        for key, name in POOL_GAUGES.items():
+            registry.set(name, labels, stats.get(key, 0))
+        for key, name in POOL_COUNTERS.items():
+            if stats.get(key):
+                registry.inc(name, labels, stats[key])
+        if stats.get('requests_wait_ms'):
+            registry.inc('db_pool_requests_wait_seconds_total', labels, stats['requests_wait_ms'] / 1000)
+
+
+def connect_signals():
+    connection_created.connect(connection_setup, dispatch_uid='db_connections_setup')
+    request_finished.connect(record_pool_stats, dispatch_uid='db_connections_pool_stats')
@@ -0,0 +1,433 @@
+"""
+Change events for test requests, tests and recommendations, streamed to
+clients as server-sent events instead of being polled for.
+
+The ``post_save`` receivers connected in ``CoreConfig.ready`` (and
+``transitions.status_changed``, since conditional UPDATEs skip
+``post_save``) publish a small event once the transaction commits:
+
+    test_request.created / test_request.updated   request_id, student_id, status
+    test.created / test.updated                   test_id, request_id, student_id, status, request_status
+    recommendation.created / .updated             recommendation_id, test_id, request_id, student_id
+
+Events go through the backend named by ``EVENTS_BACKEND``, which delivers
+every event published by any process to the ``hub`` of each process; the hub
+hands them to the streams it serves. Admins see every event (the focus
+queue), students only their own. ``LocalBackend`` reaches the publishing
+process only, which is enough for one worker. ``FileBackend`` appends to
+``<EVENTS_DIR>/events.jsonl``, shared by the workers on one host, and tails
+it from a background thread of each process; another broker (Redis pub/sub,
+Postgres LISTEN/NOTIFY) plugs in with the same three methods.
+
+Event ids are publication times in nanoseconds. A client reconnecting with
+``Last-Event-ID`` gets the events it missed that the backend still holds
+(``EVENTS_REPLAY_SIZE`` events, or the last two files of ``FileBackend``).
+A client that falls ``EVENTS_CLIENT_BUFFER`` events behind gets a ``resync``
+event instead and should reload through the REST endpoints. Streams send a
+comment every ``EVENTS_HEARTBEAT_SECONDS`` so proxies keep them open and
+dead connections are noticed. ``check_event_stream`` exercises the whole
+path.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import models, transaction
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import registry
+from .models import CareerRecommendation, PersonalizedTest, TestRequest
+from .transitions import status_changed
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; appends from several processes may then interleave
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ADMINS = 'admins'
+RETRY_MS = 3000
+
+
+def _now_ns(previous):
+    # Strictly increasing within a process even when the clock is coarse
+    return max(time.time_ns(), previous + 1)
+
+
+class LocalBackend:
+    """Delivers events within the publishing process."""
+
+    cross_process = False
+
+    def __init__(self):
+        self._recent = deque(maxlen=getattr(settings, 'EVENTS_REPLAY_SIZE', 1000))
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._dispatch = None
+
+    def publish(self, event):
+        with self._lock:
+            self._last_id = event['id'] = _now_ns(self._last_id)
+            self._recent.append(event)
+        if self._dispatch is not None:
+            self._dispatch(event)
+
+    def start(self, dispatch):
+        self._dispatch = dispatch
+
+    def replay(self, after_id):
+        with self._lock:
+            return [event for event in self._recent if event['id'] > after_id]
+
+
+class FileBackend:
+    """Delivers events to every process that shares ``EVENTS_DIR``, through an appended file."""
+
+    cross_process = True
+
+    def __init__(self):
+        directory = Path(settings.EVENTS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / 'events.jsonl'
+        self.rotated_path = directory / 'events.jsonl.1'
+        self.path.touch()
+        self._last_id = 0
+
+    def publish(self, event):
+        while True:
+            with open(self.path, 'ab') as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(handle.fileno()).st_ino != os.stat(self.path).st_ino:
+                        continue  # Rotated while this process waited for the lock
+                except FileNotFoundError:
+                    continue
+                # Ids are taken under the lock, so they grow in file order across processes
+                self._last_id = event['id'] = _now_ns(self._last_id)
+                handle.write(json.dumps(event, separators=(',', ':')).encode() + b'\n')
+                handle.flush()
+                if handle.tell() >= getattr(settings, 'EVENTS_FILE_MAX_BYTES', 1 << 20):
+                    os.replace(self.path, self.rotated_path)
+                    self.path.touch()
+                return
+
+    def start(self, dispatch):
+        threading.Thread(target=self._tail, args=(dispatch,), name='event-tail', daemon=True).start()
+
+    def _tail(self, dispatch):
+        handle = open(self.path, 'rb')
+        handle.seek(0, os.SEEK_END)  # Earlier events are served by replay()
+        partial_line = b''
+        interval = getattr(settings, 'EVENTS_POLL_SECONDS', 0.2)
+        while True:
+            chunk = handle.read()
+            if chunk:
+                lines = (partial_line + chunk).split(b'\n')
+                partial_line = lines.pop()
+                for line in lines:
+                    try:
+                        dispatch(json.loads(line))
+                    except ValueError:
+                        logger.warning("Skipping malformed event line in %s", self.path)
+                continue
+            try:
+                rotated = os.stat(self.path).st_ino != os.fstat(handle.fileno()).st_ino
+            except FileNotFoundError:
+                rotated = False  # Between the rename and the new file; look again next round
+            if rotated:
+                # The old file is drained, so follow the new one from its start
+                handle.close()
+                handle = open(self.path, 'rb')
+                partial_line = b''
+                continue
+            time.sleep(interval)
+
+    def replay(self, after_id):
+        events = []
+        for path in (self.rotated_path, self.path):
+            try:
+                lines = path.read_bytes().splitlines()
+            except FileNotFoundError:
+                continue
+            for line in lines:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # A line still being written
+                if event['id'] > after_id:
+                    events.append(event)
+        return events
+
+
+class Subscriber:
+    """One open stream: a buffer of the events its audience may see, filled from any thread."""
+
+    def __init__(self, audience):
+        self.audience = audience
+        self.pending = deque()
+        self.overflowed = False
+
+    def visible(self, event):
+        return self.audience == ADMINS or event['data']['student_id'] == self.audience
+
+    def offer(self, event):
+        if not self.visible(event):
+            return
+        if len(self.pending) >= getattr(settings, 'EVENTS_CLIENT_BUFFER', 100):
+            self.overflowed = True
+            self.pending.clear()
+            registry.inc('event_stream_overflows_total', {})
+        else:
+            self.pending.append(event)
+        self.wake()
+
+    def take(self):
+        events = []
+        while self.pending:
+            events.append(self.pending.popleft())
+        return events
+
+
+class ThreadSubscriber(Subscriber):
+    """For streams served by a WSGI worker thread."""
+
+    def __init__(self, audience):
+        super().__init__(audience)
+        self._ready = threading.Event()
+
+    def wake(self):
+        self._ready.set()
+
+    def wait(self, timeout):
+        self._ready.wait(timeout)
+        self._ready.clear()
+
+
+class AsyncSubscriber(Subscriber):
+    """For streams served by an ASGI event loop; woken from publishing threads."""
+
+    def __init__(self, audience):
+        super().__init__(audience)
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # The loop has shut down; the stream is gone
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+
+
+class Hub:
+    """The streams of this process, fed by the backend."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._backend = None
+        self._started = False
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = import_string(getattr(settings, 'EVENTS_BACKEND', 'core.events.LocalBackend'))()
+        return self._backend
+
+    def publish(self, event_type, data):
+        try:
+            self.backend.publish({'type': event_type, 'data': data})
+        except OSError:
+            # The change is committed; a lost event only delays clients until their next reload
+            logger.exception("Could not publish %s event", event_type)
+            return
+        registry.inc('events_published_total', {'type': event_type})
+
+    def dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(event)
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            if not self._started:
+                self.backend.start(self.dispatch)
+                self._started = True
+            self._subscribers.add(subscriber)
+            registry.set('event_stream_clients', {}, len(self._subscribers))
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            registry.set('event_stream_clients', {}, len(self._subscribers))
+
+    def replay(self, subscriber, after_id):
+        return [event for event in self.backend.replay(after_id) if subscriber.visible(event)]
+
+
+hub = Hub()
+
+
+# ========== PUBLISHING ==========
+
+def _publish_on_commit(event_type, data):
+    transaction.on_commit(partial(hub.publish, event_type, data))
+
+
+def _action(created):
+    return 'created' if created else 'updated'
+
+
+def test_request_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    _publish_on_commit(f'test_request.{_action(created)}', {
+        'request_id': instance.id, 'student_id': instance.student_id, 'status': instance.status,
+    })
+
+
+def test_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if PersonalizedTest.request.is_cached(instance):
+        student_id, request_status = instance.request.student_id, instance.request.status
+    else:
+        student_id, request_status = TestRequest.objects.filter(pk=instance.request_id).values_list(
+            'student_id', 'status'
+        ).get()
+    _publish_on_commit(f'test.{_action(created)}', {
+        'test_id': instance.id, 'request_id': instance.request_id, 'student_id': student_id,
+        'status': instance.status, 'request_status': request_status,
+    })
+
+
+def recommendation_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    test = instance.personalized_test if CareerRecommendation.personalized_test.is_cached(instance) else None
+    if test is not None and PersonalizedTest.request.is_cached(test):
+        request_id, student_id = test.request_id, test.request.student_id
+    else:
+        request_id, student_id = PersonalizedTest.objects.filter(pk=instance.personalized_test_id).values_list(
+            'request_id', 'request__student_id'
+        ).get()
+    _publish_on_commit(f'recommendation.{_action(created)}', {
+        'recommendation_id': instance.id, 'test_id': instance.personalized_test_id,
+        'request_id': request_id, 'student_id': student_id,
+    })
+
+
+def connect_signals():
+    models.signals.post_save.connect(test_request_saved, sender=TestRequest, dispatch_uid='events_test_request')
+    models.signals.post_save.connect(test_saved, sender=PersonalizedTest, dispatch_uid='events_test')
+    status_changed.connect(test_saved, sender=PersonalizedTest, dispatch_uid='events_test_status')
+    models.signals.post_save.connect(
+        recommendation_saved, sender=CareerRecommendation, dispatch_uid='events_recommendation'
+    )
+
+
+# ========== STREAMING ==========
+
+class QueryTokenAuthentication(JWTAuthentication):
+    """JWT access token from ``?token=``, since ``EventSource`` cannot send headers; the header works too."""
+
+    def authenticate(self, request):
+        raw_token = request.query_params.get('token')
+        if not raw_token:
+            return super().authenticate(request)
+        validated_token = self.get_validated_token(raw_token.encode())
+        return self.get_user(validated_token), validated_token
+
+
+def _frame(event):
+    data = json.dumps(event['data'], separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n".encode()
+
+
+RESYNC_FRAME = b'event: resync\ndata: {}\n\n'
+HEARTBEAT_FRAME = b': keepalive\n\n'
+
+
+def _frames(subscriber, seen):
+    if subscriber.overflowed:
+        subscriber.overflowed = False
+        subscriber.take()
+        return [RESYNC_FRAME]
+    # Replayed events can arrive again live; skip those by id
+    return [_frame(event) for event in subscriber.take() if event['id'] not in seen]
+
+
+def _last_event_id(request):
+    try:
+        return int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        return None
+
+
+def _sync_stream(audience, after_id, heartbeat):
+    # Subscribed on first iteration: a response closed before that never runs the finally
+    subscriber = ThreadSubscriber(audience)
+    hub.subscribe(subscriber)
+    try:
+        replayed = hub.replay(subscriber, after_id) if after_id is not None else []
+        seen = {event['id'] for event in replayed}
+        yield f'retry: {RETRY_MS}\n\n'.encode()
+        for event in replayed:
+            yield _frame(event)
+        while True:
+            subscriber.wait(heartbeat)
+            yield b''.join(_frames(subscriber, seen)) or HEARTBEAT_FRAME
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+async def _async_stream(audience, after_id, heartbeat):
+    # Subscribed inside the event loop that serves the stream
+    subscriber = AsyncSubscriber(audience)
+    hub.subscribe(subscriber)
+    try:
+        replayed = hub.replay(subscriber, after_id) if after_id is not None else []
+        seen = {event['id'] for event in replayed}
+        yield f'retry: {RETRY_MS}\n\n'.encode()
+        for event in replayed:
+            yield _frame(event)
+        while True:
+            await subscriber.wait(heartbeat)
+            yield b''.join(_frames(subscriber, seen)) or HEARTBEAT_FRAME
+    finally:
+        # Also reached when Django cancels the stream on client disconnect
+        hub.unsubscribe(subscriber)
+
+
+def event_stream_response(request, audience):
+    """A ``text/event-stream`` response that stays open and sends ``audience``'s events."""
+    after_id = _last_event_id(request)
+    heartbeat = getattr(settings, 'EVENTS_HEARTBEAT_SECONDS', 15)
+    if isinstance(request._request, ASGIRequest):
+        stream = _async_stream(audience, after_id, heartbeat)
+    else:
+        # Under WSGI each open stream holds a worker thread; fine for development, not at scale
+        stream = _sync_stream(audience, after_id, heartbeat)
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx would otherwise hold events back
+    return response
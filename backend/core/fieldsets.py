@@ -0,0 +1,308 @@
+"""
+Sparse fieldsets and expansion control for API responses.
+
+``?fields=id,title,category.name`` keeps only the listed fields; dotted names
+reach into nested objects. ``?expand=category`` embeds only the listed nested
+objects among a serializer's ``Meta.expandable_fields`` and renders the
+others as primary keys (``?expand=`` with no value collapses all of them).
+Without either parameter responses keep their full shape. Both parameters
+only apply to GET/HEAD/OPTIONS so they can never change what a write accepts.
+
+``SparseFieldsetMixin`` goes on the serializers; ``shape_queryset`` (or
+``SparseFieldsetViewMixin`` for generic views) trims ``select_related``,
+``prefetch_related`` and ``only()`` to the requested shape. Views that wrap
+serializer output in keys of their own trim those with ``select_keys`` and
+pass each serializer its key as ``fieldset_path`` in the context.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse(value):
+    if value is None:
+        return None
+    return {tuple(part for part in item.strip().split('.') if part) for item in value.split(',') if item.strip()}
+
+
+class Fieldset:
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    def selected_names(self, path):
+        """Names to keep on the serializer at ``path``, or ``None`` for all of them."""
+        if self.fields is None:
+            return None
+        depth = len(path)
+        if depth and any(path[:len(entry)] == entry for entry in self.fields if len(entry) <= depth):
+            return None
+        return {entry[depth] for entry in self.fields if len(entry) > depth and entry[:depth] == path}
+
+    def expands(self, path):
+        if self.expand is None:
+            return True
+        depth = len(path)
+        if any(entry[:depth] == path for entry in self.expand):
+            return True
+        # fields=category.name implies expand=category
+        return self.fields is not None and any(
+            len(entry) > depth and entry[:depth] == path for entry in self.fields
+        )
+
+    def apply(self, path, fields, expandable):
+        selected = self.selected_names(path)
+        result = {}
+        for name, field in fields.items():
+            if selected is not None and name not in selected:
+                continue
+            if name in expandable and not self.expands(path + (name,)):
+                field = collapsed(field)
+            result[name] = field
+        return result
+
+
+def requested_fieldset(request):
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    if not hasattr(request, '_sparse_fieldset'):
+        params = getattr(request, 'query_params', request.GET)
+        fields, expand = params.get('fields'), params.get('expand')
+        request._sparse_fieldset = None if fields is None and expand is None else Fieldset(
+            _parse(fields), _parse(expand)
+        )
+    return request._sparse_fieldset
+
+
+def collapsed(field):
+    """A nested serializer replaced by the primary key(s) it would have embedded."""
+    kwargs = {'read_only': True}
+    if field.source:
+        kwargs['source'] = field.source
+    if isinstance(field, serializers.ListSerializer):
+        return serializers.PrimaryKeyRelatedField(many=True, **kwargs)
+    return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    Honour ``?fields=`` / ``?expand=`` from the request in the serializer context,
+    or the ``fieldset`` given in the context without a request.
+
+    ``Meta.expandable_fields`` lists nested serializers that ``?expand`` can
+    collapse to primary keys. ``Meta.fieldset_sources`` tells ``shape_queryset``
+    which model paths a ``SerializerMethodField`` reads.
+    """
+
+    def fieldset_path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        base = tuple(node._context.get('fieldset_path', ())) if hasattr(node, '_context') else ()
+        return base + tuple(reversed(names))
+
+    def nested_context(self, name):
+        """Context for a serializer built inside a method field, so its fields resolve under ``name``."""
+        return dict(self.context, fieldset_path=self.fieldset_path() + (name,))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if 'fieldset' in self.context:
+            fieldset = self.context['fieldset']
+        else:
+            fieldset = requested_fieldset(self.context.get('request'))
+        if fieldset is None:
+            return fields
+        meta = getattr(self, 'Meta', None)
+        return fieldset.apply(self.fieldset_path(), fields, getattr(meta, 'expandable_fields', ()))
+
+
+class QueryShape:
+    def __init__(self):
+        self.columns = {}  # select_related prefix -> set of columns, or None for every column
+        self.relations = set()  # relation paths the response reads (select_related or prefetched)
+        self.select = set()
+        # Relations a SerializerMethodField reads through a serializer shape_queryset cannot see,
+        # so every prefetch below them is kept
+        self.opaque = set()
+
+    def need(self, prefix, column):
+        columns = self.columns.setdefault(prefix, set())
+        if columns is not None:
+            columns.add(column)
+
+    def need_all(self, prefix):
+        self.columns[prefix] = None
+
+    def only_fields(self):
+        if self.columns.get('') is None:
+            return None
+        only = set()
+        for prefix, columns in self.columns.items():
+            if columns is None:
+                only.add(prefix[:-2])
+            else:
+                only.update(prefix + column for column in columns)
+        only.update(self.select)
+        return sorted(only)
+
+
+def _collect(serializer, model, prefix, shape):
+    shape.columns.setdefault(prefix, set())
+    sources = getattr(getattr(serializer, 'Meta', None), 'fieldset_sources', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            if name not in sources:
+                shape.need_all(prefix)
+            for path in sources.get(name, ()):
+                _need_path(model, prefix, path, shape)
+            continue
+        if len(field.source_attrs) != 1:
+            shape.need_all(prefix)
+            continue
+        attr = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            shape.need_all(prefix)  # A property or method on the model
+            continue
+
+        if not model_field.is_relation:
+            shape.need(prefix, attr)  # Including nested serializers over a JSONField
+        elif isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            shape.relations.add(prefix + attr)
+            if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.Serializer):
+                # Prefetched rows load every column; only the nested relations matter here
+                _collect_relations(field.child, model_field.related_model, prefix + attr + '__', shape)
+        elif isinstance(field, serializers.Serializer):
+            if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+                shape.select.add(prefix + attr)
+                shape.relations.add(prefix + attr)
+                _collect(field, model_field.related_model, prefix + attr + '__', shape)
+            else:
+                shape.need_all(prefix)
+        elif model_field.concrete:
+            shape.need(prefix, attr)
+        else:
+            shape.need_all(prefix)
+
+
+def _collect_relations(serializer, model, prefix, shape):
+    sources = getattr(getattr(serializer, 'Meta', None), 'fieldset_sources', {})
+    for name, field in serializer.fields.items():
+        if name in sources:
+            for path in sources[name]:
+                shape.relations.add(prefix + path)
+                shape.opaque.add(prefix + path)
+        if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField, serializers.Serializer)):
+            if len(field.source_attrs) == 1:
+                shape.relations.add(prefix + field.source_attrs[0])
+                child = getattr(field, 'child', field)
+                if isinstance(child, serializers.Serializer):
+                    try:
+                        related = model._meta.get_field(field.source_attrs[0]).related_model
+                    except FieldDoesNotExist:
+                        continue
+                    if related is None:
+                        continue
+                    _collect_relations(child, related, prefix + field.source_attrs[0] + '__', shape)
+
+
+def _need_path(model, prefix, path, shape):
+    try:
+        model_field = model._meta.get_field(path.split('__')[0])
+    except FieldDoesNotExist:
+        shape.need_all(prefix)
+        return
+    if model_field.is_relation and not model_field.concrete:
+        shape.relations.add(prefix + path)
+        shape.opaque.add(prefix + path)
+    elif model_field.is_relation:
+        shape.need(prefix, model_field.name)
+        shape.relations.add(prefix + path)
+        shape.opaque.add(prefix + path)
+    else:
+        shape.need(prefix, path)
+
+
+def _lookup_path(lookup):
+    return lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+
+
+def shape_queryset(queryset, serializer_class, request, keep_related=()):
+    """
+    Trim ``queryset`` to what ``serializer_class`` will read for this request.
+
+    Returns ``queryset`` unchanged unless the request asks for a sparse
+    fieldset. ``keep_related`` names relations the view itself reads after
+    serialization, which are always kept.
+    """
+    if requested_fieldset(request) is None:
+        return queryset
+    shape = QueryShape()
+    _collect(serializer_class(context={'request': request}), queryset.model, '', shape)
+    for path in keep_related:
+        parts = path.split('__')
+        for index in range(1, len(parts) + 1):
+            ancestor = '__'.join(parts[:index])
+            shape.relations.add(ancestor)
+            shape.select.add(ancestor)
+        shape.need_all(path + '__')
+
+    def wanted(path):
+        parts = path.split('__')
+        return all('__'.join(parts[:index]) in shape.relations for index in range(1, len(parts) + 1))
+
+    def wanted_prefetch(path):
+        if wanted(path):
+            return True
+        parts = path.split('__')
+        return any(
+            '__'.join(parts[:index]) in shape.opaque and wanted('__'.join(parts[:index]))
+            for index in range(1, len(parts))
+        )
+
+    select = sorted(path for path in shape.select if wanted(path))
+    prefetch = [lookup for lookup in queryset._prefetch_related_lookups if wanted_prefetch(_lookup_path(lookup))]
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    only = shape.only_fields()
+    if only is not None:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+def has_fieldset(request):
+    return requested_fieldset(request) is not None
+
+
+def select_keys(request, data, path=()):
+    """``data``, a dict a view builds itself, keeping only the keys ``?fields=`` selects at ``path``."""
+    fieldset = requested_fieldset(request)
+    selected = None if fieldset is None else fieldset.selected_names(tuple(path))
+    if selected is None:
+        return data
+    return {key: value for key, value in data.items() if key in selected}
+
+
+class SparseFieldsetViewMixin:
+    """Apply ``shape_queryset`` to a generic view's queryset."""
+
+    fieldset_keep_related = ()
+
+    def filter_queryset(self, queryset):
+        return shape_queryset(
+            super().filter_queryset(queryset),
+            self.get_serializer_class(),
+            self.request,
+            keep_related=self.fieldset_keep_related,
+        )
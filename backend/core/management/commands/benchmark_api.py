@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import MissingData, compare_to_baseline, run_benchmark, uncovered_routes
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every route in core.urls in-process with a weighted student/admin mix and "
+        "report latency percentiles, queries per request and throughput as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Approximate number of timed requests")
+        parser.add_argument('--min-samples', type=int, default=20, help="Minimum timed requests per route")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+        parser.add_argument('--baseline', help="Compare against a previous JSON report and fail on regressions")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help="Allowed relative p95 slowdown against the baseline (default: 0.25)",
+        )
+
+    def handle(self, *args, **options):
+        missing = uncovered_routes()
+        if missing:
+            raise CommandError(f"Routes without a benchmark scenario: {', '.join(missing)}")
+        try:
+            report = run_benchmark(
+                total_requests=options['requests'],
+                min_samples=options['min_samples'],
+                seed=options['seed'],
+            )
+        except MissingData as exc:
+            raise CommandError(str(exc))
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(payload)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(payload)
+
+        overall = report['overall']
+        self.stderr.write(
+            f"{overall['samples']} requests: p50 {overall['p50_ms']}ms, p95 {overall['p95_ms']}ms, "
+            f"p99 {overall['p99_ms']}ms, {overall['throughput_rps']} req/s"
+        )
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+            regressions = compare_to_baseline(report, baseline, tolerance=options['tolerance'])
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(self.style.ERROR(regression))
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+            self.stderr.write(self.style.SUCCESS("No regressions against baseline."))
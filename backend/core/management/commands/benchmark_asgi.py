@@ -0,0 +1,205 @@
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmark import summarize
+from core.models import User
+
+HOST = 'testserver'
+
+
+def wsgi_get(application, path, token, query_string=''):
+    """One GET through Django's WSGI handler, as a WSGI server would make it."""
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query_string, 'SCRIPT_NAME': '',
+        'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': HOST,
+        'HTTP_AUTHORIZATION': f'Bearer {token}', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    statuses = []
+    result = application(environ, lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+    try:
+        body = b''.join(result)
+    finally:
+        result.close()  # Sends request_finished, which closes or keeps the connection per CONN_MAX_AGE
+    return statuses[0], body
+
+
+async def asgi_get(application, path, token, query_string=''):
+    """One GET through Django's ASGI handler, as an ASGI server (uvicorn) would make it."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query_string.encode(), 'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+    }
+    body_sent = False
+    messages = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Future()  # Django listens for a disconnect until the response is sent
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    status = next(message['status'] for message in messages if message['type'] == 'http.response.start')
+    return status, b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+
+
+def http_get(base_url, path, token):
+    request = urllib.request.Request(base_url.rstrip('/') + path, headers={'Authorization': f'Bearer {token}'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare dashboard latency and throughput under WSGI and ASGI at equal concurrency. By default "
+        "requests go in-process through Django's WSGI handler (one thread per concurrent client, like a "
+        "gthread worker) and ASGI handler (one event loop, like a uvicorn worker); with --wsgi-url and "
+        "--asgi-url they go over HTTP to two running servers instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=400, help="Requests per mode")
+        parser.add_argument('--wsgi-url', help="Base URL of a running WSGI server, e.g. http://127.0.0.1:8000")
+        parser.add_argument('--asgi-url', help="Base URL of a running ASGI server, e.g. http://127.0.0.1:8001")
+        parser.add_argument(
+            '--query-delay-ms', type=float, default=0,
+            help="In-process only: add this much to every query, like the round trip to a networked database",
+        )
+
+    def handle(self, *args, **options):
+        if bool(options['wsgi_url']) != bool(options['asgi_url']):
+            raise CommandError("Pass both --wsgi-url and --asgi-url, or neither.")
+        student = User.objects.filter(role=User.Roles.STUDENT).order_by('id').first()
+        admin = User.objects.filter(role=User.Roles.ADMIN).order_by('id').first()
+        if student is None or admin is None:
+            raise CommandError("Needs a student and an admin; seed data first (see seed_scale).")
+        targets = [
+            (reverse('student-dashboard'), str(AccessToken.for_user(student))),
+            (reverse('admin-dashboard'), str(AccessToken.for_user(admin))),
+        ]
+        plan = [targets[index % len(targets)] for index in range(options['requests'])]
+        concurrency = options['concurrency']
+        connections.close_all()
+        delay = options['query_delay_ms'] / 1000
+
+        def delayed(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            # First in the list, because execute_wrapper() blocks open at connect time pop the last one.
+            # The same wrapper object reconnects once per request when CONN_MAX_AGE is 0; add it once.
+            if delayed not in connection.execute_wrappers:
+                connection.execute_wrappers.insert(0, delayed)
+
+        if delay and not options['wsgi_url']:
+            connection_created.connect(add_delay, weak=False, dispatch_uid='benchmark_asgi_delay')
+
+        results = {
+            'concurrency': concurrency,
+            'requests': len(plan),
+            'transport': 'http' if options['wsgi_url'] else 'in-process',
+            'conn_max_age': connections['default'].settings_dict['CONN_MAX_AGE'],
+            'query_delay_ms': options['query_delay_ms'],
+        }
+        bodies = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST]):
+            if options['wsgi_url']:
+                results['wsgi'] = self.run_threads(plan, concurrency, bodies.setdefault('wsgi', {}),
+                                                   lambda path, token: http_get(options['wsgi_url'], path, token))
+                results['asgi'] = self.run_threads(plan, concurrency, bodies.setdefault('asgi', {}),
+                                                   lambda path, token: http_get(options['asgi_url'], path, token))
+            else:
+                wsgi_application = get_wsgi_application()
+                results['wsgi'] = self.run_threads(plan, concurrency, bodies.setdefault('wsgi', {}),
+                                                   lambda path, token: wsgi_get(wsgi_application, path, token))
+                results['asgi'] = asyncio.run(self.run_tasks(plan, concurrency, bodies.setdefault('asgi', {}),
+                                                             get_asgi_application()))
+        connection_created.disconnect(dispatch_uid='benchmark_asgi_delay')
+        connections.close_all()
+        results['same_responses'] = bodies['wsgi'] == bodies['asgi']
+        results['asgi_p50_change_pct'] = round(
+            (results['asgi']['p50_ms'] / max(results['wsgi']['p50_ms'], 0.001) - 1) * 100, 1
+        )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_threads(self, plan, concurrency, bodies, get):
+        queue = iter(plan)
+        lock = threading.Lock()
+        latencies, statuses = [], Counter()
+
+        def client():
+            while True:
+                with lock:
+                    item = next(queue, None)
+                if item is None:
+                    break
+                started = time.perf_counter()
+                status, body = get(*item)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] += 1
+                    bodies.setdefault(item[0], body)
+            connections.close_all()
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(latencies, statuses, time.perf_counter() - started)
+
+    async def run_tasks(self, plan, concurrency, bodies, application):
+        queue = iter(plan)
+        latencies, statuses = [], Counter()
+
+        async def client():
+            # One event loop serves every client, so no lock is needed
+            for path, token in queue:
+                started = time.perf_counter()
+                status, body = await asgi_get(application, path, token)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] += 1
+                bodies.setdefault(path, body)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return self.report(latencies, statuses, time.perf_counter() - started)
+
+    def report(self, latencies, statuses, elapsed):
+        if set(statuses) != {200}:
+            raise CommandError(f"Non-200 responses: {dict(statuses)}")
+        return {
+            **summarize(latencies),
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+        }
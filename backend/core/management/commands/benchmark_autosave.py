@@ -0,0 +1,74 @@
+import json
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.autosave import AnswerBuffer
+from core.models import PersonalizedTest, StudentAnswer
+
+
+def click_stream(tests, changes, rng):
+    """(test_id, student_id, question_id, option_id) clicks: every question answered ``changes`` times."""
+    clicks = []
+    for test in tests:
+        for question in test.questions.all():
+            options = [option.id for option in question.options.all()]
+            if options:
+                clicks.extend(
+                    (test.id, test.request.student_id, question.id, rng.choice(options)) for _ in range(changes)
+                )
+    return clicks
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a burst of answer clicks against assigned tests with direct writes and with the "
+        "autosave write-behind buffer, reporting time and queries. Changes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tests', type=int, default=50, help="Assigned tests answered in the burst")
+        parser.add_argument('--changes', type=int, default=3, help="Clicks per question (students change their minds)")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        tests = list(PersonalizedTest.objects.filter(status=PersonalizedTest.Status.ASSIGNED).select_related(
+            'request'
+        ).prefetch_related('questions__options').order_by('id')[:options['tests']])
+        clicks = click_stream(tests, options['changes'], random.Random(options['seed']))
+        if not clicks:
+            raise CommandError("No assigned tests with questions; seed data first (see seed_scale).")
+
+        results = {'clicks': len(clicks)}
+        with tempfile.TemporaryDirectory() as directory, override_settings(AUTOSAVE_JOURNAL_DIR=directory):
+            for mode in ('direct', 'buffered'):
+                with transaction.atomic():
+                    results[mode] = self.replay(mode, clicks)
+                    transaction.set_rollback(True)
+        results['query_reduction'] = round(results['direct']['queries'] / max(results['buffered']['queries'], 1), 1)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def replay(self, mode, clicks):
+        buffer = AnswerBuffer(background=False)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for test_id, student_id, question_id, option_id in clicks:
+                if mode == 'direct':
+                    StudentAnswer.objects.update_or_create(
+                        student_id=student_id, question_id=question_id, defaults={'option_id': option_id},
+                    )
+                else:
+                    buffer.record(test_id, student_id, question_id, option_id)
+            accepted_ms = (time.perf_counter() - started) * 1000
+            rows = buffer.flush() if mode == 'buffered' else len(clicks)
+            total_ms = (time.perf_counter() - started) * 1000
+        return {
+            'accept_ms_per_click': round(accepted_ms / len(clicks), 4),
+            'total_ms': round(total_ms, 1),
+            'queries': len(queries.captured_queries),
+            'rows_written': rows,
+        }
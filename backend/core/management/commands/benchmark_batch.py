@@ -0,0 +1,131 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmark import summarize
+from core.models import User
+
+from .benchmark_asgi import HOST, asgi_get, wsgi_get
+
+# What the student SPA requests on its first page
+PAGE = ['auth/me/', 'student/dashboard/', 'student/tests/', 'student/recommendations/', 'student/resources/']
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the student SPA's first page as it does today, five GETs fired together, and as one "
+        "GET /api/batch/ with the sub-requests run concurrently and one after another. Requests go "
+        "in-process through Django's WSGI or ASGI handler. Reports page load latency, queries and "
+        "bytes per page, and checks the batch returns the same bodies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=100, help="Page loads per mode")
+        parser.add_argument('--handler', choices=('wsgi', 'asgi'), default='wsgi')
+        parser.add_argument(
+            '--query-delay-ms', type=float, default=0,
+            help="Add this much to every query, like the round trip to a networked database",
+        )
+
+    def handle(self, *args, **options):
+        student = User.objects.filter(
+            role=User.Roles.STUDENT, test_requests__personalized_test__recommendation__isnull=False,
+        ).order_by('id').first()
+        if student is None:
+            raise CommandError("Needs a student with a recommendation; seed data first (see seed_scale).")
+        token = str(AccessToken.for_user(student))
+        root = urljoin(reverse('batch'), '..')
+        separate = [(urljoin(root, path), '') for path in PAGE]
+        batch = [(reverse('batch'), urlencode({'path': PAGE}, doseq=True))]
+
+        delay = options['query_delay_ms'] / 1000
+        lock = threading.Lock()
+        queries = [0]
+
+        def counted(execute, sql, params, many, context):
+            with lock:
+                queries[0] += 1
+            if delay:
+                time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_counter(sender, connection, **kwargs):
+            # First in the list, because execute_wrapper() blocks open at connect time pop the last one.
+            # The same wrapper object reconnects once per request when CONN_MAX_AGE is 0; add it once.
+            if counted not in connection.execute_wrappers:
+                connection.execute_wrappers.insert(0, counted)
+
+        connections.close_all()
+        connection_created.connect(add_counter, weak=False, dispatch_uid='benchmark_batch_queries')
+        if options['handler'] == 'wsgi':
+            application = get_wsgi_application()
+            pool = ThreadPoolExecutor(max_workers=len(PAGE))
+
+            def load(requests):
+                # Like a browser: every request of the page in flight at once
+                return list(pool.map(lambda request: wsgi_get(application, request[0], token, request[1]), requests))
+        else:
+            application = get_asgi_application()
+
+            def load(requests):
+                async def fire():
+                    return await asyncio.gather(*(asgi_get(application, path, token, query) for path, query in requests))
+                return asyncio.run(fire())
+
+        results = {'handler': options['handler'], 'pages': options['pages'], 'query_delay_ms': options['query_delay_ms']}
+        bodies = {}
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST]):
+                for name, requests, concurrent in (
+                    ('separate', separate, True),
+                    ('batch_concurrent', batch, True),
+                    ('batch_sequential', batch, False),
+                ):
+                    with override_settings(BATCH_CONCURRENT=concurrent):
+                        results[name], bodies[name] = self.measure(load, requests, options['pages'], queries)
+        finally:
+            connection_created.disconnect(dispatch_uid='benchmark_batch_queries')
+            connections.close_all()
+
+        expected = [json.loads(body) for body in bodies['separate']]
+        results['same_bodies'] = all(
+            [entry['body'] for entry in json.loads(bodies[name][0])['responses']] == expected
+            for name in ('batch_concurrent', 'batch_sequential')
+        )
+        for name in ('batch_concurrent', 'batch_sequential'):
+            results[f'{name}_p50_change_pct'] = round(
+                (results[name]['p50_ms'] / max(results['separate']['p50_ms'], 0.001) - 1) * 100, 1
+            )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure(self, load, requests, pages, queries):
+        load(requests)  # Warm-up: connections, URL resolver, caches
+        latencies, transferred, bodies = [], 0, None
+        queries_before = queries[0]
+        for _ in range(pages):
+            started = time.perf_counter()
+            responses = load(requests)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if any(status != 200 for status, _ in responses):
+                raise CommandError(f"Non-200 responses for {[urlsplit(path).path for path, _ in requests]}")
+            transferred += sum(len(body) for _, body in responses)
+            bodies = [body for _, body in responses]
+        return {
+            **summarize(latencies),
+            'requests_per_page': len(requests),
+            'queries_per_page': round((queries[0] - queries_before) / pages, 2),
+            'bytes_per_page': round(transferred / pages),
+        }, bodies
@@ -0,0 +1,94 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmark import summarize
+from core.models import User
+
+
+@contextmanager
+def connection_profile(conn_max_age=0, pool=None):
+    """Reconfigure the default connection for one benchmark mode, restoring it afterwards."""
+    settings_dict = connection.settings_dict
+    saved = settings_dict['CONN_MAX_AGE'], dict(settings_dict.get('OPTIONS', {}))
+    connection.close()
+    settings_dict['CONN_MAX_AGE'] = conn_max_age
+    settings_dict['OPTIONS'] = dict(saved[1], pool=pool) if pool else {
+        key: value for key, value in saved[1].items() if key != 'pool'
+    }
+    try:
+        yield
+    finally:
+        connection.close()
+        if pool:
+            connection.close_pool()
+        settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS'] = saved
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request latency and connection setups with a new connection per request, "
+        "persistent connections and (on PostgreSQL with psycopg 3) the native pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--url-name', default='current-user', help="GET route to request as a student")
+
+    def handle(self, *args, **options):
+        student = User.objects.filter(role=User.Roles.STUDENT).order_by('id').first()
+        if student is None:
+            raise CommandError("No students found; seed data first (see seed_scale).")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(student)}')
+        path = reverse(options['url_name'])
+
+        modes = [('per_request', {}), ('persistent', {'conn_max_age': 600})]
+        if connection.vendor == 'postgresql':
+            modes.append(('pool', {'pool': {'min_size': 1, 'max_size': 4}}))
+
+        results = {'vendor': connection.vendor, 'requests': options['requests']}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, profile in modes:
+                try:
+                    with connection_profile(**profile):
+                        results[name] = self.run(client, path, options['requests'])
+                except ImproperlyConfigured as exc:  # psycopg_pool is not installed
+                    results[name] = {'skipped': str(exc)}
+        if 'persistent' in results:
+            results['connect_overhead_ms_p50'] = round(
+                results['per_request']['p50_ms'] - results['persistent']['p50_ms'], 3
+            )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run(self, client, path, requests):
+        setups = []
+
+        def count_setup(sender, **kwargs):
+            setups.append(sender)
+
+        connection_created.connect(count_setup, weak=False, dispatch_uid='benchmark_db_connections')
+        try:
+            latencies = []
+            for _ in range(requests + 1):
+                # The test client skips the request_started/finished connection handling a WSGI server does
+                started = time.perf_counter()
+                close_old_connections()
+                response = client.get(path)
+                close_old_connections()
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {path} returned {response.status_code}")
+        finally:
+            connection_created.disconnect(dispatch_uid='benchmark_db_connections')
+        return {**summarize(latencies[1:]), 'connection_setups': len(setups)}
@@ -0,0 +1,67 @@
+import json
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from core.benchmark import summarize
+from core.models import CareerRecommendation
+from core.renderers import FastJSONRenderer, orjson
+from core.serializers import CareerRecommendationSerializer
+
+
+def recommendations_payload(limit):
+    """A StudentRecommendationsView-shaped body built from the largest recommendations in the DB."""
+    recommendations = list(CareerRecommendation.objects.annotate(resource_count=Count('resources')).order_by(
+        '-resource_count', '-id'
+    ).select_related('personalized_test', 'personalized_test__request', 'personalized_test__request__student').prefetch_related(
+        'steps', 'resources', 'resources__category', 'resources__student_progress'
+    )[:limit])
+    if not recommendations:
+        raise CommandError("No recommendations found; seed data first (see seed_scale).")
+    request = Request(RequestFactory().get('/'))
+    request.user = recommendations[0].personalized_test.request.student
+    data = CareerRecommendationSerializer(recommendations, many=True, context={'request': request}).data
+    for rec, rec_data in zip(recommendations, data):
+        rec_data['test_id'] = rec.personalized_test.id
+        rec_data['request_id'] = rec.personalized_test.request.id
+    # Values the views pass straight to Response without a serializer field
+    data.append({'generated_at': timezone.now(), 'cost': Decimal('1499.50'), 'token': uuid.uuid4()})
+    return {'recommendations': data}
+
+
+class Command(BaseCommand):
+    help = "Compare encode time of DRF's JSONRenderer and the orjson-backed FastJSONRenderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recommendations', type=int, default=200, help="Recommendations in the payload")
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed; FastJSONRenderer falls back to JSONRenderer.")
+        payload = recommendations_payload(options['recommendations'])
+
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        expected = stdlib.render(payload)
+        if fast.render(payload) != expected:
+            raise CommandError("FastJSONRenderer output differs from JSONRenderer for this payload.")
+
+        results = {}
+        for name, renderer in (('json', stdlib), ('orjson', fast)):
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                renderer.render(payload)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = summarize(timings)
+
+        results['payload_bytes'] = len(expected)
+        results['speedup_p50'] = round(results['json']['p50_ms'] / max(results['orjson']['p50_ms'], 1e-6), 2)
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmark import summarize
+from core.metrics import registry
+from core.models import PersonalizedTest
+from core.resource_access import visible_resources
+
+# Django's defaults, spelled out because journal_mode=WAL persists in the database file
+BASELINE_OPTIONS = {'init_command': 'PRAGMA journal_mode=DELETE'}
+RETRIES_KEY = ('sqlite_write_retries_total', ())
+# 500 tracebacks and query budget warnings, expected by the hundred under the baseline profile
+NOISY_LOGGERS = ('django.request', 'core.middleware')
+
+
+def copy_database(source, target):
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+@contextmanager
+def quiet_loggers():
+    loggers = [logging.getLogger(name) for name in NOISY_LOGGERS]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        for logger, level in zip(loggers, levels):
+            logger.setLevel(level)
+
+
+def student_plans(threads, tests_per_thread):
+    """One plan per thread: a student, their assigned tests with one option per question, a resource."""
+    tests = PersonalizedTest.objects.filter(
+        status=PersonalizedTest.Status.ASSIGNED, questions__options__isnull=False,
+    ).select_related('request__student').prefetch_related('questions__options').distinct().order_by('id')
+    by_student = {}
+    for test in tests.iterator(chunk_size=200):
+        student = test.request.student
+        plan = by_student.setdefault(student.id, {'student': student, 'tests': []})
+        if len(plan['tests']) < tests_per_thread:
+            plan['tests'].append((test.id, [
+                (question.id, min(option.id for option in question.options.all()))
+                for question in test.questions.all()
+            ]))
+        if len(by_student) == threads and all(len(p['tests']) == tests_per_thread for p in by_student.values()):
+            break
+    plans = list(by_student.values())[:threads]
+    for plan in plans:
+        resource = visible_resources(plan['student']).order_by('id').first()
+        plan['resource_id'] = resource.id if resource else None
+    return plans
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress the write views from many threads (students answering, submitting tests and saving "
+        "resource progress) on copies of the SQLite database, once with Django's defaults and once "
+        "with the configured WAL/pragma profile and serialized writes. Reports throughput and errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--tests', type=int, default=5, help="Assigned tests each thread's student completes")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            raise CommandError("Needs a file-backed SQLite database (USE_SQLITE=1).")
+        if not settings.SQLITE_TUNING:
+            raise CommandError("Set SQLITE_TUNING=1 so there is a tuned profile to compare.")
+        plans = student_plans(options['threads'], options['tests'])
+        if len(plans) < options['threads']:
+            raise CommandError(
+                f"Found {len(plans)} students with assigned tests, need {options['threads']}; "
+                "seed data first (see seed_scale)."
+            )
+
+        settings_dict = connection.settings_dict
+        source = str(settings_dict['NAME'])
+        saved = settings_dict['NAME'], settings_dict['OPTIONS']
+        profiles = [
+            ('baseline', BASELINE_OPTIONS, False),
+            ('tuned', dict(settings_dict['OPTIONS'], transaction_mode='IMMEDIATE'), True),
+        ]
+        results = {'threads': options['threads'], 'tests_per_thread': options['tests']}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, db_options, serialize in profiles:
+                target = os.path.join(directory, f'{name}.sqlite3')
+                connections.close_all()
+                copy_database(source, target)
+                # Each thread's connection is built from this same settings dict
+                settings_dict['NAME'], settings_dict['OPTIONS'] = target, db_options
+                try:
+                    with override_settings(
+                        SQLITE_SERIALIZE_WRITES=serialize,
+                        AUTOSAVE_JOURNAL_DIR='',  # Every answer is a write
+                        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                    ), quiet_loggers():
+                        results[name] = self.stress(plans)
+                finally:
+                    connections.close_all()
+                    settings_dict['NAME'], settings_dict['OPTIONS'] = saved
+        results['throughput_gain'] = round(
+            results['tuned']['requests_per_second'] / max(results['baseline']['requests_per_second'], 0.001), 2
+        )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def stress(self, plans):
+        barrier = threading.Barrier(len(plans))
+        lock = threading.Lock()
+        latencies, statuses = [], Counter()
+        retries_before = registry.counters.get(RETRIES_KEY, 0)
+
+        def worker(plan):
+            client = APIClient()
+            client.raise_request_exception = False  # Count "database is locked" as a 500
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(plan['student'])}")
+            requests = []
+            for test_id, answers in plan['tests']:
+                for question_id, option_id in answers:
+                    requests.append(('post', reverse('student-submit-answer', args=[test_id]),
+                                     {'question_id': question_id, 'option_id': option_id}))
+                requests.append(('get', reverse('student-test-detail', args=[test_id]), None))
+                requests.append(('post', reverse('student-submit-test', args=[test_id]), {}))
+                if plan['resource_id']:
+                    requests.append(('post', reverse('student-resource-progress', args=[plan['resource_id']]),
+                                     {'resource_id': plan['resource_id'], 'status': 'in_progress'}))
+            timings, codes = [], Counter()
+            try:
+                barrier.wait()
+                for method, path, data in requests:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, data, format='json')
+                    timings.append((time.perf_counter() - started) * 1000)
+                    codes[response.status_code] += 1
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(timings)
+                statuses.update(codes)
+
+        workers = [threading.Thread(target=worker, args=(plan,)) for plan in plans]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            **summarize(latencies),
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            'errors': sum(count for status, count in statuses.items() if status >= 400),
+            'status_codes': {str(status): count for status, count in sorted(statuses.items())},
+            'write_retries': registry.counters.get(RETRIES_KEY, 0) - retries_before,
+        }
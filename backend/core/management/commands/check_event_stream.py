@@ -0,0 +1,218 @@
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmark import summarize
+from core.events import hub
+from core.models import CareerRecommendation, TestRequest, User
+from core.transitions import assign_test, complete_test, create_test
+
+HOST = 'testserver'
+EXPECTED = Counter({'test_request.created': 1, 'test.created': 1, 'test.updated': 2, 'recommendation.created': 1})
+
+
+def lifecycle(student, admin):
+    """Take a new request of ``student`` from pending to recommended; returns the request id."""
+    test_request = TestRequest.objects.create(student=student, interests_snapshot='event stream check')
+    test = create_test(test_request, admin)
+    assign_test(test)
+    complete_test(test)
+    CareerRecommendation.objects.create(
+        personalized_test=test, admin=admin, career_name='Event Stream Check', summary='Scratch recommendation.',
+    )
+    return test_request.id
+
+
+class Stream:
+    """One ``GET /api/events/`` through Django's ASGI handler, held open until ``close()``."""
+
+    def __init__(self, application, token, last_event_id=None):
+        self.application = application
+        self.token = token
+        self.last_event_id = last_event_id
+        self.status = None
+        self.events = []
+        self.opened = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._buffer = b''
+
+    async def run(self):
+        headers = [(b'host', HOST.encode()), (b'accept', b'text/event-stream')]
+        if self.last_event_id is not None:
+            headers.append((b'last-event-id', str(self.last_event_id).encode()))
+        path = reverse('event-stream')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': f'token={self.token}'.encode(),
+            'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+        }
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await self._closed.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                self.status = message['status']
+                if self.status != 200:
+                    self.opened.set()
+            elif message['type'] == 'http.response.body':
+                self.parse(message.get('body', b''))
+
+        await self.application(scope, receive, send)
+
+    def parse(self, body):
+        received = time.time_ns()
+        *frames, self._buffer = (self._buffer + body).split(b'\n\n')
+        for frame in frames:
+            fields = dict(line.split(': ', 1) for line in frame.decode().splitlines() if not line.startswith(':'))
+            if 'retry' in fields:
+                self.opened.set()  # Sent once the stream is subscribed
+            if 'event' in fields:
+                self.events.append({
+                    'id': int(fields['id']) if 'id' in fields else None, 'type': fields['event'],
+                    'data': json.loads(fields['data']), 'latency_ms': (received - int(fields.get('id', received))) / 1e6,
+                })
+
+    def close(self):
+        self._closed.set()
+
+    def of_request(self, request_id):
+        return [event for event in self.events if event['data'].get('request_id') == request_id]
+
+
+class Command(BaseCommand):
+    help = (
+        "Open event streams through Django's ASGI handler as an admin, a student and another student, "
+        "take a scratch request of the student from pending to recommended, and fail unless the admin "
+        "and the student each get its five events and the other student none; then reconnect with "
+        "Last-Event-ID and check the missed events are replayed. With a cross-process EVENTS_BACKEND "
+        "the changes are made by a separate process. The scratch request is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=5, help="Seconds to wait for the events")
+        # Internal: the writer process for cross-process backends
+        parser.add_argument('--write-lifecycle', type=int, metavar='STUDENT_ID', help="Make the changes and exit")
+
+    def handle(self, *args, **options):
+        admin = User.objects.filter(role=User.Roles.ADMIN).order_by('id').first()
+        students = list(User.objects.filter(role=User.Roles.STUDENT).order_by('id')[:2])
+        if options['write_lifecycle']:
+            self.stdout.write(json.dumps({
+                'request_id': lifecycle(User.objects.get(pk=options['write_lifecycle']), admin),
+            }))
+            return
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("The writer needs a file-backed SQLite database.")
+        if admin is None or len(students) < 2:
+            raise CommandError("Needs two students and an admin; seed data first (see seed_scale).")
+
+        connections.close_all()
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST]):
+            results = asyncio.run(self.exercise(admin, *students, options['timeout']))
+        connections.close_all()
+        TestRequest.objects.filter(pk=results['request_id']).delete()
+
+        failures = results.pop('failures')
+        self.stdout.write(json.dumps(results, indent=2))
+        for failure in failures:
+            self.stderr.write(self.style.ERROR(failure))
+        if failures:
+            raise CommandError(f"{len(failures)} event stream checks failed.")
+        self.stdout.write(self.style.SUCCESS("Every stream got exactly its events, and reconnecting replayed them."))
+
+    async def exercise(self, admin, student, other, timeout):
+        application = get_asgi_application()
+        streams = {
+            'admin': Stream(application, AccessToken.for_user(admin)),
+            'student': Stream(application, AccessToken.for_user(student)),
+            'other_student': Stream(application, AccessToken.for_user(other)),
+        }
+        tasks = [asyncio.create_task(stream.run()) for stream in streams.values()]
+        await asyncio.wait_for(asyncio.gather(*(stream.opened.wait() for stream in streams.values())), timeout)
+        failures = [f"{name} stream answered {stream.status}" for name, stream in streams.items() if stream.status != 200]
+        if failures:
+            for stream in streams.values():
+                stream.close()
+            await asyncio.gather(*tasks)
+            raise CommandError("; ".join(failures))
+
+        cross_process = hub.backend.cross_process
+        if cross_process:
+            request_id = await asyncio.to_thread(self.write_in_process, student)
+        else:
+            request_id = await asyncio.to_thread(self.write_here, student, admin)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not all(
+            len(streams[name].of_request(request_id)) >= EXPECTED.total() for name in ('admin', 'student')
+        ):
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(getattr(settings, 'EVENTS_POLL_SECONDS', 0.2) * 2)  # Anything stray for the other student
+        for stream in streams.values():
+            stream.close()
+        await asyncio.gather(*tasks)
+
+        failures = []
+        for name in ('admin', 'student'):
+            got = Counter(event['type'] for event in streams[name].of_request(request_id))
+            if got != EXPECTED:
+                failures.append(f"{name} got {dict(got)}, expected {dict(EXPECTED)}")
+        if streams['other_student'].events:
+            failures.append(f"other student got {len(streams['other_student'].events)} events of someone else")
+
+        # Reconnect after the first event: the other four must be replayed
+        student_events = streams['student'].of_request(request_id)
+        replayed = []
+        if student_events:
+            resumed = Stream(application, AccessToken.for_user(student), last_event_id=student_events[0]['id'])
+            task = asyncio.create_task(resumed.run())
+            await asyncio.wait_for(resumed.opened.wait(), timeout)
+            await asyncio.sleep(0.1)
+            resumed.close()
+            await task
+            replayed = resumed.of_request(request_id)
+            if [event['id'] for event in replayed] != [event['id'] for event in student_events[1:]]:
+                failures.append(f"reconnecting replayed {len(replayed)} events, expected {len(student_events) - 1}")
+
+        return {
+            'backend': settings.EVENTS_BACKEND,
+            'cross_process': cross_process,
+            'request_id': request_id,
+            'events': {name: len(stream.of_request(request_id)) for name, stream in streams.items()},
+            'replayed': len(replayed),
+            'delivery_latency': summarize([event['latency_ms'] for event in streams['admin'].of_request(request_id)]),
+            'failures': failures,
+        }
+
+    def write_here(self, student, admin):
+        try:
+            return lifecycle(student, admin)
+        finally:
+            connection.close()
+
+    def write_in_process(self, student):
+        result = subprocess.run(
+            [sys.executable, '-m', 'django', 'check_event_stream', '--write-lifecycle', str(student.id)],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,  # The environment carries DJANGO_SETTINGS_MODULE
+        )
+        if result.returncode:
+            raise CommandError(f"Writer process failed:\n{result.stderr}")
+        return json.loads(result.stdout)['request_id']
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+
+
+class QueryRecorder:
+    """Counts queries per alias on every connection, including those of the ASGI handler's threads."""
+
+    def __init__(self):
+        self.used = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.used[context['connection'].alias] += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        # First in the list, and once: connections reopen on every request when CONN_MAX_AGE is 0
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, self)
+
+
+def aliases_queried(recorder, client, method, path, token):
+    """The response and ``Counter({alias: queries})`` for one request."""
+    recorder.used = Counter()
+    if isinstance(client, AsyncClient):
+        # Per request: AsyncClient's constructor headers do not reach the ASGI scope as headers
+        response = asyncio.run(getattr(client, method)(path, headers={'Authorization': f'Bearer {token}'}))
+    else:
+        response = getattr(client, method)(path, {}, format='json')
+    return response, recorder.used
+
+
+class Command(BaseCommand):
+    help = (
+        "Check read routing as a student: replica_reads views read from a replica, other views and "
+        "users who just wrote read from the primary until REPLICA_STICKY_SECONDS pass. The reads are "
+        "checked through the WSGI test client and again through Django's ASGI handler. Run "
+        "sync_replicas first."
+    )
+
+    def handle(self, *args, **options):
+        replicas = set(settings.DATABASE_REPLICAS)
+        if not replicas:
+            raise CommandError("No replicas configured; set SQLITE_REPLICAS or POSTGRES_REPLICAS.")
+        student = User.objects.filter(role=User.Roles.STUDENT).order_by('id').first()
+        if student is None:
+            raise CommandError("No students found; seed data first (see seed_scale).")
+        token = AccessToken.for_user(student)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        async_client = AsyncClient()
+        dashboard = reverse('student-dashboard')
+        # 403 without writing anything; any POST pins the user to the primary
+        write = reverse('student-submit-answer', args=[0])
+
+        steps = [
+            ("replica_reads view", client, 'get', dashboard, 'replica'),
+            ("view without replica_reads", client, 'get', reverse('student-test-list'), 'primary'),
+            ("POST by the student", client, 'post', write, 'primary'),
+            ("replica_reads view right after the POST", client, 'get', dashboard, 'primary'),
+            ("replica_reads view once the pin expired", client, 'sleep', dashboard, 'replica'),
+            ("ASGI: async replica_reads view", async_client, 'get', dashboard, 'replica'),
+            ("ASGI: sync replica_reads view", async_client, 'get', reverse('student-recommendations'), 'replica'),
+            ("ASGI: view without replica_reads", async_client, 'get', reverse('student-test-list'), 'primary'),
+        ]
+        recorder = QueryRecorder()
+        failures = 0
+        connections.close_all()
+        connection_created.connect(recorder.install, weak=False, dispatch_uid='check_replica_routing_queries')
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], REPLICA_STICKY_SECONDS=1):
+                for name, step_client, method, path, expected in steps:
+                    if method == 'sleep':
+                        time.sleep(1.1)
+                        method = 'get'
+                    response, used = aliases_queried(recorder, step_client, method, path, token)
+                    if used and set(used) <= replicas:
+                        went_to = 'replica'
+                    elif set(used) == {DEFAULT_DB_ALIAS}:
+                        went_to = 'primary'
+                    else:
+                        went_to = 'mixed'
+                    ok = went_to == expected and response.status_code < 500
+                    failures += not ok
+                    style = self.style.SUCCESS if ok else self.style.ERROR
+                    self.stdout.write(style(f"{name}: {response.status_code}, queries {dict(used)} (expected {expected})"))
+        finally:
+            connection_created.disconnect(dispatch_uid='check_replica_routing_queries')
+            connections.close_all()
+        if failures:
+            raise CommandError(f"{failures} routing checks failed.")
+        self.stdout.write(self.style.SUCCESS(f"Read routing works with {len(replicas)} replicas."))
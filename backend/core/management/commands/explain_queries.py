@@ -0,0 +1,109 @@
+import re
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.benchmark import ROUTES, MissingData, build_fixtures
+
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+# "SCAN core_testrequest" is a full table scan; "SCAN ... USING [COVERING] INDEX" walks an index
+SQLITE_SEQ_SCAN = re.compile(r'\bSCAN (\w+)(?: AS \w+)?(?! USING)\s*$', re.MULTILINE)
+# The batch runs the other views, which are requested on their own
+SKIPPED_ROUTES = {'batch'}
+
+
+def view_queries(fixtures):
+    """``(view name, sql, params)`` for each distinct SELECT that the GET views of ``core.benchmark`` run."""
+    client = APIClient()
+    seen, queries = set(), []
+    for route in ROUTES:
+        if route.method != 'GET' or route.name in SKIPPED_ROUTES:
+            continue
+        recorded = []
+
+        def record(execute, sql, params, many, context):
+            if not many and sql.lstrip().upper().startswith('SELECT'):
+                recorded.append((sql, tuple(params or ())))
+            return execute(sql, params, many, context)
+
+        client.force_authenticate(fixtures.get(route.role))
+        url = reverse(route.name, kwargs=route.kwargs(fixtures) if route.kwargs else None)
+        # gather_lookups carries these wrappers into its pool threads
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(record))
+            response = client.get(url, route.data(fixtures) if route.data else None)
+        if response.status_code >= 400:
+            raise CommandError(f"GET {url} answered {response.status_code}")
+        view_name = response.resolver_match.func.view_class.__name__
+        for sql, params in recorded:
+            if sql not in seen:
+                seen.add(sql)
+                queries.append((view_name, sql, params))
+    return queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every GET view as core.benchmark does, EXPLAIN each query the views run, and fail "
+        "when a large table is read with a sequential scan. Run against seeded data (see seed_scale); "
+        "the benchmark fixtures are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help="Only tables with at least this many rows count as large (default: 1000)",
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every query and its plan")
+
+    def handle(self, *args, **options):
+        table_sizes = {}
+
+        def table_size(table):
+            if table not in table_sizes:
+                if table not in connection.introspection.table_names():
+                    # Subquery aliases (U0, T3, ...) cannot be sized; treat them as large
+                    table_sizes[table] = None
+                else:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                        table_sizes[table] = cursor.fetchone()[0]
+            return table_sizes[table]
+
+        pattern = SQLITE_SEQ_SCAN if connection.vendor == 'sqlite' else POSTGRES_SEQ_SCAN
+        prefix = connection.ops.explain_query_prefix()
+        failures = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+            try:
+                fixtures = build_fixtures()
+            except MissingData as exc:
+                raise CommandError(str(exc))
+            numbers = {}
+            for view_name, sql, params in view_queries(fixtures):
+                numbers[view_name] = numbers.get(view_name, 0) + 1
+                name = f"{view_name} #{numbers[view_name]}"
+                with connection.cursor() as cursor:
+                    cursor.execute(f'{prefix} {sql}', params)
+                    plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+                if options['verbose_plans']:
+                    self.stdout.write(f"--- {name}\n{sql}\n{plan}")
+                scans = []
+                for table in pattern.findall(plan):
+                    rows = table_size(table)
+                    if rows is None or rows >= options['min_rows']:
+                        scans.append(f"{table} ({rows if rows is not None else '?'} rows)")
+                if scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"{name}: sequential scan on {', '.join(scans)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{name}: ok"))
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"{len(failures)} view queries scan large tables: {', '.join(failures)}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.answer_sheets import PACK_BATCH_SIZE, pack_completed_tests
+from core.models import PersonalizedTest
+
+
+class Command(BaseCommand):
+    help = "Pack the answer rows of completed tests submitted before answer sheets existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PACK_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        tests = PersonalizedTest.objects.filter(status=PersonalizedTest.Status.COMPLETED)
+        packed = pack_completed_tests(tests, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Packed {packed} completed tests."))
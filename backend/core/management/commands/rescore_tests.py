@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.scoring import completed_test_ids, score_tests
+
+
+class Command(BaseCommand):
+    help = "Recompute ranked career candidates for completed tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help="Only score tests that have no candidates yet")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        test_ids = list(completed_test_ids(only_unscored=options['missing']))
+        scored = score_tests(test_ids, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Scored {scored} completed tests."))
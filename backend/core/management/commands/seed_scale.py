@@ -0,0 +1,405 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from core.answer_sheets import layout, pack
+from core.models import (
+    AnswerSheet,
+    CareerRecommendation,
+    CareerResource,
+    CareerTag,
+    Option,
+    OptionCareerWeight,
+    PersonalizedTest,
+    Question,
+    ResourceCategory,
+    RoadmapStep,
+    StudentAnswer,
+    StudentResourceAccess,
+    StudentResourceProgress,
+    TestRequest,
+    TestSnapshot,
+    User,
+)
+from core.resource_access import index_resources
+from core.scoring import score_tests
+from core.snapshots import unsaved_snapshot
+
+QUALIFICATIONS = [
+    'Higher secondary (science)', 'Higher secondary (commerce)', 'BSc Computer Science', 'BCom',
+    'BA English', 'BTech Mechanical', 'Diploma in Electronics', 'MBA', 'BSc Nursing', 'BA Psychology',
+]
+INTERESTS = [
+    'programming', 'design', 'finance', 'writing', 'biology', 'teaching', 'music', 'robotics',
+    'marketing', 'data analysis', 'healthcare', 'law', 'photography', 'gaming', 'entrepreneurship',
+]
+CAREERS = [
+    'Software Engineer', 'Data Analyst', 'UX Designer', 'Chartered Accountant', 'Content Writer',
+    'Biotechnologist', 'Teacher', 'Product Manager', 'Mechanical Engineer', 'Nurse', 'Lawyer',
+    'Digital Marketer', 'Clinical Psychologist', 'Game Developer', 'Financial Analyst',
+]
+OPTION_LABELS = [
+    'Working with numbers', 'Building things', 'Helping people', 'Creative expression',
+    'Leading a team', 'Researching ideas', 'Working outdoors', 'Solving puzzles',
+]
+CATEGORIES = ['Courses', 'Books', 'Certifications', 'Communities', 'Videos', 'Tools']
+
+# Share of test requests in each lifecycle stage
+STATUS_MIX = (
+    (TestRequest.Status.PENDING, 0.15),
+    (TestRequest.Status.IN_PROGRESS, 0.10),
+    (TestRequest.Status.ASSIGNED, 0.20),
+    (TestRequest.Status.COMPLETED, 0.55),
+)
+RECOMMENDED_SHARE = 0.75
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the generated created_at/updated_at values."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def pick_status(rng):
+    roll = rng.random()
+    for status, share in STATUS_MIX:
+        if roll < share:
+            return status
+        roll -= share
+    return STATUS_MIX[-1][0]
+
+
+def seed_chunk(params):
+    """Create one chunk of students and everything hanging off them; returns row counts."""
+    rng = random.Random(params['seed'] + params['start'])
+    now = timezone.now()
+    batch_size = params['batch_size']
+    questions_per_test = params['questions']
+    options_per_question = params['options']
+    general_resource_ids = params['general_resource_ids']
+    category_ids = params['category_ids']
+    tag_ids = params['tag_ids']
+
+    with explicit_timestamps(TestRequest, StudentAnswer, CareerRecommendation, CareerResource,
+                             StudentResourceProgress), transaction.atomic():
+        students = User.objects.bulk_create([
+            User(
+                email=f"{params['prefix']}-{index}@example.com",
+                password=params['password'],
+                first_name=f'Student{index}',
+                role=User.Roles.STUDENT,
+                qualification=rng.choice(QUALIFICATIONS),
+                interests=', '.join(rng.sample(INTERESTS, 3)),
+                date_joined=now - timedelta(days=rng.randint(1, 365)),
+            )
+            for index in range(params['start'], params['end'])
+        ], batch_size=batch_size)
+
+        requests = []
+        for student in students:
+            created_at = student.date_joined + timedelta(hours=rng.randint(1, 240))
+            requests.append(TestRequest(
+                student=student,
+                qualification_snapshot=student.qualification,
+                interests_snapshot=student.interests,
+                status=pick_status(rng),
+                created_at=min(created_at, now),
+                updated_at=min(created_at + timedelta(hours=rng.randint(1, 72)), now),
+            ))
+        requests = TestRequest.objects.bulk_create(requests, batch_size=batch_size)
+
+        test_status = {
+            TestRequest.Status.IN_PROGRESS: PersonalizedTest.Status.DRAFT,
+            TestRequest.Status.ASSIGNED: PersonalizedTest.Status.ASSIGNED,
+            TestRequest.Status.COMPLETED: PersonalizedTest.Status.COMPLETED,
+        }
+        tests = []
+        for request in requests:
+            if request.status not in test_status:
+                continue
+            status = test_status[request.status]
+            assigned_at = request.created_at + timedelta(hours=rng.randint(2, 48))
+            tests.append(PersonalizedTest(
+                request=request,
+                admin_id=params['admin_id'],
+                status=status,
+                assigned_at=assigned_at if status != PersonalizedTest.Status.DRAFT else None,
+                completed_at=(
+                    assigned_at + timedelta(hours=rng.randint(1, 96))
+                    if status == PersonalizedTest.Status.COMPLETED else None
+                ),
+            ))
+        tests = PersonalizedTest.objects.bulk_create(tests, batch_size=batch_size)
+
+        questions = Question.objects.bulk_create([
+            Question(personalized_test=test, prompt=f'Which activity appeals to you most? ({order + 1})', order=order)
+            for test in tests
+            for order in range(questions_per_test)
+        ], batch_size=batch_size)
+
+        options = Option.objects.bulk_create([
+            Option(question=question, label=rng.choice(OPTION_LABELS), order=order)
+            for question in questions
+            for order in range(options_per_question)
+        ], batch_size=batch_size)
+
+        # Each option leans toward one or two careers, which is what scoring ranks
+        weights = OptionCareerWeight.objects.bulk_create([
+            OptionCareerWeight(option=option, tag_id=tag_id, weight=round(rng.uniform(0.5, 2.0), 2))
+            for option in options
+            for tag_id in rng.sample(tag_ids, min(len(tag_ids), rng.randint(1, 2)))
+        ], batch_size=batch_size)
+
+        # Assigned and completed tests are served from the snapshot frozen on assignment
+        questions_by_test = {test.id: {} for test in tests}
+        for index, question in enumerate(questions):
+            start = index * options_per_question
+            questions_by_test[question.personalized_test_id][question] = options[start:start + options_per_question]
+        snapshots = TestSnapshot.objects.bulk_create([
+            unsaved_snapshot(test, questions_by_test[test.id])
+            for test in tests
+            if test.status != PersonalizedTest.Status.DRAFT
+        ], batch_size=batch_size)
+
+        # Tests in progress keep an answer row per question; submitted ones have a packed sheet instead
+        test_by_id = {test.id: test for test in tests}
+        answers, selected = [], {}
+        for index, question in enumerate(questions):
+            test = test_by_id[question.personalized_test_id]
+            if test.status == PersonalizedTest.Status.DRAFT:
+                continue
+            if test.status == PersonalizedTest.Status.ASSIGNED and rng.random() < 0.5:
+                continue
+            option = options[index * options_per_question + rng.randrange(options_per_question)]
+            selected.setdefault(test.id, {})[question.id] = option.id
+            if test.status == PersonalizedTest.Status.COMPLETED and not params['keep_answer_rows']:
+                continue
+            answers.append(StudentAnswer(
+                question=question,
+                option=option,
+                student_id=test.request.student_id,
+                submitted_at=(test.completed_at or now) - timedelta(minutes=rng.randint(1, 60)),
+            ))
+        StudentAnswer.objects.bulk_create(answers, batch_size=batch_size)
+
+        sheets = []
+        for snapshot in snapshots:
+            if test_by_id[snapshot.test_id].status != PersonalizedTest.Status.COMPLETED:
+                continue
+            answered = selected.get(snapshot.test_id, {})
+            sheets.append(AnswerSheet(
+                test_id=snapshot.test_id, selections=pack(layout(snapshot), answered), answered_count=len(answered),
+            ))
+        AnswerSheet.objects.bulk_create(sheets, batch_size=batch_size)
+        scored = score_tests([sheet.test_id for sheet in sheets])
+
+        recommendations = CareerRecommendation.objects.bulk_create([
+            CareerRecommendation(
+                personalized_test=test,
+                admin_id=params['admin_id'],
+                career_name=rng.choice(CAREERS),
+                summary='Based on your answers and interests, this path plays to your strengths.',
+                created_at=min(test.completed_at + timedelta(hours=rng.randint(1, 72)), now),
+            )
+            for test in tests
+            if test.status == PersonalizedTest.Status.COMPLETED and rng.random() < RECOMMENDED_SHARE
+        ], batch_size=batch_size)
+
+        steps = RoadmapStep.objects.bulk_create([
+            RoadmapStep(recommendation=recommendation, order=order, title=f'Milestone {order + 1}')
+            for recommendation in recommendations
+            for order in range(rng.randint(3, 6))
+        ], batch_size=batch_size)
+
+        linked_resources = CareerResource.objects.bulk_create([
+            CareerResource(
+                career_recommendation=recommendation,
+                category_id=rng.choice(category_ids),
+                title=f'{recommendation.career_name} starter guide',
+                description='Hand-picked material for this roadmap.',
+                resource_type=rng.choice(CareerResource.ResourceType.values),
+                url='https://example.com/resource',
+                admin_id=params['admin_id'],
+                created_at=recommendation.created_at,
+                updated_at=recommendation.created_at,
+            )
+            for recommendation in recommendations
+            if rng.random() < 0.4
+        ], batch_size=batch_size)
+        linked_by_recommendation = {}
+        for resource in linked_resources:
+            linked_by_recommendation.setdefault(resource.career_recommendation_id, []).append(resource.id)
+        # bulk_create skips the post_save receivers that maintain the visibility index
+        StudentResourceAccess.objects.bulk_create([
+            StudentResourceAccess(student_id=recommendation.personalized_test.request.student_id, resource_id=resource_id)
+            for recommendation in recommendations
+            for resource_id in linked_by_recommendation.get(recommendation.id, [])
+        ], batch_size=batch_size)
+
+        progress_statuses = StudentResourceProgress.Status.values
+        progress = []
+        for recommendation in recommendations:
+            student_id = recommendation.personalized_test.request.student_id
+            visible = linked_by_recommendation.get(recommendation.id, [])
+            picks = set(visible + rng.sample(general_resource_ids, min(len(general_resource_ids), rng.randint(0, 4))))
+            for resource_id in picks:
+                status = rng.choice(progress_statuses)
+                started_at = recommendation.created_at + timedelta(hours=rng.randint(1, 200))
+                progress.append(StudentResourceProgress(
+                    student_id=student_id,
+                    resource_id=resource_id,
+                    status=status,
+                    is_favorite=rng.random() < 0.2,
+                    started_at=started_at if status != StudentResourceProgress.Status.NOT_STARTED else None,
+                    completed_at=started_at if status == StudentResourceProgress.Status.COMPLETED else None,
+                    updated_at=min(started_at, now),
+                ))
+        StudentResourceProgress.objects.bulk_create(progress, batch_size=batch_size)
+
+    return {
+        'students': len(students),
+        'test_requests': len(requests),
+        'tests': len(tests),
+        'questions': len(questions),
+        'options': len(options),
+        'option_weights': len(weights),
+        'snapshots': len(snapshots),
+        'answers': len(answers),
+        'answer_sheets': len(sheets),
+        'scored_tests': scored,
+        'recommendations': len(recommendations),
+        'roadmap_steps': len(steps),
+        'resources': len(linked_resources),
+        'progress': len(progress),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic students, tests, answers, recommendations, resources and progress "
+        "rows for scale testing and profiling. Tests are stored as the views leave them: frozen "
+        "snapshots once assigned, and packed answer sheets and career scores once completed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--questions', type=int, default=10, help="Questions per test")
+        parser.add_argument('--options', type=int, default=4, help="Options per question")
+        parser.add_argument('--general-resources', type=int, default=200)
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Students per chunk")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per INSERT")
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help="Parallel worker processes on Postgres (default: CPU count); SQLite always uses one",
+        )
+        parser.add_argument(
+            '--keep-answer-rows', action='store_true', default=None,
+            help="Keep completed tests' StudentAnswer rows as well (default: ANSWER_SHEET_KEEP_ROWS)",
+        )
+        parser.add_argument('--prefix', default='seed', help="Email prefix for generated students")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['questions'] < 1 or options['options'] < 1:
+            raise CommandError("--students, --questions and --options must be positive.")
+        prefix = options['prefix']
+        if User.objects.filter(email__startswith=f'{prefix}-').exists():
+            raise CommandError(f"Students with prefix '{prefix}' already exist; pass a different --prefix.")
+
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        password = make_password('password123')
+        admin, _ = User.objects.get_or_create(
+            email=f'{prefix}-admin@example.com',
+            defaults={'role': User.Roles.ADMIN, 'is_staff': True, 'password': password},
+        )
+        category_ids = [
+            ResourceCategory.objects.get_or_create(name=name)[0].id
+            for name in CATEGORIES
+        ]
+        tag_ids = [CareerTag.objects.get_or_create(name=name)[0].id for name in CAREERS]
+        general_resources = CareerResource.objects.bulk_create([
+            CareerResource(
+                category_id=rng.choice(category_ids),
+                title=f'General resource {index + 1}',
+                description='Useful for every career path.',
+                resource_type=rng.choice(CareerResource.ResourceType.values),
+                difficulty_level=rng.choice(CareerResource.DifficultyLevel.values),
+                url='https://example.com/general',
+                is_free=rng.random() < 0.7,
+                admin=admin,
+                order=index,
+            )
+            for index in range(options['general_resources'])
+        ], batch_size=options['batch_size'])
+        # bulk_create skips the post_save receivers that maintain the visibility index
+        index_resources(general_resources)
+
+        base = {
+            'prefix': prefix,
+            'seed': options['seed'],
+            'password': password,
+            'admin_id': admin.id,
+            'category_ids': category_ids,
+            'tag_ids': tag_ids,
+            'keep_answer_rows': (
+                getattr(settings, 'ANSWER_SHEET_KEEP_ROWS', False)
+                if options['keep_answer_rows'] is None else options['keep_answer_rows']
+            ),
+            'general_resource_ids': [resource.id for resource in general_resources],
+            'questions': options['questions'],
+            'options': options['options'],
+            'batch_size': options['batch_size'],
+        }
+        chunks = [
+            dict(base, start=start, end=min(start + options['chunk_size'], options['students']))
+            for start in range(0, options['students'], options['chunk_size'])
+        ]
+
+        workers = options['workers'] or multiprocessing.cpu_count()
+        if connection.vendor == 'sqlite' and workers > 1:
+            # SQLite has a single writer, so parallel chunks would only fight over the lock
+            if options['workers']:
+                self.stdout.write(self.style.WARNING("SQLite allows one writer; running chunks sequentially."))
+            workers = 1
+        totals = {'general_resources': len(general_resources)}
+        if workers > 1 and len(chunks) > 1:
+            # Forked workers must open their own connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                results = executor.map(seed_chunk, chunks)
+                for counts in results:
+                    self._accumulate(totals, counts)
+        else:
+            for chunk in chunks:
+                self._accumulate(totals, seed_chunk(chunk))
+
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{name}={count}' for name, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {elapsed:.1f}s: {summary}"))
+        self.stdout.write(f"Everyone logs in with password 'password123'; the admin is {admin.email}.")
+
+    def _accumulate(self, totals, counts):
+        for name, count in counts.items():
+            totals[name] = totals.get(name, 0) + count
+        self.stdout.write(f"  chunk done: {counts['students']} students, {counts['answers']} answers")
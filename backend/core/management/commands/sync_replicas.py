@@ -0,0 +1,63 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+
+def copy_sqlite(primary, replica):
+    primary.ensure_connection()
+    target = sqlite3.connect(replica.settings_dict['NAME'])
+    try:
+        primary.connection.backup(target)  # A consistent snapshot, even while the primary takes writes
+    finally:
+        target.close()
+
+
+def copy_postgresql(primary, replica):
+    source, target = primary.settings_dict, replica.settings_dict
+    if (source['HOST'], source['PORT']) != (target['HOST'], target['PORT']):
+        raise CommandError(
+            f"{replica.alias} is on another server; only databases on the primary's server can be copied. "
+            "Use streaming replication for real replicas."
+        )
+    quote = primary.ops.quote_name
+    primary.close()
+    with primary._nodb_cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s AND pid <> pg_backend_pid()",
+            [target['NAME']],
+        )
+        cursor.execute(f"DROP DATABASE IF EXISTS {quote(target['NAME'])}")
+        try:
+            cursor.execute(f"CREATE DATABASE {quote(target['NAME'])} TEMPLATE {quote(source['NAME'])}")
+        except OperationalError as exc:
+            raise CommandError(f"{exc}Stop the app (the template database must have no other sessions).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate replication for local testing: copy the primary over every replica alias "
+        "(SQLITE_REPLICAS files, or POSTGRES_REPLICAS databases on the primary's server). "
+        "With --interval, keep copying, which gives the replicas that much lag."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help="Seconds between copies; 0 copies once")
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured; set SQLITE_REPLICAS or POSTGRES_REPLICAS.")
+        primary = connections[DEFAULT_DB_ALIAS]
+        copy = copy_sqlite if primary.vendor == 'sqlite' else copy_postgresql
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                replica = connections[alias]
+                replica.close()
+                started = time.perf_counter()
+                copy(primary, replica)
+                self.stdout.write(f"Copied {DEFAULT_DB_ALIAS} to {alias} in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,246 @@
+"""
+Request metrics exported in the Prometheus text format.
+
+Each process keeps its counters and histograms in memory and periodically
+writes them to ``<METRICS_DIR>/metrics-<pid>.json``. A scrape merges every
+file in the directory, so the numbers cover all gunicorn workers no matter
+which worker answers. Without ``METRICS_DIR`` the numbers are per process.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests by route, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Total request latency.'),
+    'http_request_db_seconds': ('histogram', 'Time spent executing SQL per request.'),
+    'http_request_serializer_seconds': ('histogram', 'Time spent rendering response data to JSON per request.'),
+    'http_request_queries': ('histogram', 'Queries executed per request.'),
+    'pdf_render_seconds': ('histogram', 'Time spent rendering recommendation PDFs.'),
+    'http_response_uncompressed_bytes_total': ('counter', 'Body bytes of compressed responses before compression.'),
+    'http_response_compressed_bytes_total': ('counter', 'Body bytes of compressed responses as sent.'),
+    'autosave_answers_buffered_total': ('counter', 'Answer changes accepted into the autosave buffer.'),
+    'autosave_answers_flushed_total': ('counter', 'StudentAnswer rows written by autosave flushes.'),
+    'autosave_flushes_total': ('counter', 'Background autosave batch flushes.'),
+    'autosave_flush_errors_total': ('counter', 'Failed autosave flushes and journal recoveries, by stage.'),
+    'db_connection_setups_total': ('counter', 'Django connection setups: new connections, or pool checkouts when pooling.'),
+    'db_pool_size': ('gauge', 'Connections currently held by the psycopg pool (summed over workers).'),
+    'db_pool_available': ('gauge', 'Idle connections in the psycopg pool.'),
+    'db_pool_requests_waiting': ('gauge', 'Requests waiting for a pooled connection.'),
+    'db_pool_max_size': ('gauge', 'Configured maximum pool size.'),
+    'db_pool_connections_total': ('counter', 'Physical connections opened by the psycopg pool.'),
+    'db_pool_connection_errors_total': ('counter', 'Failed connection attempts by the psycopg pool.'),
+    'db_pool_connections_lost_total': ('counter', 'Pooled connections found broken by health checks.'),
+    'db_pool_requests_total': ('counter', 'Connections handed out by the psycopg pool.'),
+    'db_pool_requests_queued_total': ('counter', 'Pool checkouts that had to wait for a connection.'),
+    'db_pool_requests_wait_seconds_total': ('counter', 'Time spent waiting for pooled connections.'),
+    'db_pool_requests_errors_total': ('counter', 'Pool checkouts that timed out or failed.'),
+    'db_replica_requests_total': ('counter', 'replica_reads requests served from each replica.'),
+    'db_replica_pinned_requests_total': ('counter', 'replica_reads requests kept on the primary because the user just wrote.'),
+    'sqlite_write_retries_total': ('counter', 'Write views retried because SQLite stayed locked past busy_timeout.'),
+    'events_published_total': ('counter', 'Change events published for the event stream, by type.'),
+    'event_stream_clients': ('gauge', 'Event streams currently open in this process.'),
+    'event_stream_overflows_total': ('counter', 'Times a slow event stream fell behind and was told to resync.'),
+    'batch_subrequests_total': ('counter', 'Requests served inside GET /api/batch/, by route and status code.'),
+    'batch_subrequest_duration_seconds': ('histogram', 'Latency of requests served inside a batch, by route.'),
+}
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._last_flush = 0.0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name, labels, value, buckets=DEFAULT_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0,
+                }
+            for index, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                'histograms': [
+                    [name, list(labels), dict(histogram, counts=list(histogram['counts']))]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        directory = metrics_dir()
+        if directory is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0):
+            return
+        self._last_flush = now
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'metrics-{os.getpid()}.json'
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+
+registry = Registry()
+
+
+def metrics_dir():
+    directory = getattr(settings, 'METRICS_DIR', None)
+    return Path(directory) if directory else None
+
+
+@contextmanager
+def timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, labels, time.perf_counter() - started)
+
+
+def collect():
+    """Merge the snapshots of every process (or just this one) into one registry."""
+    from .db_connections import record_pool_stats
+
+    record_pool_stats()
+    registry.flush(force=True)
+    directory = metrics_dir()
+    if directory is None or not directory.exists():
+        snapshots = [registry.snapshot()]
+    else:
+        snapshots = []
+        for path in directory.glob('metrics-*.json'):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # A worker is mid-write or the file vanished; skip it for this scrape
+    merged = Registry()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged.counters[key] = merged.counters.get(key, 0) + value
+        # Gauges are per-process sizes, so they add up across workers too
+        for name, labels, value in snapshot.get('gauges', ()):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged.gauges[key] = merged.gauges.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            target = merged.histograms.get(key)
+            if target is None or target['buckets'] != histogram['buckets']:
+                merged.histograms[key] = dict(histogram, counts=list(histogram['counts']))
+                continue
+            target['counts'] = [a + b for a, b in zip(target['counts'], histogram['counts'])]
+            target['sum'] += histogram['sum']
+            target['count'] += histogram['count']
+    return merged
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + body + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(merged=None):
+    merged = merged or collect()
+    lines = []
+    by_name = {}
+    for (name, labels), value in sorted(merged.counters.items()):
+        by_name.setdefault(name, []).append(('counter', labels, value))
+    for (name, labels), value in sorted(merged.gauges.items()):
+        by_name.setdefault(name, []).append(('gauge', labels, value))
+    for (name, labels), histogram in sorted(merged.histograms.items()):
+        by_name.setdefault(name, []).append(('histogram', labels, histogram))
+    for name in sorted(by_name):
+        kind, description = HELP.get(name, (by_name[name][0][0], name))
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for sample_kind, labels, value in by_name[name]:
+            if sample_kind in ('counter', 'gauge'):
+                lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+                continue
+            for bound, count in zip(value['buckets'], value['counts']):
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(value["sum"])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def add_serializer_time(request, seconds):
+    """Count ``seconds`` of response serialization towards ``request``; called by the JSON renderer."""
+    request = getattr(request, '_request', request)  # DRF's Request wraps the HttpRequest middleware sees
+    request.serializer_seconds = getattr(request, 'serializer_seconds', 0.0) + seconds
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status code, DB time and serializer time per route.
+
+    Serializer time is what ``FastJSONRenderer`` spent rendering the response,
+    which DRF does on the way out through this middleware.
+
+    Must sit inside ``QueryBudgetMiddleware`` so the request's query counter is
+    available.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.route) if match else 'unmatched'
+        labels = {'route': route, 'method': request.method}
+        registry.inc('http_requests_total', dict(labels, status=str(response.status_code)))
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+        registry.observe('http_request_serializer_seconds', labels, getattr(request, 'serializer_seconds', 0.0))
+        counter = getattr(request, 'db_counter', None)
+        if counter is not None:
+            registry.observe('http_request_db_seconds', labels, counter.duration)
+            registry.observe('http_request_queries', labels, counter.count, buckets=QUERY_BUCKETS)
+        registry.flush()
+        return response
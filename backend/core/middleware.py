@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget_for(view_class, method):
+    """
+    Read the budget a view declares through its ``query_budget`` attribute.
+
+    The attribute is either a number that applies to every method or a dict
+    keyed by HTTP method, e.g. ``{'GET': 4, 'POST': 8}``, or a callable
+    returning either, for views whose queries depend on settings.
+    """
+    budget = getattr(view_class, 'query_budget', None)
+    if callable(budget):
+        budget = budget()
+    if isinstance(budget, dict):
+        return budget.get(method.upper())
+    return budget
+
+
+class QueryCounter:
+    # gather_lookups threads and batch sub-requests report into the same counter
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+
+
+class QueryBudgetMiddleware:
+    """
+    Count queries and DB time per request and report them as response headers.
+
+    When the resolved view declares a ``query_budget`` and the request goes over
+    it, the overrun is logged, or raised as ``QueryBudgetExceeded`` when
+    ``QUERY_BUDGET_STRICT`` is enabled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request.db_counter = counter
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+
+        response['X-DB-Query-Count'] = str(counter.count)
+        response['X-DB-Time-Ms'] = f'{counter.duration * 1000:.2f}'
+
+        view_class = getattr(request, '_query_budget_view', None)
+        budget = query_budget_for(view_class, request.method) if view_class else None
+        if budget is not None:
+            response['X-DB-Query-Budget'] = str(budget)
+            if counter.count > budget:
+                message = (
+                    f"{view_class.__name__} {request.method} {request.path} ran {counter.count} queries "
+                    f"(budget {budget})"
+                )
+                if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget_view = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
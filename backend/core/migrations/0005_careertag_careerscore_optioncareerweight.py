@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_resourcecategory_careerresource_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareerTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CareerScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('personalized_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='career_scores', to='core.personalizedtest')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='core.careertag')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'unique_together': {('personalized_test', 'tag')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OptionCareerWeight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField(default=1.0)),
+                ('option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='career_weights', to='core.option')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_weights', to='core.careertag')),
+            ],
+            options={
+                'unique_together': {('option', 'tag')},
+            },
+        ),
+    ]
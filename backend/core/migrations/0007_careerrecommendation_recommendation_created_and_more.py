@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_questionbank_testtemplate_testtemplatequestion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='careerrecommendation',
+            index=models.Index(fields=['-created_at'], name='recommendation_created'),
+        ),
+        migrations.AddIndex(
+            model_name='careerresource',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', 'created_at'], name='resource_active_order'),
+        ),
+        migrations.AddIndex(
+            model_name='option',
+            index=models.Index(fields=['question', 'order'], name='option_question_order'),
+        ),
+        migrations.AddIndex(
+            model_name='personalizedtest',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['-completed_at'], name='ptest_completed_queue'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['personalized_test', 'order'], name='question_test_order'),
+        ),
+        migrations.AddIndex(
+            model_name='roadmapstep',
+            index=models.Index(fields=['recommendation', 'order'], name='roadmapstep_rec_order'),
+        ),
+        migrations.AddIndex(
+            model_name='studentresourceprogress',
+            index=models.Index(fields=['student', '-updated_at'], name='progress_student_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='testrequest',
+            index=models.Index(fields=['student', '-created_at'], name='testrequest_student_created'),
+        ),
+        migrations.AddIndex(
+            model_name='testrequest',
+            index=models.Index(fields=['status', '-created_at'], name='testrequest_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='testrequest',
+            index=models.Index(fields=['-created_at'], name='testrequest_created'),
+        ),
+        migrations.AddIndex(
+            model_name='testrequest',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_progress'])), fields=['-created_at'], name='testrequest_open_created'),
+        ),
+    ]
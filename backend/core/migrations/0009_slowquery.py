@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=40)),
+                ('sql', models.TextField(help_text='Normalized SQL with literals and IN lists collapsed')),
+                ('duration_ms', models.FloatField()),
+                ('database', models.CharField(default='default', max_length=50)),
+                ('view', models.CharField(blank=True, max_length=255)),
+                ('call_site', models.CharField(blank=True, max_length=500)),
+                ('stack', models.TextField(blank=True)),
+                ('plan', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Slow queries',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_access(apps, schema_editor):
+    CareerResource = apps.get_model('core', 'CareerResource')
+    StudentResourceAccess = apps.get_model('core', 'StudentResourceAccess')
+    pairs = CareerResource.objects.filter(career_recommendation__isnull=False).values_list(
+        'career_recommendation__personalized_test__request__student_id', 'id'
+    )
+    StudentResourceAccess.objects.bulk_create(
+        [StudentResourceAccess(student_id=student_id, resource_id=resource_id) for student_id, resource_id in pairs],
+        batch_size=5000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_slowquery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentResourceAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_grants', to='core.careerresource')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resource_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Student Resource Access',
+                'unique_together': {('student', 'resource')},
+            },
+        ),
+        migrations.RunPython(backfill_access, migrations.RunPython.noop),
+    ]
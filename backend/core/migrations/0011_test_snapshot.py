@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_student_resource_access'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveSmallIntegerField(help_text='Snapshot format version')),
+                ('content_hash', models.CharField(help_text='sha256 of payload', max_length=64)),
+                ('payload', models.TextField(help_text='Serialized questions and options as JSON')),
+                ('file', models.FileField(blank=True, upload_to='snapshots/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='core.personalizedtest')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_test_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerSheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selections', models.BinaryField(help_text='Packed option index per question, see core.answer_sheets')),
+                ('answered_count', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='answer_sheet', to='core.personalizedtest')),
+            ],
+        ),
+    ]
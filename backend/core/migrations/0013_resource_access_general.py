@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_general(apps, schema_editor):
+    CareerResource = apps.get_model('core', 'CareerResource')
+    StudentResourceAccess = apps.get_model('core', 'StudentResourceAccess')
+    StudentResourceAccess.objects.bulk_create(
+        [
+            StudentResourceAccess(resource_id=resource_id, general=True)
+            for resource_id in CareerResource.objects.filter(career_recommendation__isnull=True).values_list('id', flat=True)
+        ],
+        batch_size=5000,
+    )
+
+
+def remove_general(apps, schema_editor):
+    apps.get_model('core', 'StudentResourceAccess').objects.filter(general=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_answer_sheet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentresourceaccess',
+            name='general',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='studentresourceaccess',
+            name='student',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resource_access', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='studentresourceaccess',
+            constraint=models.UniqueConstraint(condition=models.Q(('general', True)), fields=('resource',), name='resource_access_general'),
+        ),
+        migrations.RunPython(backfill_general, remove_general),
+    ]
@@ -62,6 +62,19 @@ class TestRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', '-created_at'], name='testrequest_student_created'),
+            models.Index(fields=['status', '-created_at'], name='testrequest_status_created'),
+            models.Index(fields=['-created_at'], name='testrequest_created'),
+            # Admin focus queue: open requests, newest first
+            models.Index(
+                fields=['-created_at'],
+                name='testrequest_open_created',
+                condition=models.Q(status__in=['pending', 'in_progress']),
+            ),
+        ]
+
     def __str__(self):
         return f"Request {self.id} by {self.student.email}"
 
@@ -78,6 +91,15 @@ class PersonalizedTest(models.Model):
     assigned_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-completed_at'],
+                name='ptest_completed_queue',
+                condition=models.Q(status='completed'),
+            ),
+        ]
+
     def __str__(self):
         return f"Personalized test for {self.request.student.email}"
 
@@ -89,6 +111,9 @@ class Question(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['personalized_test', 'order'], name='question_test_order'),
+        ]
 
     def __str__(self):
         return f"Question {self.order} for test {self.personalized_test_id}"
@@ -102,11 +127,93 @@ class Option(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['question', 'order'], name='option_question_order'),
+        ]
 
     def __str__(self):
         return f"Option {self.order} for question {self.question_id}"
 
 
+class TestSnapshot(models.Model):
+    # Written by core.snapshots when a test is assigned; questions and options are frozen from then on
+    test = models.OneToOneField(PersonalizedTest, on_delete=models.CASCADE, related_name='snapshot')
+    version = models.PositiveSmallIntegerField(help_text="Snapshot format version")
+    content_hash = models.CharField(max_length=64, help_text="sha256 of payload")
+    payload = models.TextField(help_text="Serialized questions and options as JSON")
+    file = models.FileField(upload_to='snapshots/', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Snapshot v{self.version} of test {self.test_id}"
+
+
+class QuestionBank(models.Model):
+    # Identical prompt/options collapse onto one row through content_hash
+    prompt = models.TextField()
+    options = models.JSONField(default=list, help_text="List of {label, description, order, career_weights}")
+    content_hash = models.CharField(max_length=64, unique=True)
+    admin = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='bank_questions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Question bank entry"
+        verbose_name_plural = "Question bank"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.prompt[:80]
+
+
+class TestTemplate(models.Model):
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    admin = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='test_templates')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class TestTemplateQuestion(models.Model):
+    template = models.ForeignKey(TestTemplate, on_delete=models.CASCADE, related_name='items')
+    question = models.ForeignKey(QuestionBank, on_delete=models.PROTECT, related_name='template_items')
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order']
+
+    def __str__(self):
+        return f"Item {self.order} of template {self.template_id}"
+
+
+class CareerTag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    description = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class OptionCareerWeight(models.Model):
+    option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name='career_weights')
+    tag = models.ForeignKey(CareerTag, on_delete=models.CASCADE, related_name='option_weights')
+    weight = models.FloatField(default=1.0)
+
+    class Meta:
+        unique_together = ('option', 'tag')
+
+    def __str__(self):
+        return f"{self.option_id} -> {self.tag.name} ({self.weight})"
+
+
 class StudentAnswer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
     option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name='answers')
@@ -120,6 +227,32 @@ class StudentAnswer(models.Model):
         return f"Answer by {self.student.email} to question {self.question_id}"
 
 
+class AnswerSheet(models.Model):
+    # Written by core.answer_sheets when a test is submitted, replacing its StudentAnswer rows
+    test = models.OneToOneField(PersonalizedTest, on_delete=models.CASCADE, related_name='answer_sheet')
+    selections = models.BinaryField(help_text="Packed option index per question, see core.answer_sheets")
+    answered_count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Answer sheet for test {self.test_id}"
+
+
+class CareerScore(models.Model):
+    personalized_test = models.ForeignKey(PersonalizedTest, on_delete=models.CASCADE, related_name='career_scores')
+    tag = models.ForeignKey(CareerTag, on_delete=models.CASCADE, related_name='scores')
+    score = models.FloatField()
+    rank = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['rank']
+        unique_together = ('personalized_test', 'tag')
+
+    def __str__(self):
+        return f"{self.tag.name} #{self.rank} for test {self.personalized_test_id}"
+
+
 class CareerRecommendation(models.Model):
     personalized_test = models.OneToOneField(PersonalizedTest, on_delete=models.CASCADE, related_name='recommendation')
     admin = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='recommendations')
@@ -127,6 +260,11 @@ class CareerRecommendation(models.Model):
     summary = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='recommendation_created'),
+        ]
+
     def __str__(self):
         return f"Recommendation for {self.personalized_test.request.student.email}"
 
@@ -139,6 +277,9 @@ class RoadmapStep(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['recommendation', 'order'], name='roadmapstep_rec_order'),
+        ]
 
     def __str__(self):
         return f"Step {self.order} for recommendation {self.recommendation_id}"
@@ -204,6 +345,11 @@ class CareerResource(models.Model):
         indexes = [
             models.Index(fields=['career_recommendation', 'is_active']),
             models.Index(fields=['category', 'is_active']),
+            models.Index(
+                fields=['order', 'created_at'],
+                name='resource_active_order',
+                condition=models.Q(is_active=True),
+            ),
         ]
 
     def __str__(self):
@@ -231,7 +377,68 @@ class StudentResourceProgress(models.Model):
         verbose_name_plural = "Student Resource Progress"
         indexes = [
             models.Index(fields=['student', 'status']),
+            models.Index(fields=['student', '-updated_at'], name='progress_student_updated'),
         ]
 
     def __str__(self):
         return f"{self.student.email} - {self.resource.title} ({self.get_status_display()})"
+
+
+class StudentResourceAccess(models.Model):
+    # Maintained by core.resource_access; a general resource has one row with general=True and no student
+    student = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='resource_access')
+    resource = models.ForeignKey(CareerResource, on_delete=models.CASCADE, related_name='access_grants')
+    general = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('student', 'resource')
+        constraints = [
+            # Also the index behind the general half of the visibility join
+            models.UniqueConstraint(
+                fields=['resource'], condition=models.Q(general=True), name='resource_access_general',
+            ),
+        ]
+        verbose_name_plural = "Student Resource Access"
+
+    def __str__(self):
+        return f"{'everyone' if self.general else self.student_id} -> {self.resource_id}"
+
+
+class RequestProfile(models.Model):
+    path = models.CharField(max_length=500)
+    method = models.CharField(max_length=10)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='request_profiles')
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    sql_time_ms = models.FloatField(default=0)
+    queries = models.JSONField(default=list, blank=True, help_text="Executed SQL with timings")
+    summary = models.TextField(blank=True, help_text="Top functions by cumulative time")
+    profile = models.FileField(upload_to='profiles/', help_text="cProfile output, open with pstats or snakeviz")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class SlowQuery(models.Model):
+    # Ring buffer: only the newest SLOW_QUERY_LOG_SIZE rows are kept
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    sql = models.TextField(help_text="Normalized SQL with literals and IN lists collapsed")
+    duration_ms = models.FloatField()
+    database = models.CharField(max_length=50, default='default')
+    view = models.CharField(max_length=255, blank=True)
+    call_site = models.CharField(max_length=500, blank=True)
+    stack = models.TextField(blank=True)
+    plan = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = "Slow queries"
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms {self.sql[:80]}"
@@ -0,0 +1,111 @@
+"""
+Opt-in profiling of a single API request.
+
+An admin adds the ``X-Profile-Request: 1`` header (or ``?_profile=1``) to any
+request. That one request then runs under cProfile with its SQL recorded, and
+the result is stored as a ``RequestProfile`` downloadable from the Django
+admin. Requests without the flag only pay for a header/query-string lookup.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.core.files.base import ContentFile
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import RequestProfile, User
+
+PROFILE_HEADER = 'HTTP_X_PROFILE_REQUEST'
+PROFILE_PARAM = '_profile'
+MAX_RECORDED_QUERIES = 500
+SUMMARY_LINES = 40
+
+
+class SQLRecorder:
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if len(self.queries) < MAX_RECORDED_QUERIES:
+                self.queries.append({'sql': sql, 'duration_ms': round(elapsed * 1000, 3), 'many': many})
+
+
+def profiling_requested(request):
+    return request.META.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_PARAM) == '1'
+
+
+def profiling_user(request):
+    """Return the admin asking for the profile, or ``None`` if the caller is not an admin."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        user = authenticated[0] if authenticated else None
+    if user is not None and user.is_authenticated and user.role == User.Roles.ADMIN:
+        return user
+    return None
+
+
+class RequestProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling_requested(request):
+            return self.get_response(request)
+        user = profiling_user(request)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user)
+
+    def profile(self, request, user):
+        recorder = SQLRecorder()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - started
+
+        profiler.create_stats()
+        # pstats.Stats() takes ownership of profiler.stats, so serialize first
+        raw_stats = marshal.dumps(profiler.stats)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+        record = RequestProfile(
+            path=request.get_full_path()[:500],
+            method=request.method,
+            user=user,
+            status_code=response.status_code,
+            duration_ms=round(duration * 1000, 3),
+            query_count=recorder.count,
+            sql_time_ms=round(recorder.duration * 1000, 3),
+            queries=recorder.queries,
+            summary=summary.getvalue(),
+        )
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        record.profile.save(f'{stamp}-{request.method.lower()}.prof', ContentFile(raw_stats), save=False)
+        record.save()
+        response['X-Profile-Id'] = str(record.id)
+        return response
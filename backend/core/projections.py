@@ -0,0 +1,232 @@
+"""
+Read-only serialization built on ``values_list()`` projections.
+
+The resource list endpoints return hundreds of rows per request, and building
+a ``CareerResourceSerializer`` (plus its nested category and admin
+serializers) per row dominates their CPU time. A ``Projection`` describes the
+same output as a serializer, fetches exactly the columns it needs in one
+``values_list()`` query and turns each row into a dict with a function that
+is generated and compiled once per projection.
+
+Field conversions reuse the DRF fields of the serializer being replaced, so
+the output (and therefore the rendered JSON) is identical;
+``core.tests.test_projections`` compares both paths byte for byte.
+"""
+from functools import cache, cached_property
+
+from .models import CareerResource
+from .serializers import CareerResourceSerializer
+
+
+class Field:
+    """A column, optionally passed through ``convert`` when it is not NULL."""
+
+    def __init__(self, path, convert=None):
+        self.path = path
+        self.convert = convert
+
+
+class Nested:
+    """A nested object; ``None`` when the column at ``null_path`` is NULL."""
+
+    def __init__(self, fields, null_path):
+        self.fields = fields
+        self.null_path = null_path
+
+
+class Computed:
+    """``func(context, *values)`` over one or more columns."""
+
+    def __init__(self, paths, func):
+        self.paths = tuple(paths)
+        self.func = func
+
+
+class Constant:
+    def __init__(self, value):
+        self.value = value
+
+
+def prefixed(fields, prefix):
+    """The same field specs reading their columns through a relation, e.g. ``resource__``."""
+    result = {}
+    for key, spec in fields.items():
+        if isinstance(spec, str):
+            spec = prefix + spec
+        elif isinstance(spec, Field):
+            spec = Field(prefix + spec.path, spec.convert)
+        elif isinstance(spec, Nested):
+            spec = Nested(prefixed(spec.fields, prefix), prefix + spec.null_path)
+        elif isinstance(spec, Computed):
+            spec = Computed([prefix + path for path in spec.paths], spec.func)
+        result[key] = spec
+    return result
+
+
+class Projection:
+    def __init__(self, fields):
+        self.fields = fields
+
+    @cached_property
+    def compiled(self):
+        """``(columns, row_to_dict)``; built once and safe to share between threads."""
+        return _Compiler().compile(self.fields)
+
+    def serialize(self, queryset, context=None):
+        columns, row_to_dict = self.compiled
+        context = context or {}
+        return [row_to_dict(row, context) for row in queryset.values_list(*columns)]
+
+
+class _Compiler:
+    def __init__(self):
+        self.columns = []
+        self.bindings = {}
+
+    def compile(self, fields):
+        source = f'def row_to_dict(row, context):\n    return {self.dict_literal(fields)}\n'
+        namespace = dict(self.bindings)
+        exec(compile(source, '<projection>', 'exec'), namespace)
+        return tuple(self.columns), namespace['row_to_dict']
+
+    def column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return f'row[{self.columns.index(path)}]'
+
+    def bind(self, value):
+        name = f'_b{len(self.bindings)}'
+        self.bindings[name] = value
+        return name
+
+    def expression(self, spec):
+        if isinstance(spec, str):
+            spec = Field(spec)
+        if isinstance(spec, Field):
+            column = self.column(spec.path)
+            if spec.convert is None:
+                return column
+            return f'(None if {column} is None else {self.bind(spec.convert)}({column}))'
+        if isinstance(spec, Nested):
+            check = self.column(spec.null_path)
+            return f'(None if {check} is None else {self.dict_literal(spec.fields)})'
+        if isinstance(spec, Computed):
+            columns = ', '.join(self.column(path) for path in spec.paths)
+            return f'{self.bind(spec.func)}(context, {columns})'
+        if isinstance(spec, Constant):
+            return self.bind(spec.value)
+        raise TypeError(f"Unsupported projection field {spec!r}")
+
+    def dict_literal(self, fields):
+        items = ', '.join(f'{key!r}: {self.expression(spec)}' for key, spec in fields.items())
+        return '{' + items + '}'
+
+
+def _file_url(context, name):
+    # Same result as both FileField.to_representation and get_file_url
+    if not name:
+        return None
+    url = CareerResource._meta.get_field('file').storage.url(name)
+    request = context.get('request')
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _student_progress(context, resource_id):
+    return context['progress'].get(resource_id)
+
+
+def _progress_columns(context, status, is_favorite, notes, started_at, completed_at):
+    return {
+        'status': status,
+        'is_favorite': is_favorite,
+        'notes': notes,
+        'started_at': started_at,
+        'completed_at': completed_at,
+    }
+
+
+PROGRESS_COLUMNS = ('status', 'is_favorite', 'notes', 'started_at', 'completed_at')
+
+
+def resource_fields(student_progress):
+    """``CareerResourceSerializer`` output; ``student_progress`` fills the last key."""
+    resource = CareerResourceSerializer()
+    category = resource.fields['category']
+    return {
+        'id': 'id',
+        'career_recommendation': 'career_recommendation_id',
+        'category': Nested({
+            'id': 'category__id',
+            'name': 'category__name',
+            'description': 'category__description',
+            'icon': 'category__icon',
+            'created_at': Field('category__created_at', category.fields['created_at'].to_representation),
+        }, null_path='category__id'),
+        'title': 'title',
+        'description': 'description',
+        'resource_type': 'resource_type',
+        'url': 'url',
+        'file': Computed(('file',), _file_url),
+        'file_url': Computed(('file',), _file_url),
+        'difficulty_level': 'difficulty_level',
+        'is_free': 'is_free',
+        'cost': Field('cost', resource.fields['cost'].to_representation),
+        'admin': Nested({
+            'id': 'admin__id',
+            'email': 'admin__email',
+            'first_name': 'admin__first_name',
+            'last_name': 'admin__last_name',
+            'role': 'admin__role',
+            'qualification': 'admin__qualification',
+            'interests': 'admin__interests',
+        }, null_path='admin__id'),
+        'order': 'order',
+        'is_active': 'is_active',
+        'created_at': Field('created_at', resource.fields['created_at'].to_representation),
+        'updated_at': Field('updated_at', resource.fields['updated_at'].to_representation),
+        'student_progress': student_progress,
+    }
+
+
+@cache
+def _admin_resources():
+    # Projections are built on first use because the field specs instantiate serializers.
+    # Non-student requests always get student_progress = None.
+    return Projection(resource_fields(Constant(None)))
+
+
+@cache
+def _student_resources():
+    return Projection(resource_fields(Computed(('id',), _student_progress)))
+
+
+@cache
+def _my_resources():
+    # Rows come from StudentResourceProgress, so the progress columns are the row's own
+    fields = prefixed(resource_fields(None), 'resource__')
+    fields['student_progress'] = Computed(PROGRESS_COLUMNS, _progress_columns)
+    fields['progress'] = Computed(PROGRESS_COLUMNS, _progress_columns)
+    return Projection(fields)
+
+
+def serialize_resources(queryset, request, student=None):
+    """
+    ``CareerResourceSerializer(queryset, many=True, context={'request': request}).data``
+    for a non-student request, or for ``student`` when given.
+    """
+    if student is None:
+        return _admin_resources().serialize(queryset, {'request': request})
+    progress = {
+        row[0]: _progress_columns(None, *row[1:])
+        for row in student.resource_progress.values_list('resource_id', *PROGRESS_COLUMNS)
+    }
+    return _student_resources().serialize(queryset, {'request': request, 'progress': progress})
+
+
+def serialize_my_resources(progress_queryset, request):
+    """
+    The ``StudentMyResourcesView`` payload: each resource plus a ``progress`` copy of its row.
+
+    Always the full shape; the view serializes ``?fields=`` requests itself.
+    """
+    return _my_resources().serialize(progress_queryset, {'request': request})
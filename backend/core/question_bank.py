@@ -0,0 +1,92 @@
+"""
+Question bank helpers: content-hash deduplication and template cloning.
+
+Instantiating a template runs a fixed number of queries regardless of how many
+questions it holds: one read of the template items, one aggregate for the
+current question order, one read of which weighted career tags still exist,
+and one ``bulk_create`` each for questions, options and option career weights.
+
+Bank entries store career tags by id, and tags can be deleted after an entry
+was banked; weights for tags that no longer exist are dropped when the
+template is applied.
+"""
+import hashlib
+import json
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import CareerTag, Option, OptionCareerWeight, Question, QuestionBank
+
+
+def normalize_options(options):
+    normalized = []
+    for index, option in enumerate(options):
+        weights = sorted(
+            (
+                {'tag': getattr(weight['tag'], 'pk', weight['tag']), 'weight': float(weight['weight'])}
+                for weight in option.get('career_weights', [])
+            ),
+            key=lambda weight: weight['tag'],
+        )
+        normalized.append({
+            'label': option['label'].strip(),
+            'description': option.get('description', '').strip(),
+            'order': option.get('order', index),
+            'career_weights': weights,
+        })
+    return sorted(normalized, key=lambda option: option['order'])
+
+
+def content_hash(prompt, options):
+    payload = json.dumps(
+        {'prompt': ' '.join(prompt.split()), 'options': options},
+        sort_keys=True,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def bank_question(prompt, options, admin=None):
+    """Return ``(entry, created)``, reusing an existing entry with the same content."""
+    options = normalize_options(options)
+    prompt = prompt.strip()
+    return QuestionBank.objects.get_or_create(
+        content_hash=content_hash(prompt, options),
+        defaults={'prompt': prompt, 'options': options, 'admin': admin},
+    )
+
+
+@transaction.atomic
+def instantiate_template(template, test):
+    """Append the template's questions to ``test`` and return the new questions."""
+    items = list(template.items.select_related('question').order_by('order'))
+    if not items:
+        return []
+    last_order = test.questions.aggregate(last=Max('order'))['last']
+    start = 0 if last_order is None else last_order + 1
+    questions = Question.objects.bulk_create([
+        Question(personalized_test=test, prompt=item.question.prompt, order=start + index)
+        for index, item in enumerate(items)
+    ])
+    options = []
+    option_weights = []
+    for question, item in zip(questions, items):
+        for option_data in item.question.options:
+            options.append(Option(
+                question=question,
+                label=option_data['label'],
+                description=option_data.get('description', ''),
+                order=option_data.get('order', 0),
+            ))
+            option_weights.append(option_data.get('career_weights', []))
+    Option.objects.bulk_create(options)
+    tag_ids = {weight['tag'] for weights in option_weights for weight in weights}
+    existing_tags = set(CareerTag.objects.filter(pk__in=tag_ids).values_list('pk', flat=True)) if tag_ids else set()
+    OptionCareerWeight.objects.bulk_create([
+        OptionCareerWeight(option=option, tag_id=weight['tag'], weight=weight['weight'])
+        for option, weights in zip(options, option_weights)
+        for weight in weights
+        if weight['tag'] in existing_tags
+    ])
+    return questions
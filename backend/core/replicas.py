@@ -0,0 +1,147 @@
+"""
+Read replicas for read-only views.
+
+Replica aliases come from ``SQLITE_REPLICAS`` / ``POSTGRES_REPLICAS`` (see
+``settings.DATABASES``). A view opts in with ``replica_reads = True``;
+``ReplicaMiddleware`` then picks one replica for the whole GET request, so
+all of its queries see the same copy, and ``ReplicaRouter`` sends the
+request's reads there. Writes, transactions, views without the attribute,
+background threads and management commands always use the primary.
+
+Read-your-writes: after any POST/PUT/PATCH/DELETE by a user, that user's
+requests stay on the primary for ``REPLICA_STICKY_SECONDS``, long enough for
+the replicas to catch up. The pin lives in the Django cache, so workers only
+see each other's pins when ``CACHES`` points at a shared backend. The user is
+read from the JWT without a query, before the view authenticates it.
+``sync_replicas`` simulates replication locally by copying the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as pins
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import registry
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+    if seconds > 0:
+        pins.set(_pin_key(user_id), True, timeout=seconds)
+
+
+def pinned_to_primary(user_id):
+    return pins.get(_pin_key(user_id), False)
+
+
+@cache
+def _authenticator():
+    return JWTAuthentication()  # Resolves the user model, so not at import time
+
+
+def token_user_id(request):
+    """The user id in a valid ``Authorization: Bearer`` token, or None; no database access."""
+    jwt = _authenticator()
+    header = jwt.get_header(request)
+    raw_token = jwt.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return jwt.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+def replica_for(request, view_class):
+    """The replica to serve ``request`` to ``view_class`` from, or None for the primary."""
+    replicas = replica_aliases()
+    if not replicas or request.method not in SAFE_METHODS or not getattr(view_class, 'replica_reads', False):
+        return None
+    user_id = token_user_id(request)
+    if user_id is not None and pinned_to_primary(user_id):
+        registry.inc('db_replica_pinned_requests_total', {})
+        return None
+    alias = random.choice(replicas)
+    registry.inc('db_replica_requests_total', {'alias': alias})
+    return alias
+
+
+@contextmanager
+def reading_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # Reads inside a transaction must see its writes
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Never the replica an instance happened to be read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by replication
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """Route ``replica_reads`` views to a replica, and pin writers to the primary for a while."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # The alias is set and reset around the rest of the chain in this one call: under ASGI
+        # every sync middleware hook runs in its own copy of the context, so a variable set in
+        # process_view could not be reset here.
+        with reading_from(self.replica_alias(request)):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_aliases():
+            user_id = token_user_id(request)
+            if user_id is not None:
+                pin_to_primary(user_id)
+        return response
+
+    def replica_alias(self, request):
+        if not replica_aliases() or request.method not in SAFE_METHODS:
+            return None
+        # The handler resolves the view only after the middleware chain has been entered
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return None
+        view_class = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+        return replica_for(request, view_class)
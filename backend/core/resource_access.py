@@ -0,0 +1,114 @@
+"""
+Per-student resource visibility index.
+
+A student can see every general resource (no ``career_recommendation``) and
+the resources linked to their own recommendations. ``StudentResourceAccess``
+holds one row per (student, linked resource) and one shared ``general`` row
+per general resource, so listing what a student may see is a plain join on
+that table, ``student = <id> OR general``, served by its (student, resource)
+unique index and the partial unique index on general rows, and access checks
+are a lookup on the same indexes instead of a join through
+recommendation -> test -> request on every call.
+
+Rows are kept current by the ``post_save`` receivers connected in
+``CoreConfig.ready``; deletes cascade. ``index_resources`` compares the rows a
+resource should have with those it has and writes only the difference, so
+saving a resource without moving it to another recommendation writes
+nothing. Code that writes resources with ``bulk_create`` or ``update()`` must
+call ``index_resources`` itself, or run ``rebuild_resource_access``
+afterwards.
+"""
+from django.db import models, transaction
+
+from .models import CareerRecommendation, CareerResource, StudentResourceAccess
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def _grants(resources):
+    """``(student_id, resource_id, general)`` for each row ``resources`` should have."""
+    grants = {(None, resource.id, True) for resource in resources if not resource.career_recommendation_id}
+    linked_ids = [resource.id for resource in resources if resource.career_recommendation_id]
+    if linked_ids:
+        grants.update(
+            (student_id, resource_id, False)
+            for student_id, resource_id in CareerResource.objects.filter(id__in=linked_ids).values_list(
+                'career_recommendation__personalized_test__request__student_id', 'id'
+            )
+        )
+    return grants
+
+
+@transaction.atomic
+def index_resources(resources):
+    resources = list(resources)
+    if not resources:
+        return
+    existing = {
+        (student_id, resource_id, general): pk
+        for pk, student_id, resource_id, general in StudentResourceAccess.objects.filter(
+            resource__in=[resource.id for resource in resources]
+        ).values_list('id', 'student_id', 'resource_id', 'general')
+    }
+    grants = _grants(resources)
+    stale = [pk for grant, pk in existing.items() if grant not in grants]
+    if stale:
+        StudentResourceAccess.objects.filter(pk__in=stale).delete()
+    StudentResourceAccess.objects.bulk_create([
+        StudentResourceAccess(student_id=student_id, resource_id=resource_id, general=general)
+        for student_id, resource_id, general in grants
+        if (student_id, resource_id, general) not in existing
+    ])
+
+
+def rebuild_index(batch_size=REBUILD_BATCH_SIZE):
+    """Recreate every row from scratch; returns the number of rows written."""
+    written = 0
+    with transaction.atomic():
+        StudentResourceAccess.objects.all().delete()
+        rows = CareerResource.objects.values_list(
+            'career_recommendation__personalized_test__request__student_id', 'id', 'career_recommendation_id'
+        ).order_by('id')
+        batch = []
+        for student_id, resource_id, recommendation_id in rows.iterator(chunk_size=batch_size):
+            batch.append(StudentResourceAccess(student_id=student_id, resource_id=resource_id, general=recommendation_id is None))
+            if len(batch) >= batch_size:
+                StudentResourceAccess.objects.bulk_create(batch, ignore_conflicts=True)
+                written += len(batch)
+                batch = []
+        StudentResourceAccess.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def visibility_filter(student):
+    # One filter() call over access_grants, so both branches share one inner join
+    return models.Q(access_grants__student=student) | models.Q(access_grants__general=True)
+
+
+def visible_resources(student):
+    return CareerResource.objects.filter(is_active=True).filter(visibility_filter(student))
+
+
+def can_access(student, resource):
+    if resource.career_recommendation_id is None:
+        return True
+    return StudentResourceAccess.objects.filter(student=student, resource_id=resource.id).exists()
+
+
+def resource_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_resources([instance])
+
+
+def recommendation_saved(sender, instance, created, raw=False, **kwargs):
+    # A new recommendation has no resources yet; only re-point existing ones
+    if not raw and not created:
+        index_resources(instance.resources.all())
+
+
+def connect_signals():
+    models.signals.post_save.connect(resource_saved, sender=CareerResource, dispatch_uid='resource_access_resource')
+    models.signals.post_save.connect(
+        recommendation_saved, sender=CareerRecommendation, dispatch_uid='resource_access_recommendation'
+    )
@@ -0,0 +1,99 @@
+"""
+Answer scoring: turns a student's chosen options into ranked career candidates.
+
+Every option can carry weights toward career tags (``OptionCareerWeight``).
+For a batch of tests we build a test x option answer matrix and an
+option x tag weight matrix and multiply them, so scoring a whole backlog of
+historical tests costs a handful of queries and one matrix product per chunk.
+"""
+import numpy as np
+from django.db import transaction
+
+from .answer_sheets import selected_options
+from .models import CareerScore, OptionCareerWeight, PersonalizedTest
+
+MAX_CANDIDATES = 5
+
+
+def compute_scores(test_ids):
+    """Return ``{test_id: [(tag_id, score), ...]}`` ranked best first."""
+    test_ids = list(test_ids)
+    if not test_ids:
+        return {}
+    answers = [
+        (test_id, option_id)
+        for test_id, selected in selected_options(test_ids).items()
+        for option_id in selected.values()
+    ]
+    results = {test_id: [] for test_id in test_ids}
+    if not answers:
+        return results
+    answer_tests, answer_options = np.array(answers, dtype=np.int64).T
+    weights = list(
+        OptionCareerWeight.objects.filter(option_id__in=set(answer_options.tolist()))
+        .values_list('option_id', 'tag_id', 'weight')
+    )
+    if not weights:
+        return results
+    weight_options = np.array([row[0] for row in weights], dtype=np.int64)
+    weight_tags = np.array([row[1] for row in weights], dtype=np.int64)
+    weight_values = np.array([row[2] for row in weights], dtype=np.float32)
+
+    test_index = {test_id: i for i, test_id in enumerate(test_ids)}
+    option_ids, option_rows = np.unique(np.concatenate([answer_options, weight_options]), return_inverse=True)
+    answer_option_rows = option_rows[:len(answer_options)]
+    weight_option_rows = option_rows[len(answer_options):]
+    tag_ids, weight_tag_cols = np.unique(weight_tags, return_inverse=True)
+
+    answered = np.zeros((len(test_ids), len(option_ids)), dtype=np.float32)
+    answer_test_rows = np.array([test_index[test_id] for test_id in answer_tests.tolist()], dtype=np.int64)
+    answered[answer_test_rows, answer_option_rows] = 1.0
+    option_weights = np.zeros((len(option_ids), len(tag_ids)), dtype=np.float32)
+    np.add.at(option_weights, (weight_option_rows, weight_tag_cols), weight_values)
+
+    scores = answered @ option_weights
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :MAX_CANDIDATES]
+    for test_id, row in test_index.items():
+        results[test_id] = [
+            (int(tag_ids[col]), float(scores[row, col]))
+            for col in order[row]
+            if scores[row, col] > 0
+        ]
+    return results
+
+
+def score_tests(test_ids, chunk_size=500):
+    """Compute and persist ``CareerScore`` rows, replacing any previous ranking."""
+    test_ids = list(test_ids)
+    scored = 0
+    for start in range(0, len(test_ids), chunk_size):
+        chunk = test_ids[start:start + chunk_size]
+        ranked = compute_scores(chunk)
+        with transaction.atomic():
+            CareerScore.objects.filter(personalized_test_id__in=chunk).delete()
+            CareerScore.objects.bulk_create([
+                CareerScore(personalized_test_id=test_id, tag_id=tag_id, score=score, rank=rank)
+                for test_id, candidates in ranked.items()
+                for rank, (tag_id, score) in enumerate(candidates, start=1)
+            ])
+        scored += len(chunk)
+    return scored
+
+
+def score_test(test):
+    score_tests([test.id])
+    return career_candidates(test)
+
+
+def career_candidates(test):
+    return [
+        {'tag_id': score.tag_id, 'tag': score.tag.name, 'score': round(score.score, 4), 'rank': score.rank}
+        for score in CareerScore.objects.filter(personalized_test=test).select_related('tag')
+    ]
+
+
+def completed_test_ids(only_unscored=False):
+    tests = PersonalizedTest.objects.filter(status=PersonalizedTest.Status.COMPLETED)
+    if only_unscored:
+        tests = tests.filter(career_scores__isnull=True)
+    return tests.order_by('id').values_list('id', flat=True)
@@ -1,24 +1,32 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import (
     CareerRecommendation,
     CareerResource,
+    CareerTag,
     Option,
+    OptionCareerWeight,
     PersonalizedTest,
     Question,
+    QuestionBank,
     ResourceCategory,
     RoadmapStep,
     StudentAnswer,
     StudentResourceProgress,
     TestRequest,
+    TestTemplate,
+    TestTemplateQuestion,
 )
+from .fieldsets import SparseFieldsetMixin
+from .question_bank import bank_question
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -62,7 +70,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
-class TestRequestSerializer(serializers.ModelSerializer):
+class TestRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     student = UserSerializer(read_only=True)
 
     class Meta:
@@ -77,6 +85,7 @@ class TestRequestSerializer(serializers.ModelSerializer):
             'updated_at',
         )
         read_only_fields = ('status', 'created_at', 'updated_at')
+        expandable_fields = ('student',)
 
 
 class TestRequestCreateSerializer(serializers.ModelSerializer):
@@ -85,24 +94,42 @@ class TestRequestCreateSerializer(serializers.ModelSerializer):
         fields = ('interests_snapshot', 'qualification_snapshot')
 
 
-class OptionSerializer(serializers.ModelSerializer):
+class OptionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Option
         fields = ('id', 'label', 'description', 'order')
 
 
+class CareerTagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CareerTag
+        fields = ('id', 'name', 'description', 'created_at')
+        read_only_fields = ('created_at',)
+
+
+class OptionCareerWeightSerializer(serializers.ModelSerializer):
+    tag = serializers.PrimaryKeyRelatedField(queryset=CareerTag.objects.all())
+
+    class Meta:
+        model = OptionCareerWeight
+        fields = ('tag', 'weight')
+
+
 class OptionCreateSerializer(serializers.ModelSerializer):
+    career_weights = OptionCareerWeightSerializer(many=True, required=False)
+
     class Meta:
         model = Option
-        fields = ('label', 'description', 'order')
+        fields = ('label', 'description', 'order', 'career_weights')
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     options = OptionSerializer(many=True)
 
     class Meta:
         model = Question
         fields = ('id', 'prompt', 'order', 'options')
+        expandable_fields = ('options',)
 
 
 class QuestionCreateSerializer(serializers.ModelSerializer):
@@ -116,17 +143,86 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
         options_data = validated_data.pop('options')
         question = Question.objects.create(**validated_data)
         for option_data in options_data:
-            Option.objects.create(question=question, **option_data)
+            weights_data = option_data.pop('career_weights', [])
+            option = Option.objects.create(question=question, **option_data)
+            for weight_data in weights_data:
+                OptionCareerWeight.objects.create(option=option, **weight_data)
         return question
 
 
-class PersonalizedTestSerializer(serializers.ModelSerializer):
+class PersonalizedTestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     request = TestRequestSerializer()
     questions = QuestionSerializer(many=True)
 
     class Meta:
         model = PersonalizedTest
         fields = ('id', 'request', 'status', 'assigned_at', 'completed_at', 'questions')
+        expandable_fields = ('request', 'questions')
+
+
+class BankOptionWeightSerializer(SparseFieldsetMixin, serializers.Serializer):
+    tag = serializers.IntegerField()
+    weight = serializers.FloatField()
+
+    def validate_tag(self, value):
+        if not CareerTag.objects.filter(pk=value).exists():
+            raise serializers.ValidationError("Unknown career tag.")
+        return value
+
+
+class BankOptionSerializer(SparseFieldsetMixin, serializers.Serializer):
+    label = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    order = serializers.IntegerField(min_value=0, required=False)
+    career_weights = BankOptionWeightSerializer(many=True, required=False)
+
+
+class QuestionBankSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    options = BankOptionSerializer(many=True)
+
+    class Meta:
+        model = QuestionBank
+        fields = ('id', 'prompt', 'options', 'content_hash', 'created_at')
+        read_only_fields = ('content_hash', 'created_at')
+
+    def create(self, validated_data):
+        entry, _ = bank_question(validated_data['prompt'], validated_data['options'], admin=validated_data.get('admin'))
+        return entry
+
+
+class TestTemplateQuestionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    question = QuestionBankSerializer(read_only=True)
+
+    class Meta:
+        model = TestTemplateQuestion
+        fields = ('order', 'question')
+        expandable_fields = ('question',)
+
+
+class TestTemplateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    items = TestTemplateQuestionSerializer(many=True, read_only=True)
+    questions = QuestionBankSerializer(many=True, write_only=True)
+
+    class Meta:
+        model = TestTemplate
+        fields = ('id', 'name', 'description', 'created_at', 'items', 'questions')
+        read_only_fields = ('created_at',)
+        expandable_fields = ('items',)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        questions_data = validated_data.pop('questions')
+        template = TestTemplate.objects.create(**validated_data)
+        admin = validated_data.get('admin')
+        TestTemplateQuestion.objects.bulk_create([
+            TestTemplateQuestion(
+                template=template,
+                question=bank_question(question_data['prompt'], question_data['options'], admin=admin)[0],
+                order=order,
+            )
+            for order, question_data in enumerate(questions_data)
+        ])
+        return template
 
 
 class StudentAnswerSerializer(serializers.ModelSerializer):
@@ -152,7 +248,7 @@ class StudentAnswerSerializer(serializers.ModelSerializer):
         return answer
 
 
-class RoadmapStepSerializer(serializers.ModelSerializer):
+class RoadmapStepSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = RoadmapStep
         fields = ('id', 'order', 'title', 'description')
@@ -164,17 +260,25 @@ class RoadmapStepCreateSerializer(serializers.ModelSerializer):
         fields = ('order', 'title', 'description')
 
 
-class CareerRecommendationSerializer(serializers.ModelSerializer):
+class CareerRecommendationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     steps = RoadmapStepSerializer(many=True)
     resources = serializers.SerializerMethodField()
 
     class Meta:
         model = CareerRecommendation
         fields = ('id', 'career_name', 'summary', 'created_at', 'steps', 'resources')
+        expandable_fields = ('steps',)
+        fieldset_sources = {'resources': ('resources',)}
 
     def get_resources(self, obj):
-        resources = obj.resources.filter(is_active=True).order_by('order', 'created_at')
-        return CareerResourceSerializer(resources, many=True, context=self.context).data
+        if 'resources' in getattr(obj, '_prefetched_objects_cache', {}):
+            resources = sorted(
+                (resource for resource in obj.resources.all() if resource.is_active),
+                key=lambda resource: (resource.order, resource.created_at),
+            )
+        else:
+            resources = obj.resources.filter(is_active=True).order_by('order', 'created_at')
+        return CareerResourceSerializer(resources, many=True, context=self.nested_context('resources')).data
 
 
 class CareerRecommendationCreateSerializer(serializers.ModelSerializer):
@@ -192,14 +296,14 @@ class CareerRecommendationCreateSerializer(serializers.ModelSerializer):
         return recommendation
 
 
-class ResourceCategorySerializer(serializers.ModelSerializer):
+class ResourceCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ResourceCategory
         fields = ('id', 'name', 'description', 'icon', 'created_at')
         read_only_fields = ('created_at',)
 
 
-class CareerResourceSerializer(serializers.ModelSerializer):
+class CareerResourceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = ResourceCategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=ResourceCategory.objects.all(),
@@ -236,6 +340,8 @@ class CareerResourceSerializer(serializers.ModelSerializer):
             'student_progress',
         )
         read_only_fields = ('admin', 'created_at', 'updated_at')
+        expandable_fields = ('category', 'admin')
+        fieldset_sources = {'file_url': ('file',), 'student_progress': ('student_progress',)}
 
     def get_file_url(self, obj):
         if obj.file:
@@ -249,7 +355,13 @@ class CareerResourceSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.role == User.Roles.STUDENT:
             try:
-                progress = obj.student_progress.get(student=request.user)
+                if 'student_progress' in getattr(obj, '_prefetched_objects_cache', {}):
+                    # Views prefetch only the requesting student's rows
+                    progress = next(
+                        row for row in obj.student_progress.all() if row.student_id == request.user.id
+                    )
+                else:
+                    progress = obj.student_progress.get(student=request.user)
                 return {
                     'status': progress.status,
                     'is_favorite': progress.is_favorite,
@@ -257,7 +369,7 @@ class CareerResourceSerializer(serializers.ModelSerializer):
                     'started_at': progress.started_at,
                     'completed_at': progress.completed_at,
                 }
-            except StudentResourceProgress.DoesNotExist:
+            except (StudentResourceProgress.DoesNotExist, StopIteration):
                 return None
         return None
 
@@ -285,7 +397,7 @@ class CareerResourceCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class StudentResourceProgressSerializer(serializers.ModelSerializer):
+class StudentResourceProgressSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     resource = CareerResourceSerializer(read_only=True)
     resource_id = serializers.PrimaryKeyRelatedField(
         queryset=CareerResource.objects.all(),
@@ -307,6 +419,7 @@ class StudentResourceProgressSerializer(serializers.ModelSerializer):
             'updated_at',
         )
         read_only_fields = ('started_at', 'completed_at', 'updated_at')
+        expandable_fields = ('resource',)
 
     def create(self, validated_data):
         student = self.context['request'].user
@@ -0,0 +1,238 @@
+"""
+Nearest-neighbour index over past tests that already have a recommendation.
+
+Each test is turned into a hashed bag-of-words vector built from the request's
+qualification/interests snapshots and the labels of the options the student
+picked. Vectors are L2-normalised so a single matrix-vector product gives the
+cosine similarity against every indexed test.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+from django.db import models, transaction
+
+from .answer_sheets import selected_options
+from .models import CareerRecommendation, Option
+
+VECTOR_DIM = 1024
+TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+
+# Field namespaces keep "python" in interests apart from "python" in an option label
+FIELD_WEIGHTS = {
+    'qualification': 1.0,
+    'interests': 1.5,
+    'option': 1.0,
+}
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if len(token) > 1]
+
+
+def build_vector(qualification, interests, option_labels):
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    fields = (
+        ('qualification', [qualification]),
+        ('interests', [interests]),
+        ('option', option_labels),
+    )
+    for field, texts in fields:
+        weight = FIELD_WEIGHTS[field]
+        for text in texts:
+            for token in tokenize(text):
+                bucket = zlib.crc32(f'{field}:{token}'.encode()) % VECTOR_DIM
+                vector[bucket] += weight
+    np.log1p(vector, out=vector)
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+def option_labels_by_test(test_ids):
+    selected = selected_options(test_ids)
+    # Filter by test rather than by option id to keep the IN list short
+    option_labels = dict(
+        Option.objects.filter(question__personalized_test_id__in=test_ids).values_list('id', 'label')
+    )
+    return {
+        test_id: [option_labels[option_id] for option_id in options.values()]
+        for test_id, options in selected.items()
+    }
+
+
+def vector_for_test(test):
+    labels = option_labels_by_test([test.id])[test.id]
+    return build_vector(test.request.qualification_snapshot, test.request.interests_snapshot, labels)
+
+
+class RecommendationIndex:
+    """
+    Process-local index of recommendation vectors.
+
+    The index is loaded lazily and then kept current by pulling only the
+    recommendations created since the last sync. Each sync first compares the
+    table's ``(count, max id, sum of ids)`` with what is indexed: a row that
+    committed after a higher id was already pulled, or a delete made by another
+    worker, leaves them apart after the incremental pull and triggers a full
+    rebuild. Deletes and edits made in this process are applied straight away
+    by the receivers in ``connect_signals``.
+    """
+
+    def __init__(self, dim=VECTOR_DIM):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._recommendation_ids = np.zeros(0, dtype=np.int64)
+        self._test_ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._last_recommendation_id = 0
+        self._id_sum = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 64)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        recommendation_ids = np.zeros(capacity, dtype=np.int64)
+        recommendation_ids[:self._size] = self._recommendation_ids[:self._size]
+        test_ids = np.zeros(capacity, dtype=np.int64)
+        test_ids[:self._size] = self._test_ids[:self._size]
+        self._matrix, self._recommendation_ids, self._test_ids = matrix, recommendation_ids, test_ids
+
+    def add(self, recommendation_id, test_id, vector):
+        with self._lock:
+            self._add(recommendation_id, test_id, vector)
+
+    def _add(self, recommendation_id, test_id, vector):
+        self._reserve(1)
+        self._matrix[self._size] = vector
+        self._recommendation_ids[self._size] = recommendation_id
+        self._test_ids[self._size] = test_id
+        self._size += 1
+        self._last_recommendation_id = max(self._last_recommendation_id, recommendation_id)
+        self._id_sum += int(recommendation_id)
+
+    def _discard(self, recommendation_ids):
+        positions = np.flatnonzero(np.isin(self._recommendation_ids[:self._size], list(recommendation_ids)))
+        # Fill each hole with the current last row, highest position first
+        for position in positions[::-1]:
+            last = self._size - 1
+            self._id_sum -= int(self._recommendation_ids[position])
+            self._matrix[position] = self._matrix[last]
+            self._recommendation_ids[position] = self._recommendation_ids[last]
+            self._test_ids[position] = self._test_ids[last]
+            self._size = last
+        if len(positions):
+            self._last_recommendation_id = int(self._recommendation_ids[:self._size].max(initial=0))
+        return len(positions)
+
+    def discard(self, recommendation_ids):
+        """Drop recommendations from the index; unknown ids are ignored."""
+        with self._lock:
+            return self._discard(recommendation_ids)
+
+    def _load(self, queryset, batch_size=2000):
+        last_id = 0
+        while True:
+            rows = list(
+                queryset.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list(
+                    'id',
+                    'personalized_test_id',
+                    'personalized_test__request__qualification_snapshot',
+                    'personalized_test__request__interests_snapshot',
+                )[:batch_size]
+            )
+            if not rows:
+                return
+            labels = option_labels_by_test([row[1] for row in rows])
+            for recommendation_id, test_id, qualification, interests in rows:
+                self._add(recommendation_id, test_id, build_vector(qualification, interests, labels[test_id]))
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def _reset(self):
+        self._size = 0
+        self._last_recommendation_id = 0
+        self._id_sum = 0
+
+    def sync(self, batch_size=2000):
+        """Bring the index in line with the table, rebuilding it when the counts disagree."""
+        with self._lock:
+            stats = CareerRecommendation.objects.aggregate(
+                count=models.Count('id'), max_id=models.Max('id'), id_sum=models.Sum('id')
+            )
+            count, max_id, id_sum = stats['count'], stats['max_id'] or 0, stats['id_sum'] or 0
+            if (count, max_id, id_sum) == (self._size, self._last_recommendation_id, self._id_sum):
+                return
+            if max_id > self._last_recommendation_id:
+                self._load(
+                    CareerRecommendation.objects.filter(
+                        id__gt=self._last_recommendation_id, id__lte=max_id
+                    ),
+                    batch_size,
+                )
+            if (count, max_id, id_sum) != (self._size, self._last_recommendation_id, self._id_sum):
+                self._reset()
+                self._load(CareerRecommendation.objects.filter(id__lte=max_id), batch_size)
+
+    def refresh(self, recommendation_id):
+        """Re-read an indexed recommendation whose test may have changed."""
+        with self._lock:
+            if self._discard([recommendation_id]):
+                self._load(CareerRecommendation.objects.filter(id=recommendation_id))
+
+    def search(self, vector, k=5, exclude_test_id=None):
+        """Return ``(recommendation_id, score)`` pairs, best match first."""
+        with self._lock:
+            if not self._size:
+                return []
+            scores = self._matrix[:self._size] @ vector
+            if exclude_test_id is not None:
+                scores[self._test_ids[:self._size] == exclude_test_id] = -np.inf
+            # Excluded rows must not take a slot, or the caller gets fewer than k
+            k = min(k, int(np.isfinite(scores).sum()))
+            if not k:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._recommendation_ids[i]), float(scores[i])) for i in top]
+
+
+recommendation_index = RecommendationIndex()
+
+
+def similar_recommendations(test, k=5):
+    recommendation_index.sync()
+    return recommendation_index.search(vector_for_test(test), k=k, exclude_test_id=test.id)
+
+
+def recommendation_saved(sender, instance, created, raw=False, **kwargs):
+    # New rows are picked up by the next sync; an edit may have re-pointed the test
+    if not raw and not created:
+        transaction.on_commit(lambda: recommendation_index.refresh(instance.id))
+
+
+def recommendation_deleted(sender, instance, **kwargs):
+    recommendation_id = instance.id
+    transaction.on_commit(lambda: recommendation_index.discard([recommendation_id]))
+
+
+def connect_signals():
+    models.signals.post_save.connect(
+        recommendation_saved, sender=CareerRecommendation, dispatch_uid='similarity_recommendation'
+    )
+    models.signals.post_delete.connect(
+        recommendation_deleted, sender=CareerRecommendation, dispatch_uid='similarity_recommendation_deleted'
+    )
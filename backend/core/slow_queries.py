@@ -0,0 +1,145 @@
+"""
+Slow query log.
+
+``SlowQueryLogMiddleware`` wraps every query issued while serving a request.
+Queries slower than ``SLOW_QUERY_THRESHOLD_MS`` are handed to a background
+thread, which stores them in the ``SlowQuery`` ring buffer and, for a sample
+of SELECTs, runs ``EXPLAIN`` (``EXPLAIN QUERY PLAN`` on SQLite) with the
+original parameters. The request thread never waits on either.
+"""
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query-log')
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def project_frames(limit=8):
+    """
+    Innermost application frames that led to the query.
+
+    The stack is cut where it enters ``django.db`` so the execute wrappers
+    (query budget, profiler, this log) never show up as the call site.
+    """
+    root = str(Path(settings.BASE_DIR).resolve())
+    stack = traceback.extract_stack()
+    for index, frame in enumerate(stack):
+        if f'{os.sep}django{os.sep}db{os.sep}' in frame.filename:
+            stack = stack[:index]
+            break
+    frames = [
+        frame for frame in stack
+        if frame.filename.startswith(root) and 'site-packages' not in frame.filename
+    ]
+    return frames[-limit:]
+
+
+def store_slow_query(entry, params, explain):
+    from .models import SlowQuery
+
+    try:
+        plan = ''
+        if explain:
+            connection = connections[entry['database']]
+            prefix = connection.ops.explain_query_prefix()
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {entry['raw_sql']}", params)
+                plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+        record = SlowQuery.objects.create(
+            fingerprint=entry['fingerprint'],
+            sql=entry['sql'],
+            duration_ms=entry['duration_ms'],
+            database=entry['database'],
+            view=entry['view'],
+            call_site=entry['call_site'],
+            stack=entry['stack'],
+            plan=plan,
+        )
+        capacity = getattr(settings, 'SLOW_QUERY_LOG_SIZE', 1000)
+        if record.id > capacity and record.id % 50 == 0:
+            SlowQuery.objects.filter(id__lte=record.id - capacity).delete()
+    except Exception:
+        logger.exception("Could not record slow query")
+    finally:
+        connections.close_all()
+
+
+class SlowQueryRecorder:
+    def __init__(self, alias, request):
+        self.alias = alias
+        self.request = request
+        self.threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200) / 1000
+        self.sample_rate = getattr(settings, 'SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                self.record(sql, params, many, elapsed)
+
+    def record(self, sql, params, many, elapsed):
+        normalized = normalize_sql(sql)
+        frames = project_frames()
+        match = getattr(self.request, 'resolver_match', None)
+        entry = {
+            'fingerprint': fingerprint(normalized),
+            'sql': normalized,
+            'raw_sql': sql,
+            'duration_ms': round(elapsed * 1000, 3),
+            'database': self.alias,
+            'view': (match.view_name if match else self.request.path)[:255],
+            'call_site': (f'{frames[-1].filename}:{frames[-1].lineno} in {frames[-1].name}' if frames else '')[:500],
+            'stack': ''.join(traceback.format_list(frames)),
+        }
+        explain = (
+            not many
+            and sql.lstrip().upper().startswith('SELECT')
+            and random.random() < self.sample_rate
+        )
+        _executor.submit(store_slow_query, entry, params if explain else None, explain)
+
+
+class SlowQueryLogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'SLOW_QUERY_LOG', False):
+            return self.get_response(request)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(SlowQueryRecorder(alias, request)))
+            return self.get_response(request)
+
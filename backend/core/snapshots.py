@@ -0,0 +1,137 @@
+"""
+Frozen test snapshots.
+
+When a test is assigned its questions and options stop changing, so
+``freeze_test`` serializes them once into a ``TestSnapshot``. The JSON is
+stored in the row, and a copy named after the content hash is written to
+``MEDIA_ROOT/snapshots/``. ``StudentTestDetailView`` serves the snapshot
+with the student's selected options merged in, instead of re-querying and
+re-assembling the test on every open. Bump ``SNAPSHOT_VERSION`` when the
+payload shape changes; older snapshots are rebuilt on their next read.
+"""
+import hashlib
+import json
+import threading
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .models import TestSnapshot
+
+SNAPSHOT_VERSION = 1
+PARSED_CACHE_SIZE = 512
+SNAPSHOT_DIR = 'snapshots/'
+
+_parsed_cache = {}
+_parsed_lock = threading.Lock()
+
+
+def snapshot_payload(test, questions=None):
+    """
+    The frozen form of ``test``. ``questions`` maps its already loaded questions
+    to their options, in place of querying them.
+    """
+    if questions is None:
+        questions = {question: question.options.all() for question in test.questions.prefetch_related('options')}
+    payload_questions = [
+        {
+            'id': question.id,
+            'prompt': question.prompt,
+            'order': question.order,
+            'options': [
+                {
+                    'id': option.id,
+                    'label': option.label,
+                    'description': option.description,
+                    'order': option.order,
+                }
+                for option in options
+            ],
+        }
+        for question, options in questions.items()
+    ]
+    return {
+        'version': SNAPSHOT_VERSION,
+        'id': test.id,
+        'request_id': test.request_id,
+        'questions': sorted(payload_questions, key=lambda question: question['order']),
+    }
+
+
+def _encode(payload):
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return text, hashlib.sha256(text.encode()).hexdigest()
+
+
+def _fill(snapshot, text, content_hash):
+    snapshot.version = SNAPSHOT_VERSION
+    snapshot.content_hash = content_hash
+    snapshot.payload = text
+    name = f'{SNAPSHOT_DIR}test-{snapshot.test_id}-v{SNAPSHOT_VERSION}-{content_hash[:16]}.json'
+    storage = snapshot.file.storage
+    # The name is content-addressed, so an existing file already holds this payload
+    snapshot.file.name = name if storage.exists(name) else storage.save(name, ContentFile(text.encode()))
+    return snapshot
+
+
+def unsaved_snapshot(test, questions):
+    """A ``TestSnapshot`` of ``test`` for ``bulk_create``, its file already written; see ``snapshot_payload``."""
+    return _fill(TestSnapshot(test=test), *_encode(snapshot_payload(test, questions)))
+
+
+@transaction.atomic(savepoint=False)
+def freeze_test(test):
+    """Create or refresh the snapshot of ``test``; a no-op when nothing changed."""
+    text, content_hash = _encode(snapshot_payload(test))
+    snapshot = getattr(test, 'snapshot', None)  # RelatedObjectDoesNotExist is an AttributeError
+    if snapshot is not None and snapshot.content_hash == content_hash:
+        return snapshot
+    if snapshot is None:
+        snapshot = TestSnapshot(test=test)
+    _fill(snapshot, text, content_hash).save()
+    test.snapshot = snapshot
+    return snapshot
+
+
+def current_snapshot(test):
+    """``test``'s snapshot (select_related it), frozen now if it predates snapshots."""
+    snapshot = getattr(test, 'snapshot', None)
+    if snapshot is None or snapshot.version != SNAPSHOT_VERSION:
+        snapshot = freeze_test(test)
+    return snapshot
+
+
+def parsed_snapshot(snapshot):
+    """The decoded payload, shared between requests; callers must not mutate it."""
+    parsed = _parsed_cache.get(snapshot.content_hash)
+    if parsed is None:
+        parsed = json.loads(snapshot.payload)
+        with _parsed_lock:
+            if len(_parsed_cache) >= PARSED_CACHE_SIZE:
+                _parsed_cache.clear()
+            _parsed_cache[snapshot.content_hash] = parsed
+    return parsed
+
+
+def snapshot_etag(snapshot, selected_options):
+    answers = ','.join(f'{question}:{option}' for question, option in sorted(selected_options.items()))
+    digest = hashlib.sha256(f'{snapshot.content_hash}|{answers}'.encode()).hexdigest()
+    return f'"{digest[:40]}"'
+
+
+def test_detail(snapshot, selected_options):
+    """The ``StudentTestDetailView`` body for ``snapshot`` and the student's answers."""
+    parsed = parsed_snapshot(snapshot)
+    questions = [
+        dict(question, selected_option_id=selected_options.get(question['id']))
+        for question in parsed['questions']
+    ]
+    return {
+        'test': {
+            'id': parsed['id'],
+            'request_id': parsed['request_id'],
+            'questions': questions,
+            'total_questions': len(questions),
+            'answered_count': len(selected_options),
+        }
+    }
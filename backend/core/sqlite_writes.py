@@ -0,0 +1,88 @@
+"""
+Write serialization for SQLite.
+
+SQLite has one writer at a time. A transaction that starts by reading and
+then writes has to upgrade its lock, and when another connection committed
+in between that upgrade fails at once with "database is locked", without
+waiting for ``busy_timeout``. With ``SQLITE_SERIALIZE_WRITES`` the
+connection's ``transaction_mode`` is ``IMMEDIATE`` (see
+``settings.DATABASES``), so every transaction takes the write lock at
+``BEGIN`` and queues behind the current writer instead.
+
+``SerializedWriteMiddleware`` runs the view of every POST/PUT/PATCH/DELETE
+request in one such transaction and, when the lock still could not be had
+within ``busy_timeout``, retries the view with jittered exponential backoff
+up to ``SQLITE_WRITE_RETRIES`` times. Views that write nothing, or that only
+hold the lock for slow non-database work, opt out with ``serialize_writes =
+False``. Nothing changes on other databases. ``benchmark_sqlite_writes``
+stresses the write views from many threads with and without the tuning.
+"""
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from .metrics import registry
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+MAX_BACKOFF_SECONDS = 1.0
+
+
+def serialize_writes_enabled(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite' and getattr(settings, 'SQLITE_SERIALIZE_WRITES', False)
+
+
+def is_locked(exc):
+    # "database is locked" or "database table is locked"; other OperationalErrors are real failures
+    return 'locked' in str(exc)
+
+
+def backoff(attempt):
+    base = getattr(settings, 'SQLITE_WRITE_BACKOFF_MS', 20) / 1000
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, base * 2 ** attempt))
+
+
+def run_serialized(func, using=DEFAULT_DB_ALIAS, retries=None):
+    """Call ``func()`` in one transaction, retrying while SQLite reports the database locked."""
+    if connections[using].in_atomic_block:
+        # The enclosing transaction is what failed; only its owner can retry it
+        return func()
+    if retries is None:
+        retries = getattr(settings, 'SQLITE_WRITE_RETRIES', 5)
+    for attempt in range(retries + 1):
+        try:
+            with transaction.atomic(using=using):
+                return func()
+        except OperationalError as exc:
+            if attempt == retries or not is_locked(exc):
+                raise
+        registry.inc('sqlite_write_retries_total', {})
+        time.sleep(backoff(attempt))
+
+
+class SerializedWriteMiddleware:
+    """Run unsafe-method views in one ``BEGIN IMMEDIATE`` transaction, retried on lock timeouts."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Must be the last middleware: returning a response skips the process_view of later ones
+        if request.method in SAFE_METHODS or not serialize_writes_enabled():
+            return None
+        if iscoroutinefunction(view_func):
+            return None  # Async views are awaited by the handler; they cannot be run inside a sync transaction
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        if not getattr(view_class, 'serialize_writes', True):
+            return None
+        retries = None
+        if request.content_type.startswith('multipart/'):
+            retries = 0  # Uploads are streamed rather than buffered, so they cannot be replayed
+        else:
+            request.body  # Buffer the body so a retried view can parse it again
+        return run_serialized(lambda: view_func(request, *view_args, **view_kwargs), retries=retries)
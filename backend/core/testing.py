@@ -0,0 +1,66 @@
+"""
+Test helpers for pinning per-view query budgets.
+
+Typical use in a ``TestCase``::
+
+    class StudentTestListTests(QueryBudgetAssertionsMixin, APITestCase):
+        def test_query_budget(self):
+            self.client.force_authenticate(self.student)
+            response = self.client.get(reverse('student-test-list'))
+            self.assertWithinQueryBudget(response)
+
+Tests that assign or submit tests add ``TemporaryMediaMixin`` so the snapshot
+files they freeze go to a throwaway ``MEDIA_ROOT``.
+"""
+from tempfile import TemporaryDirectory
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .middleware import query_budget_for
+
+
+class QueryBudgetAssertionsMixin:
+    def assertWithinQueryBudget(self, response, budget=None):
+        """
+        Assert the request behind ``response`` stayed within ``budget`` queries.
+
+        Without an explicit ``budget`` the view's declared ``query_budget`` is
+        used, so the test fails if a view loses its budget declaration.
+        """
+        if budget is None:
+            view_class = response.resolver_match.func.view_class
+            budget = query_budget_for(view_class, response.wsgi_request.method)
+            self.assertIsNotNone(budget, f"{view_class.__name__} declares no query_budget")
+        count = int(response['X-DB-Query-Count'])
+        self.assertLessEqual(count, budget, f"{count} queries, budget is {budget}")
+
+    def assertConstantQueries(self, make_request, grow):
+        """
+        Assert that the query count of ``make_request()`` does not change after ``grow()``.
+
+        ``grow`` should add more rows of whatever the view iterates over; an N+1
+        pattern shows up as a higher count on the second request.
+        """
+        with CaptureQueriesContext(connection) as before:
+            make_request()
+        grow()
+        with CaptureQueriesContext(connection) as after:
+            make_request()
+        self.assertEqual(
+            len(before.captured_queries),
+            len(after.captured_queries),
+            "query count grows with the data size",
+        )
+
+
+class TemporaryMediaMixin:
+    """Point ``MEDIA_ROOT`` at a temporary directory for the class, ``setUpTestData`` included."""
+
+    @classmethod
+    def setUpClass(cls):
+        media = TemporaryDirectory()
+        cls.addClassCleanup(media.cleanup)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media.name))
+        super().setUpClass()
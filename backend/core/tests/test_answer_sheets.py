@@ -0,0 +1,95 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import answer_sheets
+from core.answer_sheets import layout, pack, pack_answer_sheet, pack_completed_tests, selected_options, unpack
+from core.models import AnswerSheet, Option, PersonalizedTest, Question, StudentAnswer, TestRequest, User
+from core.testing import TemporaryMediaMixin
+from core.transitions import assign_test, complete_test, create_test
+
+
+class PackTests(SimpleTestCase):
+    sheet_layout = (
+        (1, (10, 11)),
+        (2, tuple(range(100, 400))),  # More options than fit in a byte
+        (3, (7,)),
+    )
+
+    def test_round_trip(self):
+        selected = {1: 11, 2: 399}
+        packed = pack(self.sheet_layout, selected)
+        # One little-endian uint16 per question: 1 + the option's position, 0 when unanswered
+        self.assertEqual(packed, (2).to_bytes(2, 'little') + (300).to_bytes(2, 'little') + bytes(2))
+        self.assertEqual(unpack(self.sheet_layout, packed), selected)
+        self.assertEqual(unpack(self.sheet_layout, memoryview(packed)), selected)
+
+    def test_unknown_options_pack_as_unanswered(self):
+        packed = pack(self.sheet_layout, {1: 99, 3: 7, 42: 10})
+        self.assertEqual(unpack(self.sheet_layout, packed), {3: 7})
+
+
+class AnswerSheetTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+
+    def answered_test(self, answers=(0, 1, None)):
+        """A completed test whose question ``i`` has option ``answers[i]`` picked; returns it and the picks."""
+        test = create_test(TestRequest.objects.create(student=self.student, interests_snapshot='sheets'), self.admin)
+        picked = {}
+        # Created out of order, so packing has to follow (order, id) rather than ids
+        for order in reversed(range(len(answers))):
+            question = Question.objects.create(personalized_test=test, prompt=f'Question {order}?', order=order)
+            options = [
+                Option.objects.create(question=question, label=label, order=index)
+                for index, label in enumerate(('Yes', 'No', 'Maybe'))
+            ]
+            if answers[order] is not None:
+                StudentAnswer.objects.create(question=question, option=options[answers[order]], student=self.student)
+                picked[question.id] = options[answers[order]].id
+        assign_test(test)
+        complete_test(test)
+        return PersonalizedTest.objects.select_related('request', 'snapshot').get(pk=test.pk), picked
+
+    def rows(self, test):
+        return StudentAnswer.objects.filter(question__personalized_test=test)
+
+    def test_pack_answer_sheet(self):
+        test, picked = self.answered_test()
+        sheet = pack_answer_sheet(test)
+        self.assertEqual(sheet.answered_count, 2)
+        self.assertEqual(bytes(sheet.selections), b'\x01\x00\x02\x00\x00\x00')
+        self.assertEqual(unpack(layout(test.snapshot), sheet.selections), picked)
+        self.assertFalse(self.rows(test).exists())
+
+    @override_settings(ANSWER_SHEET_KEEP_ROWS=True)
+    def test_keep_rows(self):
+        test, picked = self.answered_test()
+        pack_answer_sheet(test)
+        self.assertEqual(dict(self.rows(test).values_list('question_id', 'option_id')), picked)
+        # The sheet is still the read path
+        StudentAnswer.objects.filter(question__personalized_test=test).delete()
+        self.assertEqual(selected_options([test.id]), {test.id: picked})
+
+    def test_selected_options_falls_back_to_rows(self):
+        packed, packed_picks = self.answered_test()
+        pack_answer_sheet(packed)
+        # Completed before answer sheets existed, not yet packed by pack_answer_sheets
+        unpacked, unpacked_picks = self.answered_test(answers=(2, None, 0))
+        blank, _ = self.answered_test(answers=(None,))
+        with self.assertNumQueries(2):
+            result = selected_options([packed.id, unpacked.id, blank.id])
+        self.assertEqual(result, {packed.id: packed_picks, unpacked.id: unpacked_picks, blank.id: {}})
+        unpacked = PersonalizedTest.objects.select_related('snapshot').get(pk=unpacked.pk)
+        self.assertEqual(answer_sheets.test_selected_options(unpacked), unpacked_picks)
+        packed = PersonalizedTest.objects.select_related('snapshot', 'answer_sheet').get(pk=packed.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(answer_sheets.test_selected_options(packed), packed_picks)
+
+    def test_pack_completed_tests(self):
+        tests = [self.answered_test()[0] for _ in range(3)]
+        pack_answer_sheet(tests[0])
+        completed = PersonalizedTest.objects.filter(status=PersonalizedTest.Status.COMPLETED)
+        self.assertEqual(pack_completed_tests(completed, batch_size=1), 2)
+        self.assertEqual(AnswerSheet.objects.count(), 3)
+        self.assertFalse(StudentAnswer.objects.exists())
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import autosave
+from core.metrics import registry
+from core.models import AnswerSheet, Option, Question, StudentAnswer, TestRequest, User
+from core.testing import TemporaryMediaMixin
+from core.transitions import assign_test, create_test
+
+from .test_query_budgets import client_for
+from .test_transitions import add_question
+
+
+class SubmitDuringFlushTests(TemporaryMediaMixin, TransactionTestCase):
+    """Submitting while the background flush holds the buffer must not deadlock on SQLite's write lock."""
+
+    def setUp(self):
+        self.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        self.test = create_test(TestRequest.objects.create(student=self.student, interests_snapshot='flush'), admin)
+        add_question(self.test)
+        assign_test(self.test)
+        journals = TemporaryDirectory()
+        self.addCleanup(journals.cleanup)
+        self.enterContext(override_settings(AUTOSAVE_JOURNAL_DIR=journals.name))
+
+    def test_submit_waits_for_the_flush_in_flight(self):
+        question = self.test.questions.get()
+        batch = {(self.test.id, self.student.id, question.id): (time.time_ns(), question.options.get().id)}
+        holding, outcome = threading.Event(), []
+
+        def background_flush():
+            # The flush thread's steps: take the flush lock, then write the batch holding the only answer
+            try:
+                with autosave.buffer._flush_lock:
+                    holding.set()
+                    time.sleep(0.3)  # Until the submit request is waiting for this flush
+                    outcome.append(autosave.write_answers(batch))
+            except Exception as exc:
+                outcome.append(exc)
+            finally:
+                connection.close()
+
+        flusher = threading.Thread(target=background_flush)
+        flusher.start()
+        holding.wait()
+        started = time.monotonic()
+        response = client_for(self.student).post(reverse('student-submit-test', args=[self.test.id]))
+        elapsed = time.monotonic() - started
+        flusher.join()
+
+        self.assertEqual(outcome, [1])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(AnswerSheet.objects.get(test=self.test).answered_count, 1)
+        self.assertLess(elapsed, 2, "the submit waited out busy_timeout")
+
+
+class AnswerBufferTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        cls.test = create_test(TestRequest.objects.create(student=cls.student, interests_snapshot='buffer'), cls.admin)
+        cls.options = {}
+        for order in range(2):
+            question = Question.objects.create(personalized_test=cls.test, prompt=f'Question {order}?', order=order)
+            cls.options[question.id] = [
+                Option.objects.create(question=question, label=label, order=index).id
+                for index, label in enumerate(('Yes', 'No'))
+            ]
+        assign_test(cls.test)
+
+    def setUp(self):
+        journals = TemporaryDirectory()
+        self.addCleanup(journals.cleanup)
+        self.directory = Path(journals.name)
+        self.enterContext(override_settings(AUTOSAVE_JOURNAL_DIR=journals.name))
+
+    def write_journal(self, name, *entries):
+        with open(self.directory / name, 'w') as journal:
+            for stamp, question_id, option_index in entries:
+                option_id = self.options[question_id][option_index]
+                journal.write(json.dumps([stamp, self.test.id, self.student.id, question_id, option_id]) + '\n')
+
+    def answers(self):
+        return dict(StudentAnswer.objects.filter(student=self.student).values_list('question_id', 'option_id'))
+
+    def buffer(self):
+        buffer = autosave.AnswerBuffer(background=False)
+        self.addCleanup(lambda: buffer._journal and buffer._journal.close())
+        return buffer
+
+    def test_recover_orphaned_journals(self):
+        first, second = self.options
+        # A worker that died mid-flush: its active journal and the batch it was writing
+        self.write_journal('answers-99999.jsonl', (3, first, 1), (1, second, 0))
+        self.write_journal('answers-99999.0.flushing', (2, first, 0))
+        self.assertEqual(autosave.recover_orphaned_journals(self.directory), 2)
+        self.assertEqual(self.answers(), {first: self.options[first][1], second: self.options[second][0]})
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_recover_skips_live_journals(self):
+        first, _ = self.options
+        self.write_journal('answers-99999.jsonl', (1, first, 0))
+        # Its worker still holds the flock
+        live = self.buffer()._open_journal(self.directory / 'answers-99999.jsonl')
+        self.addCleanup(live.close)
+        self.assertEqual(autosave.recover_orphaned_journals(self.directory), 0)
+        self.assertEqual(self.answers(), {})
+        self.assertTrue((self.directory / 'answers-99999.jsonl').exists())
+
+    def test_flush_attempt_merges_every_worker(self):
+        first, second = self.options
+        buffer = self.buffer()
+        buffer.record(self.test.id, self.student.id, first, self.options[first][0])
+        buffer.record(self.test.id, self.student.id, second, self.options[second][0])
+        # Another worker took a later click on the first question and an earlier one on the second
+        now = time.time_ns()
+        self.write_journal('answers-99999.jsonl', (now + 10**9, first, 1), (now - 10**9, second, 1))
+        self.assertEqual(buffer.pending(self.test.id, self.student.id), {
+            first: self.options[first][1], second: self.options[second][0],
+        })
+        self.assertEqual(buffer.flush_attempt(self.test.id, self.student.id), 2)
+        self.assertEqual(self.answers(), {first: self.options[first][1], second: self.options[second][0]})
+        self.assertEqual(buffer._pending, {})
+
+    def test_answers_to_tests_no_longer_assigned_are_dropped(self):
+        draft = create_test(TestRequest.objects.create(student=self.student, interests_snapshot='draft'), self.admin)
+        draft_question = Question.objects.create(personalized_test=draft, prompt='Draft?', order=0)
+        draft_option = Option.objects.create(question=draft_question, label='Yes', order=0)
+        first, _ = self.options
+        written = autosave.write_answers({
+            (self.test.id, self.student.id, first): (1, self.options[first][0]),
+            (draft.id, self.student.id, draft_question.id): (1, draft_option.id),
+        })
+        self.assertEqual(written, 1)
+        self.assertEqual(self.answers(), {first: self.options[first][0]})
+
+    def test_failed_flush_on_exit_is_logged_and_counted(self):
+        first, _ = self.options
+        buffer = self.buffer()
+        buffer.record(self.test.id, self.student.id, first, self.options[first][0])
+        key = ('autosave_flush_errors_total', (('stage', 'exit'),))
+        before = registry.counters.get(key, 0)
+        with mock.patch.object(autosave, 'buffer', buffer), \
+                mock.patch.object(autosave, 'write_answers', side_effect=DatabaseError('locked')), \
+                self.assertLogs('core.autosave', 'ERROR') as logs:
+            autosave._flush_on_exit()
+        self.assertIn('Autosave flush on exit failed', logs.output[0])
+        self.assertEqual(registry.counters[key], before + 1)
+        # Put back in the buffer and its journal for the next flush or recovery
+        self.assertEqual(buffer.pending(self.test.id, self.student.id), {first: self.options[first][0]})
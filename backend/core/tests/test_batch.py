@@ -0,0 +1,102 @@
+import json
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from core.models import User
+from core.views import CurrentUserView
+
+from .test_query_budgets import client_for
+
+
+class BatchTests(APITestCase):
+    """Sub-requests run inline inside the test's transaction, as ``gather_lookups`` does in an atomic block."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+
+    def batch(self, *paths, user=None):
+        response = client_for(user or self.student).get(reverse('batch'), {'path': paths})
+        self.assertEqual(response.status_code, 200, response.content)
+        return json.loads(response.content)['responses']
+
+    def statuses(self, responses):
+        return [(item['path'], item['status']) for item in responses]
+
+    def test_responses_keep_the_order_asked(self):
+        paths = ['student/tests/', 'auth/me/', 'student/dashboard/?fields=user.email', 'auth/me/']
+        responses = self.batch(*paths)
+        self.assertEqual(self.statuses(responses), [(path, 200) for path in paths])
+        self.assertEqual(responses[1]['body'], json.loads(client_for(self.student).get(reverse('current-user')).content))
+        self.assertEqual(responses[2]['body'], {'user': {'email': self.student.email}})
+        self.assertEqual(responses[3], responses[1])
+
+    @override_settings(BATCH_CONCURRENT=False)
+    def test_sequential_batch(self):
+        responses = self.batch('student/tests/', 'auth/me/')
+        self.assertEqual(self.statuses(responses), [('student/tests/', 200), ('auth/me/', 200)])
+
+    def test_failing_paths_get_their_own_status(self):
+        responses = self.batch(
+            'auth/me/',
+            'student/nothing-here/',
+            '../../admin/',
+            'https://example.com/api/auth/me/',
+            'batch/?path=auth/me/',
+            'events/',
+            'student/tests/',
+        )
+        self.assertEqual(self.statuses(responses), [
+            ('auth/me/', 200),
+            ('student/nothing-here/', 404),
+            ('../../admin/', 400),
+            ('https://example.com/api/auth/me/', 400),
+            ('batch/?path=auth/me/', 400),
+            ('events/', 400),
+            ('student/tests/', 200),
+        ])
+        self.assertEqual([item['body'] for item in responses[1:6]], [
+            {'error': 'Not found.'},
+            {'error': 'Paths must be relative to the API root.'},
+            {'error': 'Paths must be relative to the API root.'},
+            {'error': 'Batches cannot be nested.'},
+            {'error': 'Streaming endpoints cannot be batched.'},
+        ])
+
+    def test_non_json_endpoints_are_refused(self):
+        [metrics, me] = self.batch('admin/metrics/', 'auth/me/', user=self.admin)
+        self.assertEqual(metrics, {
+            'path': 'admin/metrics/', 'status': 406, 'body': {'error': 'Only JSON endpoints can be batched.'},
+        })
+        self.assertEqual(me['status'], 200)
+
+    def test_view_errors_stay_inside_their_entry(self):
+        with mock.patch.object(CurrentUserView, 'get', side_effect=RuntimeError('boom')), \
+                self.assertLogs('core.batch', 'ERROR'):
+            responses = self.batch('auth/me/', 'student/tests/')
+        self.assertEqual(responses[0]['body'], {'error': 'Server error.'})
+        self.assertEqual(self.statuses(responses), [('auth/me/', 500), ('student/tests/', 200)])
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_path_limit(self):
+        self.assertEqual(len(self.batch('auth/me/', 'auth/me/')), 2)
+        response = client_for(self.student).get(reverse('batch'), {'path': ['auth/me/'] * 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'At most 2 paths per batch.'})
+        response = client_for(self.student).get(reverse('batch'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_permissions_apply_to_each_path(self):
+        responses = self.batch('admin/dashboard/', 'student/dashboard/', 'admin/metrics/')
+        self.assertEqual(self.statuses(responses), [
+            ('admin/dashboard/', 403), ('student/dashboard/', 200), ('admin/metrics/', 403),
+        ])
+        responses = self.batch('admin/dashboard/', 'student/dashboard/', user=self.admin)
+        self.assertEqual(self.statuses(responses), [('admin/dashboard/', 200), ('student/dashboard/', 403)])
+        # The forced user is the batch's; without a token the batch itself is refused
+        response = APIClient().get(reverse('batch'), {'path': ['auth/me/']})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,41 @@
+import gzip
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core.compression import CompressionMiddleware
+
+BODY = {'items': [{'id': index, 'title': f'Resource {index}'} for index in range(200)]}
+
+# Stands in for the optional brotli package
+fake_brotli = SimpleNamespace(compress=lambda content, quality: b'br:' + gzip.compress(content))
+
+
+@mock.patch('core.compression.brotli', fake_brotli)
+class CompressionMiddlewareTests(SimpleTestCase):
+    middleware = CompressionMiddleware(lambda request: JsonResponse(BODY))
+
+    def encoding(self, path='/api/student/resources/', **headers):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING='br, gzip', **headers)
+        response = self.middleware(request)
+        if response['Content-Encoding'] == 'gzip':
+            self.assertEqual(json.loads(gzip.decompress(response.content)), BODY)
+        return response['Content-Encoding']
+
+    def test_anonymous_responses_use_brotli(self):
+        self.assertEqual(self.encoding(), 'br')
+
+    def test_authenticated_responses_use_padded_gzip(self):
+        self.assertEqual(self.encoding(HTTP_AUTHORIZATION='Bearer abc'), 'gzip')
+        self.assertEqual(self.encoding('/api/events/?token=abc'), 'gzip')
+        self.assertEqual(self.encoding(HTTP_COOKIE='sessionid=abc'), 'gzip')
+
+    def test_gzip_padding_varies_the_size(self):
+        sizes = set()
+        for _ in range(20):
+            request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br, gzip', HTTP_AUTHORIZATION='Bearer abc')
+            sizes.add(len(self.middleware(request).content))
+        self.assertGreater(len(sizes), 1)
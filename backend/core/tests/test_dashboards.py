@@ -0,0 +1,113 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import (
+    CareerRecommendation,
+    CareerResource,
+    PersonalizedTest,
+    Question,
+    RoadmapStep,
+    StudentResourceProgress,
+    TestRequest,
+    User,
+)
+from core.testing import QueryBudgetAssertionsMixin
+
+from .test_query_budgets import client_for
+
+
+class DashboardTests(QueryBudgetAssertionsMixin, APITestCase):
+    """The async dashboards run their lookups inline inside the test's transaction."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+
+    def recommended_request(self):
+        test_request = TestRequest.objects.create(
+            student=self.student, interests_snapshot='dashboards', status=TestRequest.Status.COMPLETED,
+        )
+        test = PersonalizedTest.objects.create(
+            request=test_request, admin=self.admin, status=PersonalizedTest.Status.COMPLETED,
+        )
+        Question.objects.create(personalized_test=test, prompt='Why?', order=0)
+        recommendation = CareerRecommendation.objects.create(
+            personalized_test=test, admin=self.admin, career_name='Data Analyst', summary='Summary.',
+        )
+        RoadmapStep.objects.create(recommendation=recommendation, title='Learn SQL', order=0)
+        resource = CareerResource.objects.create(
+            title='Guide', description='About it.', career_recommendation=recommendation,
+            file='resources/guide.pdf', admin=self.admin,
+        )
+        StudentResourceProgress.objects.create(student=self.student, resource=resource)
+        return test_request
+
+    def test_student_dashboard_without_requests(self):
+        response = client_for(self.student).get(reverse('student-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['email'], self.student.email)
+        self.assertEqual(
+            {key: response.data[key] for key in ('latest_request', 'personalized_test', 'recommendation')},
+            {'latest_request': None, 'personalized_test': None, 'recommendation': None},
+        )
+
+    def test_student_dashboard(self):
+        test_request = self.recommended_request()
+        response = client_for(self.student).get(reverse('student-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data), ['user', 'latest_request', 'personalized_test', 'recommendation'])
+        self.assertEqual(response.data['latest_request']['id'], test_request.id)
+        self.assertEqual(len(response.data['personalized_test']['questions']), 1)
+        recommendation = response.data['recommendation']
+        self.assertEqual([step['title'] for step in recommendation['steps']], ['Learn SQL'])
+        # Serialized without the request, as before the view went async
+        [resource] = recommendation['resources']
+        self.assertEqual(resource['file_url'], '/media/resources/guide.pdf')
+        self.assertIsNone(resource['student_progress'])
+        # User lookup, then the latest request, the test with its questions and options,
+        # and the recommendation with its steps and resources
+        self.assertWithinQueryBudget(response, budget=8)
+        self.assertConstantQueries(
+            lambda: client_for(self.student).get(reverse('student-dashboard')), self.recommended_request,
+        )
+
+    def test_student_dashboard_fields(self):
+        self.recommended_request()
+        response = client_for(self.student).get(
+            f"{reverse('student-dashboard')}?fields=user.email,recommendation.career_name,recommendation.resources.title"
+        )
+        self.assertEqual(response.json(), {
+            'user': {'email': self.student.email},
+            'recommendation': {'career_name': 'Data Analyst', 'resources': [{'title': 'Guide'}]},
+        })
+
+    def test_student_dashboard_is_for_students(self):
+        self.assertEqual(client_for(self.admin).get(reverse('student-dashboard')).status_code, 403)
+
+    def test_admin_dashboard(self):
+        self.recommended_request()
+        TestRequest.objects.create(student=self.student, interests_snapshot='pending')
+        response = client_for(self.admin).get(reverse('admin-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats']['pending_requests'], 1)
+        self.assertEqual(response.data['stats']['mcqs_crafted'], 1)
+        self.assertEqual(response.data['stats']['recommendations_sent'], 1)
+        self.assertEqual([row['interests'] for row in response.data['recent_requests']], ['pending'])
+        # User lookup, six counts and the focus queue
+        self.assertWithinQueryBudget(response, budget=8)
+        self.assertConstantQueries(
+            lambda: client_for(self.admin).get(reverse('admin-dashboard')),
+            lambda: TestRequest.objects.create(student=self.student, interests_snapshot='more'),
+        )
+
+    def test_admin_dashboard_is_for_admins(self):
+        self.assertEqual(client_for(self.student).get(reverse('admin-dashboard')).status_code, 403)
+
+    @override_settings(ASYNC_LOOKUPS_CONCURRENT=True)
+    def test_lookups_run_inline_inside_a_transaction(self):
+        # Pool threads would fail with "database table is locked" on SQLite, or miss these rows elsewhere
+        self.recommended_request()
+        response = client_for(self.student).get(reverse('student-dashboard'))
+        self.assertEqual(response.data['recommendation']['career_name'], 'Data Analyst')
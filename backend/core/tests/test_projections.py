@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import (
+    CareerRecommendation,
+    CareerResource,
+    PersonalizedTest,
+    ResourceCategory,
+    StudentResourceProgress,
+    TestRequest,
+    User,
+)
+from core.views import AdminResourceListView, StudentMyResourcesView, StudentResourceListView
+
+
+@contextmanager
+def projection_enabled(view_class, enabled):
+    previous = view_class.use_projection
+    view_class.use_projection = enabled
+    try:
+        yield
+    finally:
+        view_class.use_projection = previous
+
+
+def recommend(student, admin, career_name):
+    test_request = TestRequest.objects.create(student=student, status=TestRequest.Status.COMPLETED)
+    test = PersonalizedTest.objects.create(request=test_request, admin=admin, status=PersonalizedTest.Status.COMPLETED)
+    return CareerRecommendation.objects.create(personalized_test=test, admin=admin, career_name=career_name, summary='Summary.')
+
+
+class SerializerParityTests(TestCase):
+    """The resource lists render byte for byte the same with and without ``core.projections``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        other = User.objects.create_user(email='other@example.com', password='pass', role=User.Roles.STUDENT)
+        cls.category = ResourceCategory.objects.create(name='Courses', icon='📚')
+        recommendation = recommend(cls.student, cls.admin, 'Data Analyst')
+        other_recommendation = recommend(other, cls.admin, 'Nurse')
+
+        def resource(title, **fields):
+            return CareerResource.objects.create(**{
+                'title': title, 'description': f'About {title}.', 'admin': cls.admin, **fields,
+            })
+
+        resources = [
+            resource('General article', category=cls.category, url='https://example.com/article'),
+            resource('Uncategorised video', resource_type=CareerResource.ResourceType.VIDEO, order=2),
+            resource(
+                'Paid course', category=cls.category, resource_type=CareerResource.ResourceType.COURSE,
+                is_free=False, cost=Decimal('49.90'), difficulty_level=CareerResource.DifficultyLevel.ADVANCED,
+            ),
+            resource('Downloadable guide', file='resources/guide.pdf', career_recommendation=recommendation),
+            resource('No admin', category=cls.category, career_recommendation=recommendation, admin=None),
+            resource('Someone else', career_recommendation=other_recommendation),
+            resource('Retired', category=cls.category, is_active=False),
+        ]
+        now = timezone.now()
+        for resource_, status, started, completed in (
+            (resources[0], StudentResourceProgress.Status.COMPLETED, now - timedelta(days=3), now),
+            (resources[2], StudentResourceProgress.Status.IN_PROGRESS, now - timedelta(days=1), None),
+            (resources[3], StudentResourceProgress.Status.NOT_STARTED, None, None),
+        ):
+            StudentResourceProgress.objects.create(
+                student=cls.student, resource=resource_, status=status, started_at=started, completed_at=completed,
+                notes=f'Notes on {resource_.title}', is_favorite=status == StudentResourceProgress.Status.COMPLETED,
+            )
+
+    def assertSameBodies(self, view_class, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        with projection_enabled(view_class, False):
+            expected = client.get(url)
+        with projection_enabled(view_class, True):
+            actual = client.get(url)
+        self.assertEqual(expected.status_code, 200)
+        self.assertEqual(actual.content, expected.content)
+
+    def test_admin_resources(self):
+        self.assertSameBodies(AdminResourceListView, self.admin, reverse('admin-resources'))
+
+    def test_admin_resources_by_category(self):
+        url = f"{reverse('admin-resources')}?category_id={self.category.id}"
+        self.assertSameBodies(AdminResourceListView, self.admin, url)
+
+    def test_student_resources(self):
+        self.assertSameBodies(StudentResourceListView, self.student, reverse('student-resources'))
+
+    def test_student_my_resources(self):
+        self.assertSameBodies(StudentMyResourcesView, self.student, reverse('student-my-resources'))
+
+
+
+
+class MyResourcesFieldsetTests(TestCase):
+    """``?fields=`` on my-resources, whose ``progress`` key is added by the view rather than a serializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        for title in ('Guide', 'Course'):
+            resource = CareerResource.objects.create(title=title, description=f'About {title}.')
+            StudentResourceProgress.objects.create(student=cls.student, resource=resource)
+
+    def get(self, query):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        response = client.get(f"{reverse('student-my-resources')}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()['resources']
+
+    def test_fields_leave_out_progress(self):
+        self.assertEqual({tuple(resource) for resource in self.get('fields=title')}, {('title',)})
+
+    def test_fields_select_inside_progress(self):
+        resources = self.get('fields=title,progress.status')
+        self.assertEqual({tuple(resource['progress']) for resource in resources}, {('status',)})
@@ -0,0 +1,186 @@
+import threading
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.autosave import AnswerBuffer
+from core.middleware import QueryCounter
+from core.models import (
+    CareerResource,
+    CareerTag,
+    Option,
+    OptionCareerWeight,
+    PersonalizedTest,
+    ResourceCategory,
+    StudentResourceProgress,
+    TestRequest,
+    User,
+)
+from core.testing import QueryBudgetAssertionsMixin, TemporaryMediaMixin
+
+from .test_projections import recommend as projections_recommend
+
+
+def client_for(user):
+    # A real token: the budgets count the user lookup of JWT authentication
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+@override_settings(AUTOSAVE_JOURNAL_DIR='')
+class QueryBudgetTests(TemporaryMediaMixin, QueryBudgetAssertionsMixin, APITestCase):
+    """Every view that declares a ``query_budget`` stays within it, and its lists do not grow per row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        cls.category = ResourceCategory.objects.create(name='Courses')
+        cls.tag = CareerTag.objects.create(name='Engineering')
+
+    def setUp(self):
+        self.admin_client = client_for(self.admin)
+        self.student_client = client_for(self.student)
+
+    def assigned_test(self, questions=3):
+        """A test built and assigned through the admin API; returns its id."""
+        test_request = TestRequest.objects.create(student=self.student, interests_snapshot='budgets')
+        response = self.admin_client.post(reverse('admin-create-test', args=[test_request.id]), format='json')
+        test_id = response.data['test']['id']
+        for order in range(questions):
+            self.admin_client.post(reverse('admin-create-question', args=[test_id]), {
+                'prompt': f'Question {order}?', 'order': order,
+                'options': [{'label': 'Yes', 'order': 0}, {'label': 'No', 'order': 1}],
+            }, format='json')
+        self.assertEqual(self.admin_client.post(reverse('admin-assign-test', args=[test_id])).status_code, 200)
+        return test_id
+
+    def answer_all(self, test_id):
+        detail = self.student_client.get(reverse('student-test-detail', args=[test_id])).data['test']
+        for question in detail['questions']:
+            self.student_client.post(reverse('student-submit-answer', args=[test_id]), {
+                'question_id': question['id'], 'option_id': question['options'][0]['id'],
+            }, format='json')
+
+    def completed_test(self):
+        test_id = self.assigned_test()
+        # Weighted options, so the submit scores the test and the lists render its candidates
+        OptionCareerWeight.objects.bulk_create([
+            OptionCareerWeight(option=option, tag=self.tag)
+            for option in Option.objects.filter(question__personalized_test_id=test_id)
+        ])
+        self.answer_all(test_id)
+        self.assertEqual(self.student_client.post(reverse('student-submit-test', args=[test_id])).status_code, 200)
+        return test_id
+
+    def resource(self, **fields):
+        return CareerResource.objects.create(**{
+            'title': 'Resource', 'description': 'About it.', 'category': self.category, 'admin': self.admin, **fields,
+        })
+
+    def test_student_test_list(self):
+        self.assigned_test()
+        request = lambda: self.student_client.get(reverse('student-test-list'))
+        self.assertWithinQueryBudget(request())
+        self.assertConstantQueries(request, self.assigned_test)
+
+    def test_student_test_detail(self):
+        test_id = self.assigned_test()
+        self.answer_all(test_id)
+        self.assertWithinQueryBudget(self.student_client.get(reverse('student-test-detail', args=[test_id])))
+
+    def test_student_test_detail_freezes_unfrozen_test(self):
+        test_id = self.assigned_test()
+        PersonalizedTest.objects.get(pk=test_id).snapshot.delete()
+        self.assertWithinQueryBudget(self.student_client.get(reverse('student-test-detail', args=[test_id])))
+
+    def test_student_answer_written_directly(self):
+        test_id = self.assigned_test()
+        question = self.student_client.get(reverse('student-test-detail', args=[test_id])).data['test']['questions'][0]
+        response = self.student_client.post(reverse('student-submit-answer', args=[test_id]), {
+            'question_id': question['id'], 'option_id': question['options'][0]['id'],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_student_answer_buffered(self):
+        test_id = self.assigned_test()
+        question = self.student_client.get(reverse('student-test-detail', args=[test_id])).data['test']['questions'][0]
+        # A buffer without the flush thread, which would write outside the test's transaction
+        with TemporaryDirectory() as directory, override_settings(AUTOSAVE_JOURNAL_DIR=directory), \
+                mock.patch('core.views.record_answer', AnswerBuffer(background=False).record):
+            response = self.student_client.post(reverse('student-submit-answer', args=[test_id]), {
+                'question_id': question['id'], 'option_id': question['options'][0]['id'],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response, budget=2)
+
+    def test_admin_completed_tests(self):
+        self.completed_test()
+        request = lambda: self.admin_client.get(reverse('admin-completed-tests'))
+        response = request()
+        self.assertEqual(response.data['tests'][0]['top_candidate'], 'Engineering')
+        self.assertWithinQueryBudget(response)
+        self.assertConstantQueries(request, self.completed_test)
+
+    def test_admin_test_answers(self):
+        test_id = self.completed_test()
+        response = self.admin_client.get(reverse('admin-test-answers', args=[test_id]))
+        self.assertEqual([candidate['tag'] for candidate in response.data['test']['career_candidates']], ['Engineering'])
+        self.assertWithinQueryBudget(response)
+
+    def test_student_resources(self):
+        self.resource()
+        request = lambda: self.student_client.get(reverse('student-resources'))
+        self.assertWithinQueryBudget(request())
+        self.assertConstantQueries(request, lambda: self.resource(category=ResourceCategory.objects.create(name='More')))
+
+    def test_student_resource_detail(self):
+        resource = self.resource()
+        StudentResourceProgress.objects.create(student=self.student, resource=resource)
+        self.assertWithinQueryBudget(self.student_client.get(reverse('student-resource-detail', args=[resource.id])))
+
+    def test_student_recommendations_with_fields(self):
+        def recommend():
+            recommendation = projections_recommend(self.student, self.admin, 'Analyst')
+            self.resource(
+                career_recommendation=recommendation, category=ResourceCategory.objects.create(name=f'Books {ResourceCategory.objects.count()}'),
+            )
+
+        recommend()
+        url = f"{reverse('student-recommendations')}?fields=career_name,resources.title,resources.category.name"
+        response = self.student_client.get(url)
+        self.assertEqual(response.data['recommendations'][0]['resources'][0]['category'], {'name': 'Books 1'})
+        # The categories stay prefetched under the method field that renders the resources
+        self.assertConstantQueries(lambda: self.student_client.get(url), recommend)
+
+    def test_student_my_resources(self):
+        def track():
+            StudentResourceProgress.objects.create(student=self.student, resource=self.resource())
+
+        track()
+        request = lambda: self.student_client.get(reverse('student-my-resources'))
+        self.assertWithinQueryBudget(request())
+        self.assertConstantQueries(request, track)
+
+
+class QueryCounterTests(SimpleTestCase):
+    def test_counts_queries_from_concurrent_threads(self):
+        counter = QueryCounter()
+        execute = lambda sql, params, many, context: None
+
+        def run():
+            for _ in range(5000):
+                counter(execute, 'SELECT 1', (), False, {})
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.count, 40000)
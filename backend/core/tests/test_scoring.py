@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import CareerScore, CareerTag, Option, OptionCareerWeight, Question, StudentAnswer, TestRequest, User
+from core.scoring import career_candidates, compute_scores, score_test
+from core.testing import TemporaryMediaMixin
+from core.transitions import assign_test, complete_test, create_test
+
+# question -> option -> {tag: weight}
+WEIGHTS = (
+    {'A': {'Data': 2.0, 'Design': 0.5}, 'B': {'Health': 1.0}},
+    {'C': {'Data': 1.0}, 'D': {'Design': 3.0}},
+    {'E': {'Health': 0.5, 'Data': 0.5}, 'F': {}},
+)
+
+
+class ScoringTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        cls.tags = {name: CareerTag.objects.create(name=name) for name in ('Data', 'Design', 'Health')}
+
+    def completed_test(self, picks):
+        """A completed test over ``WEIGHTS`` with the options labelled in ``picks`` chosen."""
+        test = create_test(TestRequest.objects.create(student=self.student, interests_snapshot='scoring'), self.admin)
+        for order, options in enumerate(WEIGHTS):
+            question = Question.objects.create(personalized_test=test, prompt=f'Question {order}?', order=order)
+            for index, (label, weights) in enumerate(options.items()):
+                option = Option.objects.create(question=question, label=label, order=index)
+                OptionCareerWeight.objects.bulk_create([
+                    OptionCareerWeight(option=option, tag=self.tags[tag], weight=weight)
+                    for tag, weight in weights.items()
+                ])
+                if label in picks:
+                    StudentAnswer.objects.create(question=question, option=option, student=self.student)
+        assign_test(test)
+        complete_test(test)
+        return test
+
+    def ranked(self, candidates):
+        return [(candidate['tag'], candidate['score'], candidate['rank']) for candidate in candidates]
+
+    def test_score_test_ranks_candidates(self):
+        test = self.completed_test('ADE')
+        self.assertEqual(self.ranked(score_test(test)), [('Design', 3.5, 1), ('Data', 2.5, 2), ('Health', 0.5, 3)])
+
+    def test_zero_scores_are_left_out_and_ties_keep_tag_order(self):
+        test = self.completed_test('BCF')
+        self.assertEqual(self.ranked(score_test(test)), [('Data', 1.0, 1), ('Health', 1.0, 2)])
+
+    def test_compute_scores_batches_tests(self):
+        first, second, unanswered = self.completed_test('ADE'), self.completed_test('BC'), self.completed_test('')
+        with self.assertNumQueries(3):
+            scores = compute_scores([first.id, second.id, unanswered.id])
+        tag_names = {tag.id: name for name, tag in self.tags.items()}
+        self.assertEqual(
+            {test_id: [tag_names[tag_id] for tag_id, _ in ranked] for test_id, ranked in scores.items()},
+            {first.id: ['Design', 'Data', 'Health'], second.id: ['Data', 'Health'], unanswered.id: []},
+        )
+
+    def test_rescore_tests_command(self):
+        scored, unscored = self.completed_test('ADE'), self.completed_test('BCF')
+        score_test(scored)
+        # A stale ranking that only a full rescore replaces
+        CareerScore.objects.filter(personalized_test=scored).update(score=99)
+
+        out = StringIO()
+        call_command('rescore_tests', '--missing', stdout=out)
+        self.assertIn('Scored 1 completed tests.', out.getvalue())
+        self.assertEqual(self.ranked(career_candidates(unscored)), [('Data', 1.0, 1), ('Health', 1.0, 2)])
+        self.assertEqual(set(CareerScore.objects.filter(personalized_test=scored).values_list('score', flat=True)), {99})
+
+        call_command('rescore_tests', '--chunk-size', '1', stdout=out)
+        self.assertIn('Scored 2 completed tests.', out.getvalue())
+        self.assertEqual(
+            list(CareerScore.objects.filter(personalized_test=scored).values_list('tag__name', 'score', 'rank')),
+            [('Design', 3.5, 1), ('Data', 2.5, 2), ('Health', 0.5, 3)],
+        )
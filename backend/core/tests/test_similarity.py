@@ -0,0 +1,96 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import CareerRecommendation, Option, PersonalizedTest, Question, StudentAnswer, TestRequest, User
+from core.similarity import RecommendationIndex, recommendation_index, vector_for_test
+
+from .test_query_budgets import client_for
+
+
+class RecommendationIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+
+    def recommended_test(self, interests, recommendation_id=None):
+        student = User.objects.create_user(
+            email=f'student{User.objects.count()}@example.com', password='pass', role=User.Roles.STUDENT,
+        )
+        test_request = TestRequest.objects.create(
+            student=student, interests_snapshot=interests, status=TestRequest.Status.COMPLETED,
+        )
+        test = PersonalizedTest.objects.create(
+            request=test_request, admin=self.admin, status=PersonalizedTest.Status.COMPLETED,
+        )
+        question = Question.objects.create(personalized_test=test, prompt='Pick one', order=0)
+        option = Option.objects.create(question=question, label=interests, order=0)
+        StudentAnswer.objects.create(question=question, option=option, student=student)
+        CareerRecommendation.objects.create(
+            id=recommendation_id, personalized_test=test, admin=self.admin, career_name=interests, summary='Summary.',
+        )
+        return test
+
+    def indexed_ids(self, index):
+        return sorted(int(i) for i in index._recommendation_ids[:len(index)])
+
+    def test_sync_picks_up_rows_committed_below_the_last_id(self):
+        self.recommended_test('python data', recommendation_id=10)
+        self.recommended_test('python web', recommendation_id=30)
+        index = RecommendationIndex()
+        index.sync()
+        self.assertEqual(self.indexed_ids(index), [10, 30])
+        # A transaction that took id 20 commits after 30 was already indexed
+        self.recommended_test('python ml', recommendation_id=20)
+        index.sync()
+        self.assertEqual(self.indexed_ids(index), [10, 20, 30])
+
+    def test_sync_drops_rows_deleted_elsewhere(self):
+        tests = [self.recommended_test(interests) for interests in ('design', 'music', 'nursing')]
+        index = RecommendationIndex()
+        index.sync()
+        # Deleted by another worker: this index saw no signal
+        CareerRecommendation.objects.filter(personalized_test=tests[0]).delete()
+        index.sync()
+        self.assertEqual(self.indexed_ids(index), [tests[1].recommendation.id, tests[2].recommendation.id])
+        # Unchanged table: the aggregate is the only query
+        with self.assertNumQueries(1):
+            index.sync()
+
+    def test_delete_and_edit_apply_to_the_shared_index(self):
+        keep, moved, gone = (self.recommended_test(interests) for interests in ('design', 'music', 'nursing'))
+        recommendation_index.sync()
+        with self.captureOnCommitCallbacks(execute=True):
+            gone.recommendation.delete()
+        self.assertNotIn(gone.id, recommendation_index._test_ids[:len(recommendation_index)])
+        # Re-pointing a recommendation at another test re-reads its vector
+        target = PersonalizedTest.objects.create(
+            request=TestRequest.objects.create(student=gone.request.student, interests_snapshot='music'),
+            admin=self.admin, status=PersonalizedTest.Status.COMPLETED,
+        )
+        recommendation = moved.recommendation
+        recommendation.personalized_test = target
+        with self.captureOnCommitCallbacks(execute=True):
+            recommendation.save()
+        test_ids = set(int(i) for i in recommendation_index._test_ids[:len(recommendation_index)])
+        self.assertEqual(test_ids, {keep.id, target.id})
+        with self.assertNumQueries(1):
+            recommendation_index.sync()
+
+    def test_search_excluding_own_test_still_returns_k(self):
+        tests = [self.recommended_test(interests) for interests in ('python data', 'python web', 'python ml', 'art')]
+        index = RecommendationIndex()
+        index.sync()
+        matches = index.search(vector_for_test(tests[0]), k=3, exclude_test_id=tests[0].id)
+        self.assertEqual(len(matches), 3)
+        self.assertNotIn(tests[0].recommendation.id, [recommendation_id for recommendation_id, _ in matches])
+        self.assertEqual(matches[-1][0], tests[3].recommendation.id)
+        self.assertEqual(len(index.search(vector_for_test(tests[0]), k=10, exclude_test_id=tests[0].id)), 3)
+
+    def test_similar_view_skips_deleted_recommendations(self):
+        tests = [self.recommended_test(interests) for interests in ('python data', 'python web', 'python ml', 'art')]
+        url = reverse('admin-similar-recommendations', args=[tests[0].id])
+        self.assertEqual(len(client_for(self.admin).get(f'{url}?k=3').data['suggestions']), 3)
+        CareerRecommendation.objects.filter(personalized_test=tests[1]).delete()
+        suggestions = client_for(self.admin).get(f'{url}?k=3').data['suggestions']
+        self.assertEqual([suggestion['test_id'] for suggestion in suggestions][-1], tests[3].id)
+        self.assertEqual(len(suggestions), 2)
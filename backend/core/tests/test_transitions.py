@@ -0,0 +1,171 @@
+import threading
+from collections import Counter
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.models import Option, PersonalizedTest, Question, TestRequest, User
+from core.testing import TemporaryMediaMixin
+from core.transitions import TransitionConflict, assign_test, complete_test, create_test
+
+
+def race(threads, attempt):
+    """Run ``attempt()`` in ``threads`` threads released at the same moment; count the outcomes."""
+    barrier = threading.Barrier(threads)
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            barrier.wait()
+            attempt()
+            outcome = 'won'
+        except TransitionConflict:
+            outcome = 'conflict'
+        except Exception as exc:
+            outcome = f'{type(exc).__name__}: {exc}'
+        finally:
+            connection.close()
+        with lock:
+            outcomes[outcome] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return outcomes
+
+
+def add_question(test):
+    question = Question.objects.create(personalized_test=test, prompt='Only question', order=0)
+    Option.objects.create(question=question, label='Only option', order=0)
+
+
+class TransitionTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+
+    def setUp(self):
+        self.test_request = TestRequest.objects.create(student=self.student, interests_snapshot='transitions')
+
+    def assertConflicts(self, transition, *args):
+        # Transitions add no savepoint of their own, and a conflict would break the test's transaction
+        with self.assertRaises(TransitionConflict), transaction.atomic():
+            transition(*args)
+
+    def assertStatuses(self, request_status, test_status):
+        self.test_request.refresh_from_db()
+        self.assertEqual(self.test_request.status, request_status)
+        self.assertEqual(self.test_request.personalized_test.status, test_status)
+
+    def test_lifecycle(self):
+        test = create_test(self.test_request, self.admin)
+        self.assertStatuses(TestRequest.Status.IN_PROGRESS, PersonalizedTest.Status.DRAFT)
+        add_question(test)
+        assign_test(test)
+        self.assertStatuses(TestRequest.Status.ASSIGNED, PersonalizedTest.Status.ASSIGNED)
+        complete_test(test)
+        self.assertStatuses(TestRequest.Status.COMPLETED, PersonalizedTest.Status.COMPLETED)
+
+    def test_repeated_transitions_conflict(self):
+        test = create_test(self.test_request, self.admin)
+        self.assertConflicts(create_test, TestRequest.objects.get(pk=self.test_request.pk), self.admin)
+        add_question(test)
+        assign_test(test)
+        self.assertConflicts(assign_test, PersonalizedTest.objects.get(pk=test.pk))
+        complete_test(test)
+        self.assertConflicts(complete_test, PersonalizedTest.objects.get(pk=test.pk))
+        self.assertStatuses(TestRequest.Status.COMPLETED, PersonalizedTest.Status.COMPLETED)
+
+    def test_draft_cannot_be_completed(self):
+        test = create_test(self.test_request, self.admin)
+        self.assertConflicts(complete_test, test)
+        self.assertStatuses(TestRequest.Status.IN_PROGRESS, PersonalizedTest.Status.DRAFT)
+
+
+class QuestionAdminTests(TemporaryMediaMixin, TestCase):
+    """Questions and options are frozen into the snapshot on assignment; the admin must not change them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        cls.superuser = User.objects.create_superuser(email='root@example.com', password='pass')
+        cls.test = create_test(TestRequest.objects.create(student=student, interests_snapshot='admin'), cls.superuser)
+        add_question(cls.test)
+        cls.question = cls.test.questions.get()
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def change(self):
+        url = reverse('admin:core_question_change', args=[self.question.pk])
+        option = self.question.options.get()
+        return self.client.post(url, {
+            'personalized_test': self.test.pk, 'prompt': 'Edited', 'order': 0,
+            'options-TOTAL_FORMS': 1, 'options-INITIAL_FORMS': 1,
+            'options-0-id': option.pk, 'options-0-question': self.question.pk,
+            'options-0-label': 'Edited option', 'options-0-description': '', 'options-0-order': 0,
+        })
+
+    def test_draft_questions_are_editable(self):
+        self.assertEqual(self.change().status_code, 302)
+        self.assertEqual(self.question.options.get().label, 'Edited option')
+
+    def test_assigned_questions_are_read_only(self):
+        assign_test(self.test)
+        self.change()
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.prompt, 'Only question')
+        self.assertEqual(self.question.options.get().label, 'Only option')
+        delete = reverse('admin:core_question_delete', args=[self.question.pk])
+        self.assertEqual(self.client.post(delete, {'post': 'yes'}).status_code, 403)
+        self.client.post(reverse('admin:core_question_changelist'), {
+            'action': 'delete_selected', '_selected_action': [self.question.pk], 'post': 'yes',
+        })
+        self.assertTrue(Question.objects.filter(pk=self.question.pk).exists())
+
+
+class TransitionRaceTests(TemporaryMediaMixin, TransactionTestCase):
+    """
+    Threads race through each transition; exactly one may win.
+
+    Each thread has its own connection; on SQLite they share the file-backed test database.
+    """
+
+    threads = 8
+
+    def setUp(self):
+        self.student = User.objects.create_user(email='student@example.com', password='pass', role=User.Roles.STUDENT)
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role=User.Roles.ADMIN)
+        self.test_request = TestRequest.objects.create(student=self.student, interests_snapshot='transition race')
+
+    def assertOneWinner(self, attempt):
+        self.assertEqual(race(self.threads, attempt), Counter(won=1, conflict=self.threads - 1))
+
+    def personalized_test(self):
+        return PersonalizedTest.objects.get(request_id=self.test_request.pk)
+
+    def test_create_test(self):
+        self.assertOneWinner(lambda: create_test(TestRequest.objects.get(pk=self.test_request.pk), self.admin))
+        self.assertEqual(PersonalizedTest.objects.filter(request=self.test_request).count(), 1)
+
+    def test_assign_test(self):
+        add_question(create_test(self.test_request, self.admin))
+        self.assertOneWinner(lambda: assign_test(self.personalized_test()))
+        self.test_request.refresh_from_db()
+        self.assertEqual(self.test_request.status, TestRequest.Status.ASSIGNED)
+
+    def test_complete_test(self):
+        test = create_test(self.test_request, self.admin)
+        add_question(test)
+        assign_test(test)
+        self.assertOneWinner(lambda: complete_test(self.personalized_test()))
+        self.test_request.refresh_from_db()
+        self.assertEqual(
+            (self.test_request.status, self.personalized_test().status),
+            (TestRequest.Status.COMPLETED, PersonalizedTest.Status.COMPLETED),
+        )
@@ -0,0 +1,89 @@
+"""
+Status transitions for test requests and personalized tests.
+
+A ``TestRequest`` and its ``PersonalizedTest`` move together:
+
+    request  pending -> in_progress -> assigned -> completed
+    test                draft       -> assigned -> completed
+
+Each transition is a conditional ``UPDATE ... SET status = <target> WHERE
+id = <id> AND status = <expected>`` per table, both inside one transaction.
+The row a view loaded is never saved back, so only the changed columns are
+written. When another request got there first an UPDATE matches no row, the
+transaction is rolled back and ``TransitionConflict`` is raised; views answer
+it with 409. Nested inside a view's transaction they add no savepoints.
+Because UPDATEs send no ``post_save``, each transition that changes an
+existing test sends ``status_changed`` with it instead.
+``core.tests.test_transitions`` races threads through every transition, on
+SQLite and Postgres alike.
+"""
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import PersonalizedTest, TestRequest
+
+
+# Sent with sender=PersonalizedTest and instance=<the test, updated in memory>
+status_changed = Signal()
+
+
+class TransitionConflict(Exception):
+    pass
+
+
+def _update(model, pk, expected, **values):
+    # QuerySet.update() skips auto_now, so TestRequest.updated_at is passed explicitly
+    return model.objects.filter(pk=pk, status__in=expected).update(**values)
+
+
+@transaction.atomic(savepoint=False)
+def create_test(test_request, admin):
+    """pending request -> in_progress, with a new draft test."""
+    now = timezone.now()
+    if not _update(TestRequest, test_request.pk, [TestRequest.Status.PENDING],
+                   status=TestRequest.Status.IN_PROGRESS, updated_at=now):
+        raise TransitionConflict("Test request is no longer pending.")
+    # Before the insert, so its post_save sees the request as it now is
+    test_request.status, test_request.updated_at = TestRequest.Status.IN_PROGRESS, now
+    # The UPDATE above lets only one caller through, so the one-to-one insert cannot collide
+    return PersonalizedTest.objects.create(request=test_request, status=PersonalizedTest.Status.DRAFT, admin=admin)
+
+
+@transaction.atomic(savepoint=False)
+def assign_test(test):
+    """draft test -> assigned, and its request with it."""
+    now = timezone.now()
+    if not _update(PersonalizedTest, test.pk, [PersonalizedTest.Status.DRAFT],
+                   status=PersonalizedTest.Status.ASSIGNED, assigned_at=now):
+        raise TransitionConflict("Test is no longer a draft.")
+    # Requests seeded or created before this module may still be pending
+    if not _update(TestRequest, test.request_id, [TestRequest.Status.PENDING, TestRequest.Status.IN_PROGRESS],
+                   status=TestRequest.Status.ASSIGNED, updated_at=now):
+        raise TransitionConflict("Test request is no longer open.")
+    test.status, test.assigned_at = PersonalizedTest.Status.ASSIGNED, now
+    _refresh_request(test, TestRequest.Status.ASSIGNED, now)
+    status_changed.send(sender=PersonalizedTest, instance=test)
+    return test
+
+
+@transaction.atomic(savepoint=False)
+def complete_test(test):
+    """assigned test -> completed, and its request with it."""
+    now = timezone.now()
+    if not _update(PersonalizedTest, test.pk, [PersonalizedTest.Status.ASSIGNED],
+                   status=PersonalizedTest.Status.COMPLETED, completed_at=now):
+        raise TransitionConflict("Test is no longer assigned.")
+    if not _update(TestRequest, test.request_id, [TestRequest.Status.ASSIGNED],
+                   status=TestRequest.Status.COMPLETED, updated_at=now):
+        raise TransitionConflict("Test request is no longer assigned.")
+    test.status, test.completed_at = PersonalizedTest.Status.COMPLETED, now
+    _refresh_request(test, TestRequest.Status.COMPLETED, now)
+    status_changed.send(sender=PersonalizedTest, instance=test)
+    return test
+
+
+def _refresh_request(test, status, now):
+    # Keep an already loaded request in step without fetching it
+    if PersonalizedTest.request.is_cached(test):
+        test.request.status, test.request.updated_at = status, now
@@ -2,23 +2,33 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
+    AdminApplyTemplateView,
+    AdminCareerTagDetailView,
+    AdminCareerTagListView,
     AdminCompletedTestsListView,
     AdminCreateRecommendationView,
     AdminDashboardView,
+    AdminMetricsView,
     AdminPersonalizedTestCreateView,
     AdminPersonalizedTestDetailView,
+    AdminQuestionBankListView,
     AdminQuestionCreateView,
     AdminRecommendationsListView,
     AdminResourceCategoryDetailView,
     AdminResourceCategoryListView,
     AdminResourceDetailView,
     AdminResourceListView,
+    AdminSimilarRecommendationsView,
     AdminTestAnswersView,
     AdminTestAssignView,
     AdminTestByRequestView,
     AdminTestRequestListView,
+    AdminTestTemplateDetailView,
+    AdminTestTemplateListView,
+    BatchView,
     CurrentUserView,
     CustomTokenObtainPairView,
+    EventStreamView,
     StudentAnswerSubmitView,
     StudentDashboardView,
     StudentMyResourcesView,
@@ -58,11 +68,21 @@ urlpatterns = [
     path('admin/test-requests/<int:request_id>/test/', AdminTestByRequestView.as_view(), name='admin-test-by-request'),
     path('admin/tests/<int:pk>/', AdminPersonalizedTestDetailView.as_view(), name='admin-test-detail'),
     path('admin/tests/<int:test_id>/questions/', AdminQuestionCreateView.as_view(), name='admin-create-question'),
+    path('admin/tests/<int:test_id>/apply-template/', AdminApplyTemplateView.as_view(), name='admin-apply-template'),
     path('admin/tests/<int:test_id>/assign/', AdminTestAssignView.as_view(), name='admin-assign-test'),
     path('admin/tests/completed/', AdminCompletedTestsListView.as_view(), name='admin-completed-tests'),
     path('admin/tests/<int:test_id>/answers/', AdminTestAnswersView.as_view(), name='admin-test-answers'),
     path('admin/tests/<int:test_id>/recommendation/', AdminCreateRecommendationView.as_view(), name='admin-create-recommendation'),
+    path('admin/tests/<int:test_id>/similar-recommendations/', AdminSimilarRecommendationsView.as_view(), name='admin-similar-recommendations'),
     path('admin/recommendations/', AdminRecommendationsListView.as_view(), name='admin-recommendations'),
+    path('admin/question-bank/', AdminQuestionBankListView.as_view(), name='admin-question-bank'),
+    path('admin/test-templates/', AdminTestTemplateListView.as_view(), name='admin-test-templates'),
+    path('admin/test-templates/<int:pk>/', AdminTestTemplateDetailView.as_view(), name='admin-test-template-detail'),
+    path('admin/career-tags/', AdminCareerTagListView.as_view(), name='admin-career-tags'),
+    path('admin/career-tags/<int:pk>/', AdminCareerTagDetailView.as_view(), name='admin-career-tag-detail'),
+    path('admin/metrics/', AdminMetricsView.as_view(), name='admin-metrics'),
+    path('events/', EventStreamView.as_view(), name='event-stream'),
+    path('batch/', BatchView.as_view(), name='batch'),
     path('admin/resource-categories/', AdminResourceCategoryListView.as_view(), name='admin-resource-categories'),
     path('admin/resource-categories/<int:pk>/', AdminResourceCategoryDetailView.as_view(), name='admin-resource-category-detail'),
     path('admin/resources/', AdminResourceListView.as_view(), name='admin-resources'),
@@ -1,8 +1,10 @@
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
 from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import generics, permissions
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -10,32 +12,55 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from .models import (
     CareerRecommendation,
     CareerResource,
-    Option,
+    CareerScore,
+    CareerTag,
     PersonalizedTest,
     Question,
+    QuestionBank,
     ResourceCategory,
     RoadmapStep,
     StudentAnswer,
     StudentResourceProgress,
     TestRequest,
+    TestTemplate,
     User,
 )
+from .answer_sheets import layout, pack_answer_sheet, test_selected_options
+from .async_views import AsyncAPIView, gather_lookups
+from .autosave import flush_attempt, journal_dir, pending_answers, record_answer
+from .batch import dispatch_batch, max_paths
+from .events import ADMINS, QueryTokenAuthentication, event_stream_response
+from .fieldsets import SparseFieldsetViewMixin, has_fieldset, requested_fieldset, select_keys, shape_queryset
+from .metrics import render_prometheus, timer
 from .pdf_generator import generate_recommendation_pdf
+from .projections import serialize_my_resources, serialize_resources
+from .question_bank import instantiate_template
+from .renderers import EventStreamRenderer, FastJSONRenderer
+from .resource_access import can_access, visible_resources
+from .scoring import career_candidates, score_test
+from .similarity import similar_recommendations
+from .snapshots import current_snapshot, freeze_test, parsed_snapshot, snapshot_etag, test_detail
+from .sqlite_writes import run_serialized
+from .transitions import TransitionConflict, assign_test, complete_test, create_test
 from .serializers import (
     CareerRecommendationCreateSerializer,
     CareerRecommendationSerializer,
     CareerResourceCreateSerializer,
     CareerResourceSerializer,
+    CareerTagSerializer,
     CustomTokenObtainPairSerializer,
     PersonalizedTestSerializer,
+    QuestionBankSerializer,
     QuestionCreateSerializer,
     QuestionSerializer,
     ResourceCategorySerializer,
+    RoadmapStepSerializer,
     StudentAnswerSerializer,
     StudentRegistrationSerializer,
     StudentResourceProgressSerializer,
     TestRequestCreateSerializer,
     TestRequestSerializer,
+    TestTemplateSerializer,
     UserSerializer,
 )
 
@@ -43,20 +68,23 @@ from .serializers import (
 class StudentRegistrationView(generics.CreateAPIView):
     serializer_class = StudentRegistrationSerializer
     permission_classes = (permissions.AllowAny,)
+    # A single INSERT; a serialized transaction would hold the write lock while the password hashes
+    serialize_writes = False
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
     permission_classes = (permissions.AllowAny,)
+    serialize_writes = False  # Checks a password, writes nothing
 
 
 class CurrentUserView(APIView):
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data)
 
 
-class StudentTestRequestView(generics.ListCreateAPIView):
+class StudentTestRequestView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_serializer_class(self):
@@ -73,78 +101,111 @@ class StudentTestRequestView(generics.ListCreateAPIView):
         serializer.save(student=self.request.user)
 
 
-class StudentDashboardView(APIView):
+def _first_data(queryset, serializer_class, context):
+    instance = queryset.first()
+    return serializer_class(instance, context=context).data if instance is not None else None
+
+
+class StudentDashboardView(AsyncAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    replica_reads = True
 
-    def get(self, request):
+    async def get(self, request):
         if request.user.role != User.Roles.STUDENT:
             raise PermissionDenied("Only students can view this dashboard.")
-        latest_request = request.user.test_requests.order_by('-created_at').first()
-        request_data = TestRequestSerializer(latest_request).data if latest_request else None
-        recommendation_data = None
-        test_data = None
-        if latest_request and hasattr(latest_request, 'personalized_test'):
-            personalized_test = latest_request.personalized_test
-            test_data = PersonalizedTestSerializer(personalized_test).data
-            recommendation = getattr(personalized_test, 'recommendation', None)
-            if recommendation:
-                recommendation_data = CareerRecommendationSerializer(recommendation).data
+
+        fieldset = requested_fieldset(request)
+
+        def context(key):
+            # ?fields=personalized_test.status reaches into the serializer under that key. The request
+            # itself stays out, as it would add student_progress and absolute file URLs to the resources.
+            return {'fieldset': fieldset, 'fieldset_path': (key,)}
+
+        # The test and recommendation are looked up through the latest request's id as a subquery,
+        # so all three lookups run at once; -id breaks created_at ties the same way in each.
+        # Lookups for keys left out of ?fields= are skipped.
+        latest_requests = request.user.test_requests.order_by('-created_at', '-id')
+        latest_id = models.Subquery(latest_requests.values('id')[:1])
+        lookups = select_keys(request, {
+            'latest_request': partial(
+                _first_data, latest_requests.select_related('student'), TestRequestSerializer,
+                context('latest_request'),
+            ),
+            'personalized_test': partial(
+                _first_data,
+                PersonalizedTest.objects.filter(request_id=latest_id).select_related(
+                    'request__student'
+                ).prefetch_related('questions__options'),
+                PersonalizedTestSerializer,
+                context('personalized_test'),
+            ),
+            'recommendation': partial(
+                _first_data,
+                CareerRecommendation.objects.filter(personalized_test__request_id=latest_id).prefetch_related(
+                    'steps',
+                    models.Prefetch('resources', queryset=CareerResource.objects.select_related('category', 'admin')),
+                ),
+                CareerRecommendationSerializer,
+                context('recommendation'),
+            ),
+        })
+        results = dict(zip(lookups, await gather_lookups(*lookups.values())))
         return Response(
-            {
-                'user': UserSerializer(request.user).data,
-                'latest_request': request_data,
-                'personalized_test': test_data,
-                'recommendation': recommendation_data,
-            }
+            select_keys(request, {
+                'user': UserSerializer(request.user, context=context('user')).data,
+                'latest_request': results.get('latest_request'),
+                'personalized_test': results.get('personalized_test'),
+                'recommendation': results.get('recommendation'),
+            })
         )
 
 
-class AdminDashboardView(APIView):
+class AdminDashboardView(AsyncAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    replica_reads = True
 
-    def get(self, request):
+    async def get(self, request):
         if request.user.role != User.Roles.ADMIN:
             raise PermissionDenied("Only admins can view this dashboard.")
         
         from datetime import timedelta
         
-        # Calculate statistics
         now = timezone.now()
         week_ago = now - timedelta(days=7)
         month_ago = now - timedelta(days=30)
-        
-        # Pending requests
-        pending_requests = TestRequest.objects.filter(status=TestRequest.Status.PENDING).count()
-        pending_this_week = TestRequest.objects.filter(
-            status=TestRequest.Status.PENDING,
-            created_at__gte=week_ago
-        ).count()
-        
-        # Total MCQs (questions) crafted
-        total_questions = Question.objects.count()
-        questions_this_month = Question.objects.filter(
-            personalized_test__request__created_at__gte=month_ago
-        ).count()
-        
-        # Recommendations sent
-        total_recommendations = CareerRecommendation.objects.count()
-        recommendations_this_week = CareerRecommendation.objects.filter(
-            created_at__gte=week_ago
-        ).count()
-        
+
         # Recent pending requests (for focus queue)
         recent_requests = TestRequest.objects.filter(
             status__in=[TestRequest.Status.PENDING, TestRequest.Status.IN_PROGRESS]
-        ).select_related('student').order_by('-created_at')[:5]
+        ).select_related('student', 'personalized_test').annotate(
+            questions_count=models.Count('personalized_test__questions')
+        ).order_by('-created_at')[:5]
+
+        # Statistics and the focus queue are independent, so they are queried concurrently
+        (
+            pending_requests,
+            pending_this_week,
+            total_questions,
+            questions_this_month,
+            total_recommendations,
+            recommendations_this_week,
+            recent_requests,
+        ) = await gather_lookups(
+            TestRequest.objects.filter(status=TestRequest.Status.PENDING).count,
+            TestRequest.objects.filter(status=TestRequest.Status.PENDING, created_at__gte=week_ago).count,
+            # MCQs (questions) crafted
+            Question.objects.count,
+            Question.objects.filter(personalized_test__request__created_at__gte=month_ago).count,
+            # Recommendations sent
+            CareerRecommendation.objects.count,
+            CareerRecommendation.objects.filter(created_at__gte=week_ago).count,
+            partial(list, recent_requests),
+        )
         
         recent_requests_data = []
         for req in recent_requests:
-            # Get test if exists
-            test = None
             if hasattr(req, 'personalized_test'):
-                test = req.personalized_test
-                questions_count = test.questions.count()
-                status_text = 'Questions drafted' if questions_count > 0 else 'Need review'
+                status_text = 'Questions drafted' if req.questions_count > 0 else 'Need review'
             else:
                 status_text = 'Need review'
             
@@ -185,8 +246,9 @@ class AdminDashboardView(APIView):
         })
 
 
-class AdminTestRequestListView(generics.ListAPIView):
+class AdminTestRequestListView(SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    replica_reads = True
     serializer_class = TestRequestSerializer
 
     def get_queryset(self):
@@ -206,22 +268,19 @@ class AdminPersonalizedTestCreateView(APIView):
         if request.user.role != User.Roles.ADMIN:
             raise PermissionDenied("Only admins can create tests.")
         try:
-            test_request = TestRequest.objects.get(id=request_id)
+            test_request = TestRequest.objects.select_related('personalized_test').get(id=request_id)
         except TestRequest.DoesNotExist:
             raise PermissionDenied("Test request not found.")
         if hasattr(test_request, 'personalized_test'):
             return Response({'message': 'Test already exists.', 'test': PersonalizedTestSerializer(test_request.personalized_test).data})
-        personalized_test = PersonalizedTest.objects.create(
-            request=test_request,
-            status=PersonalizedTest.Status.DRAFT,
-            admin=request.user
-        )
-        test_request.status = TestRequest.Status.IN_PROGRESS
-        test_request.save()
+        try:
+            personalized_test = create_test(test_request, request.user)
+        except TransitionConflict as exc:
+            return Response({'error': str(exc)}, status=409)
         return Response({'message': 'Test created successfully.', 'test': PersonalizedTestSerializer(personalized_test).data}, status=201)
 
 
-class AdminPersonalizedTestDetailView(generics.RetrieveAPIView):
+class AdminPersonalizedTestDetailView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = PersonalizedTestSerializer
 
@@ -243,8 +302,9 @@ class AdminTestByRequestView(APIView):
             raise PermissionDenied("Test request not found.")
         if not hasattr(test_request, 'personalized_test'):
             return Response({'error': 'No test created for this request yet.'}, status=404)
-        test = PersonalizedTest.objects.select_related('request', 'request__student').prefetch_related('questions', 'questions__options').get(id=test_request.personalized_test.id)
-        return Response(PersonalizedTestSerializer(test).data)
+        tests = PersonalizedTest.objects.select_related('request', 'request__student').prefetch_related('questions', 'questions__options')
+        test = shape_queryset(tests, PersonalizedTestSerializer, request).get(id=test_request.personalized_test.id)
+        return Response(PersonalizedTestSerializer(test, context={'request': request}).data)
 
 
 class AdminQuestionCreateView(generics.CreateAPIView):
@@ -259,10 +319,76 @@ class AdminQuestionCreateView(generics.CreateAPIView):
             test = PersonalizedTest.objects.get(id=test_id)
         except PersonalizedTest.DoesNotExist:
             raise PermissionDenied("Test not found.")
+        if test.status != PersonalizedTest.Status.DRAFT:
+            raise ValidationError({'error': 'Questions can only be added to draft tests.'})
         question = serializer.save(personalized_test=test)
         return question
 
 
+class AdminQuestionBankListView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = QuestionBankSerializer
+
+    def get_queryset(self):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can view the question bank.")
+        queryset = QuestionBank.objects.all().order_by('-created_at')
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = queryset.filter(prompt__icontains=search)
+        return queryset
+
+    def perform_create(self, serializer):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can add to the question bank.")
+        serializer.save(admin=self.request.user)
+
+
+class AdminTestTemplateListView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = TestTemplateSerializer
+
+    def get_queryset(self):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can view test templates.")
+        return TestTemplate.objects.prefetch_related('items', 'items__question').order_by('name')
+
+    def perform_create(self, serializer):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can create test templates.")
+        serializer.save(admin=self.request.user)
+
+
+class AdminTestTemplateDetailView(SparseFieldsetViewMixin, generics.RetrieveDestroyAPIView):
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = TestTemplateSerializer
+
+    def get_queryset(self):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can manage test templates.")
+        return TestTemplate.objects.prefetch_related('items', 'items__question')
+
+
+class AdminApplyTemplateView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, test_id):
+        if request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can build tests.")
+        try:
+            test = PersonalizedTest.objects.get(id=test_id)
+        except PersonalizedTest.DoesNotExist:
+            raise PermissionDenied("Test not found.")
+        if test.status != PersonalizedTest.Status.DRAFT:
+            return Response({'error': 'Templates can only be applied to draft tests.'}, status=400)
+        try:
+            template = TestTemplate.objects.get(id=request.data.get('template_id'))
+        except (TestTemplate.DoesNotExist, ValueError, TypeError):
+            return Response({'error': 'Invalid template_id.'}, status=400)
+        questions = instantiate_template(template, test)
+        return Response({'message': f'{len(questions)} questions added from template.', 'questions_added': len(questions)}, status=201)
+
+
 class AdminTestAssignView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
@@ -270,20 +396,25 @@ class AdminTestAssignView(APIView):
         if request.user.role != User.Roles.ADMIN:
             raise PermissionDenied("Only admins can assign tests.")
         try:
-            test = PersonalizedTest.objects.get(id=test_id)
+            test = PersonalizedTest.objects.select_related('request').get(id=test_id)
         except PersonalizedTest.DoesNotExist:
             raise PermissionDenied("Test not found.")
+        if test.status != PersonalizedTest.Status.DRAFT:
+            return Response({'error': 'Only draft tests can be assigned.'}, status=400)
         if test.questions.count() == 0:
             return Response({'error': 'Cannot assign test without questions.'}, status=400)
-        test.status = PersonalizedTest.Status.ASSIGNED
-        test.request.status = TestRequest.Status.ASSIGNED
-        test.save()
-        test.request.save()
+        try:
+            with transaction.atomic():
+                assign_test(test)
+                freeze_test(test)
+        except TransitionConflict as exc:
+            return Response({'error': str(exc)}, status=409)
         return Response({'message': 'Test assigned successfully.', 'test': PersonalizedTestSerializer(test).data})
 
 
 class StudentTestListView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 2
 
     def get(self, request):
         if request.user.role != User.Roles.STUDENT:
@@ -291,18 +422,22 @@ class StudentTestListView(APIView):
         tests = PersonalizedTest.objects.filter(
             request__student=request.user,
             status=PersonalizedTest.Status.ASSIGNED
-        ).select_related('request').order_by('-request__created_at')
+        ).select_related('request').annotate(
+            questions_count=models.Count('questions', distinct=True),
+            answered_count=models.Count(
+                'questions__answers',
+                filter=models.Q(questions__answers__student=request.user),
+                distinct=True,
+            ),
+        ).order_by('-request__created_at')
         return Response({
             'tests': [
                 {
                     'id': test.id,
                     'request_id': test.request.id,
                     'created_at': test.request.created_at,
-                    'questions_count': test.questions.count(),
-                    'answered_count': StudentAnswer.objects.filter(
-                        student=request.user,
-                        question__personalized_test=test
-                    ).count(),
+                    'questions_count': test.questions_count,
+                    'answered_count': test.answered_count,
                 }
                 for test in tests
             ]
@@ -311,12 +446,14 @@ class StudentTestListView(APIView):
 
 class StudentTestDetailView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    # 3 once the test is frozen; tests assigned before snapshots existed are frozen on first open
+    query_budget = 6
 
     def get(self, request, test_id):
         if request.user.role != User.Roles.STUDENT:
             raise PermissionDenied("Only students can view tests.")
         try:
-            test = PersonalizedTest.objects.prefetch_related('questions', 'questions__options').get(
+            test = PersonalizedTest.objects.select_related('snapshot').get(
                 id=test_id,
                 request__student=request.user
             )
@@ -324,46 +461,38 @@ class StudentTestDetailView(APIView):
             raise PermissionDenied("Test not found.")
         if test.status != PersonalizedTest.Status.ASSIGNED:
             return Response({'error': 'Test is not available for taking.'}, status=400)
-        questions_data = []
-        for question in test.questions.all():
-            answer = StudentAnswer.objects.filter(student=request.user, question=question).first()
-            questions_data.append({
-                'id': question.id,
-                'prompt': question.prompt,
-                'order': question.order,
-                'options': [
-                    {
-                        'id': option.id,
-                        'label': option.label,
-                        'description': option.description,
-                        'order': option.order,
-                    }
-                    for option in question.options.all()
-                ],
-                'selected_option_id': answer.option.id if answer and answer.option else None,
-            })
-        return Response({
-            'test': {
-                'id': test.id,
-                'request_id': test.request.id,
-                'questions': sorted(questions_data, key=lambda x: x['order']),
-                'total_questions': len(questions_data),
-                'answered_count': StudentAnswer.objects.filter(
-                    student=request.user,
-                    question__personalized_test=test
-                ).count(),
-            }
-        })
+        snapshot = current_snapshot(test)
+        selected_options = dict(
+            StudentAnswer.objects.filter(
+                student=request.user,
+                question__personalized_test=test
+            ).values_list('question_id', 'option_id')
+        )
+        selected_options.update(pending_answers(test.id, request.user.id))
+        etag = snapshot_etag(snapshot, selected_options)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        # CompressionMiddleware weakens the ETag it sends, so compare ignoring W/
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(',')):
+            return Response(status=304, headers=headers)
+        return Response(test_detail(snapshot, selected_options), headers=headers)
 
 
 class StudentAnswerSubmitView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    # Answers are written by the autosave flush (or one upsert), not inside the request
+    serialize_writes = False
+
+    @staticmethod
+    def query_budget():
+        # The user and the test; writing directly adds the upsert and, on SQLite, its BEGIN
+        return 2 if journal_dir() else 4
 
     def post(self, request, test_id):
         if request.user.role != User.Roles.STUDENT:
             raise PermissionDenied("Only students can submit answers.")
         try:
-            test = PersonalizedTest.objects.get(id=test_id, request__student=request.user)
+            test = PersonalizedTest.objects.select_related('snapshot').get(id=test_id, request__student=request.user)
         except PersonalizedTest.DoesNotExist:
             raise PermissionDenied("Test not found.")
         if test.status != PersonalizedTest.Status.ASSIGNED:
@@ -372,37 +501,39 @@ class StudentAnswerSubmitView(APIView):
         option_id = request.data.get('option_id')
         if not question_id or not option_id:
             return Response({'error': 'question_id and option_id are required.'}, status=400)
+        # Assigned tests are frozen, so the snapshot validates the pair without touching the question tables
         try:
-            question = Question.objects.get(id=question_id, personalized_test=test)
-            option = question.options.get(id=option_id)
-        except (Question.DoesNotExist, Option.DoesNotExist):
+            question_id, option_id = int(question_id), int(option_id)
+        except (TypeError, ValueError):
             return Response({'error': 'Invalid question or option.'}, status=400)
-        answer, created = StudentAnswer.objects.update_or_create(
-            student=request.user,
-            question=question,
-            defaults={'option': option}
-        )
+        if option_id not in dict(layout(current_snapshot(test))).get(question_id, ()):
+            return Response({'error': 'Invalid question or option.'}, status=400)
+        record_answer(test.id, request.user.id, question_id, option_id)
         return Response({
             'message': 'Answer submitted successfully.',
             'answer': {
-                'question_id': answer.question.id,
-                'option_id': answer.option.id,
+                'question_id': question_id,
+                'option_id': option_id,
             }
         })
 
 
 class StudentTestSubmitView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    # flush_attempt() waits for a background autosave flush, which may be waiting for the write lock;
+    # it must run before the lock is taken, so only the status change is serialized below
+    serialize_writes = False
 
     def post(self, request, test_id):
         if request.user.role != User.Roles.STUDENT:
             raise PermissionDenied("Only students can submit tests.")
         try:
-            test = PersonalizedTest.objects.get(id=test_id, request__student=request.user)
+            test = PersonalizedTest.objects.select_related('request').get(id=test_id, request__student=request.user)
         except PersonalizedTest.DoesNotExist:
             raise PermissionDenied("Test not found.")
         if test.status != PersonalizedTest.Status.ASSIGNED:
             return Response({'error': 'Test is not available for submission.'}, status=400)
+        flush_attempt(test.id, request.user.id)
         total_questions = test.questions.count()
         answered_count = StudentAnswer.objects.filter(
             student=request.user,
@@ -412,11 +543,15 @@ class StudentTestSubmitView(APIView):
             return Response({
                 'error': f'Please answer all questions. {answered_count}/{total_questions} answered.'
             }, status=400)
-        test.status = PersonalizedTest.Status.COMPLETED
-        test.completed_at = timezone.now()
-        test.request.status = TestRequest.Status.COMPLETED
-        test.save()
-        test.request.save()
+        def submit():
+            complete_test(test)
+            pack_answer_sheet(test)
+
+        try:
+            run_serialized(submit)
+        except TransitionConflict as exc:
+            return Response({'error': str(exc)}, status=409)
+        score_test(test)
         return Response({
             'message': 'Test submitted successfully.',
             'test': PersonalizedTestSerializer(test).data
@@ -425,6 +560,7 @@ class StudentTestSubmitView(APIView):
 
 class StudentRecommendationsView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    replica_reads = True
 
     def get(self, request):
         if request.user.role != User.Roles.STUDENT:
@@ -434,6 +570,9 @@ class StudentRecommendationsView(APIView):
         ).select_related('personalized_test', 'personalized_test__request').prefetch_related(
             'steps', 'resources', 'resources__category', 'resources__student_progress'
         ).order_by('-created_at')
+        recommendations = shape_queryset(
+            recommendations, CareerRecommendationSerializer, request, keep_related=('personalized_test__request',)
+        )
         
         # Use serializer to get resources included
         serializer = CareerRecommendationSerializer(recommendations, many=True, context={'request': request})
@@ -449,6 +588,7 @@ class StudentRecommendationsView(APIView):
 
 class AdminRecommendationsListView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    replica_reads = True
 
     def get(self, request):
         if request.user.role != User.Roles.ADMIN:
@@ -471,13 +611,17 @@ class AdminRecommendationsListView(APIView):
 
 class AdminCompletedTestsListView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 4
+    replica_reads = True
 
     def get(self, request):
         if request.user.role != User.Roles.ADMIN:
             raise PermissionDenied("Only admins can view completed tests.")
         tests = PersonalizedTest.objects.filter(
             status=PersonalizedTest.Status.COMPLETED
-        ).select_related('request', 'request__student').prefetch_related('questions').order_by('-completed_at')
+        ).select_related('request', 'request__student', 'recommendation').prefetch_related(
+            'questions', models.Prefetch('career_scores', queryset=CareerScore.objects.select_related('tag'))
+        ).order_by('-completed_at')
         return Response({
             'tests': [
                 {
@@ -491,6 +635,7 @@ class AdminCompletedTestsListView(APIView):
                     'completed_at': test.completed_at,
                     'questions_count': test.questions.count(),
                     'has_recommendation': hasattr(test, 'recommendation'),
+                    'top_candidate': next((score.tag.name for score in test.career_scores.all()), None),
                 }
                 for test in tests
             ]
@@ -499,39 +644,35 @@ class AdminCompletedTestsListView(APIView):
 
 class AdminTestAnswersView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 6
 
     def get(self, request, test_id):
         if request.user.role != User.Roles.ADMIN:
             raise PermissionDenied("Only admins can view test answers.")
         try:
-            test = PersonalizedTest.objects.prefetch_related(
-                'questions', 'questions__options', 'questions__answers', 'questions__answers__option'
+            test = PersonalizedTest.objects.select_related(
+                'request', 'request__student', 'snapshot', 'answer_sheet'
             ).get(id=test_id, status=PersonalizedTest.Status.COMPLETED)
         except PersonalizedTest.DoesNotExist:
             raise PermissionDenied("Test not found or not completed.")
         student = test.request.student
+        selected_options = test_selected_options(test)
         answers_data = []
-        for question in test.questions.all().order_by('order'):
-            answer = StudentAnswer.objects.filter(student=student, question=question).first()
+        for question in parsed_snapshot(current_snapshot(test))['questions']:
+            options = question['options']
+            option_id = selected_options.get(question['id'])
+            label = next((option['label'] for option in options if option['id'] == option_id), None)
             answers_data.append({
                 'question': {
-                    'id': question.id,
-                    'prompt': question.prompt,
-                    'order': question.order,
+                    'id': question['id'],
+                    'prompt': question['prompt'],
+                    'order': question['order'],
                 },
-                'options': [
-                    {
-                        'id': option.id,
-                        'label': option.label,
-                        'description': option.description,
-                        'order': option.order,
-                    }
-                    for option in question.options.all().order_by('order')
-                ],
+                'options': options,
                 'selected_answer': {
-                    'option_id': answer.option.id if answer and answer.option else None,
-                    'option_label': answer.option.label if answer and answer.option else None,
-                } if (answer and answer.option) else None,
+                    'option_id': option_id,
+                    'option_label': label,
+                } if option_id is not None else None,
             })
         return Response({
             'test': {
@@ -544,6 +685,7 @@ class AdminTestAnswersView(APIView):
                 },
                 'completed_at': test.completed_at,
                 'answers': answers_data,
+                'career_candidates': career_candidates(test),
             }
         })
 
@@ -573,6 +715,48 @@ class AdminCreateRecommendationView(APIView):
         return Response(serializer.errors, status=400)
 
 
+class AdminSimilarRecommendationsView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, test_id):
+        if request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can view similar recommendations.")
+        try:
+            test = PersonalizedTest.objects.select_related('request').get(
+                id=test_id, status=PersonalizedTest.Status.COMPLETED
+            )
+        except PersonalizedTest.DoesNotExist:
+            raise PermissionDenied("Test not found or not completed.")
+        try:
+            k = max(1, min(int(request.query_params.get('k', 5)), 20))
+        except ValueError:
+            return Response({'error': 'k must be an integer.'}, status=400)
+        matches = similar_recommendations(test, k=k)
+        recommendations = CareerRecommendation.objects.filter(
+            id__in=[recommendation_id for recommendation_id, _ in matches]
+        ).select_related('personalized_test__request').prefetch_related('steps').in_bulk()
+        suggestions = []
+        for recommendation_id, score in matches:
+            rec = recommendations.get(recommendation_id)
+            if rec is None:
+                continue
+            suggestions.append({
+                'similarity': round(score, 4),
+                'test_id': rec.personalized_test_id,
+                'student': {
+                    'qualification': rec.personalized_test.request.qualification_snapshot,
+                    'interests': rec.personalized_test.request.interests_snapshot,
+                },
+                'recommendation': {
+                    'id': rec.id,
+                    'career_name': rec.career_name,
+                    'summary': rec.summary,
+                    'steps': RoadmapStepSerializer(rec.steps.all(), many=True).data,
+                },
+            })
+        return Response({'test_id': test.id, 'suggestions': suggestions})
+
+
 class StudentRecommendationExportView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
@@ -592,7 +776,8 @@ class StudentRecommendationExportView(APIView):
         student = recommendation.personalized_test.request.student
         
         # Generate PDF
-        pdf_buffer = generate_recommendation_pdf(recommendation, student)
+        with timer('pdf_render_seconds'):
+            pdf_buffer = generate_recommendation_pdf(recommendation, student)
         
         # Create HTTP response with PDF
         response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
@@ -602,9 +787,66 @@ class StudentRecommendationExportView(APIView):
         return response
 
 
+class AdminCareerTagListView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = CareerTagSerializer
+
+    def get_queryset(self):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can manage career tags.")
+        return CareerTag.objects.all().order_by('name')
+
+    def perform_create(self, serializer):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can manage career tags.")
+        serializer.save()
+
+
+class AdminCareerTagDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = CareerTagSerializer
+
+    def get_queryset(self):
+        if self.request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can manage career tags.")
+        return CareerTag.objects.all()
+
+
+class AdminMetricsView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        if request.user.role != User.Roles.ADMIN:
+            raise PermissionDenied("Only admins can view metrics.")
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class EventStreamView(APIView):
+    authentication_classes = (QueryTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+    renderer_classes = (FastJSONRenderer, EventStreamRenderer)
+
+    def get(self, request):
+        if request.user.role == User.Roles.ADMIN:
+            return event_stream_response(request, ADMINS)
+        return event_stream_response(request, request.user.id)
+
+
+class BatchView(AsyncAPIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    async def get(self, request):
+        paths = request.query_params.getlist('path')
+        if not paths:
+            return Response({'error': 'Pass one or more path parameters.'}, status=400)
+        if len(paths) > max_paths():
+            return Response({'error': f'At most {max_paths()} paths per batch.'}, status=400)
+        return HttpResponse(await dispatch_batch(request, paths), content_type='application/json')
+
+
 # ========== RESOURCE MANAGEMENT VIEWS ==========
 
-class AdminResourceCategoryListView(generics.ListCreateAPIView):
+class AdminResourceCategoryListView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = ResourceCategorySerializer
 
@@ -614,7 +856,7 @@ class AdminResourceCategoryListView(generics.ListCreateAPIView):
         return ResourceCategory.objects.all().order_by('name')
 
 
-class AdminResourceCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AdminResourceCategoryDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = ResourceCategorySerializer
 
@@ -624,8 +866,10 @@ class AdminResourceCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
         return ResourceCategory.objects.all()
 
 
-class AdminResourceListView(generics.ListCreateAPIView):
+class AdminResourceListView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    # Serialize the list through core.projections instead of CareerResourceSerializer
+    use_projection = True
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -649,13 +893,18 @@ class AdminResourceListView(generics.ListCreateAPIView):
         
         return queryset.order_by('order', 'created_at')
 
+    def list(self, request, *args, **kwargs):
+        if not self.use_projection or has_fieldset(request):
+            return super().list(request, *args, **kwargs)
+        return Response(serialize_resources(self.filter_queryset(self.get_queryset()), request))
+
     def perform_create(self, serializer):
         if self.request.user.role != User.Roles.ADMIN:
             raise PermissionDenied("Only admins can create resources.")
         serializer.save(admin=self.request.user)
 
 
-class AdminResourceDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AdminResourceDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = CareerResourceSerializer
 
@@ -679,22 +928,18 @@ class AdminResourceDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class StudentResourceListView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 3
+    replica_reads = True
+    use_projection = True
 
     def get(self, request):
         if request.user.role != User.Roles.STUDENT:
             raise PermissionDenied("Only students can view resources.")
         
-        # Get resources for student's career recommendations
-        student_recommendations = CareerRecommendation.objects.filter(
-            personalized_test__request__student=request.user
-        ).values_list('id', flat=True)
-        
-        # Get resources linked to student's recommendations or general resources (no career_recommendation)
-        resources = CareerResource.objects.filter(
-            is_active=True
-        ).filter(
-            models.Q(career_recommendation__in=student_recommendations) | models.Q(career_recommendation__isnull=True)
-        ).select_related('category', 'admin').prefetch_related('student_progress').distinct()
+        # Resources linked to the student's recommendations (via the access index) or general resources
+        resources = visible_resources(request.user).select_related('category', 'admin').prefetch_related(
+            models.Prefetch('student_progress', queryset=StudentResourceProgress.objects.filter(student=request.user))
+        )
         
         # Filter by category if provided
         category_id = request.query_params.get('category_id')
@@ -706,28 +951,25 @@ class StudentResourceListView(APIView):
         if resource_type:
             resources = resources.filter(resource_type=resource_type)
         
+        if self.use_projection and not has_fieldset(request):
+            return Response({'resources': serialize_resources(resources, request, student=request.user)})
+        resources = shape_queryset(resources, CareerResourceSerializer, request)
         serializer = CareerResourceSerializer(resources, many=True, context={'request': request})
         return Response({'resources': serializer.data})
 
 
-class StudentResourceDetailView(generics.RetrieveAPIView):
+class StudentResourceDetailView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 3
     serializer_class = CareerResourceSerializer
 
     def get_queryset(self):
         if self.request.user.role != User.Roles.STUDENT:
             raise PermissionDenied("Only students can view resources.")
         
-        # Get resources for student's career recommendations
-        student_recommendations = CareerRecommendation.objects.filter(
-            personalized_test__request__student=self.request.user
-        ).values_list('id', flat=True)
-        
-        return CareerResource.objects.filter(
-            is_active=True
-        ).filter(
-            models.Q(career_recommendation__in=student_recommendations) | models.Q(career_recommendation__isnull=True)
-        ).select_related('category', 'admin').prefetch_related('student_progress')
+        return visible_resources(self.request.user).select_related('category', 'admin').prefetch_related(
+            models.Prefetch('student_progress', queryset=StudentResourceProgress.objects.filter(student=self.request.user))
+        )
 
 
 class StudentResourceProgressView(APIView):
@@ -743,11 +985,7 @@ class StudentResourceProgressView(APIView):
             raise PermissionDenied("Resource not found.")
         
         # Verify student has access to this resource
-        student_recommendations = CareerRecommendation.objects.filter(
-            personalized_test__request__student=request.user
-        ).values_list('id', flat=True)
-        
-        if resource.career_recommendation and resource.career_recommendation.id not in student_recommendations:
+        if not can_access(request.user, resource):
             raise PermissionDenied("You don't have access to this resource.")
         
         serializer = StudentResourceProgressSerializer(
@@ -779,6 +1017,9 @@ class StudentResourceProgressView(APIView):
 
 class StudentMyResourcesView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 3
+    replica_reads = True
+    use_projection = True
 
     def get(self, request):
         if request.user.role != User.Roles.STUDENT:
@@ -787,18 +1028,25 @@ class StudentMyResourcesView(APIView):
         # Get all resources with progress for this student
         progress_list = StudentResourceProgress.objects.filter(
             student=request.user
-        ).select_related('resource', 'resource__category').order_by('-updated_at')
-        
+        ).select_related('resource', 'resource__category', 'resource__admin').prefetch_related(
+            models.Prefetch('resource__student_progress', queryset=StudentResourceProgress.objects.filter(student=request.user))
+        ).order_by('-updated_at')
+
+        if self.use_projection and not has_fieldset(request):
+            return Response({'resources': serialize_my_resources(progress_list, request)})
+
         resources_data = []
         for progress in progress_list:
             resource_data = CareerResourceSerializer(progress.resource, context={'request': request}).data
-            resource_data['progress'] = {
-                'status': progress.status,
-                'is_favorite': progress.is_favorite,
-                'notes': progress.notes,
-                'started_at': progress.started_at,
-                'completed_at': progress.completed_at,
-            }
+            resource_data.update(select_keys(request, {
+                'progress': select_keys(request, {
+                    'status': progress.status,
+                    'is_favorite': progress.is_favorite,
+                    'notes': progress.notes,
+                    'started_at': progress.started_at,
+                    'completed_at': progress.completed_at,
+                }, ('progress',)),
+            }))
             resources_data.append(resource_data)
         
         return Response({'resources': resources_data})